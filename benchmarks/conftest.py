@@ -0,0 +1,18 @@
+import os
+import pytest
+
+from generate import write_config_dir
+
+# frame counts to benchmark with, a million frames takes a while to
+#  generate so it has to be asked for, e.g.
+#  FLUBBER_BENCHMARK_SIZES=1000,100000,1000000
+SIZES = [int(size) for size in os.environ.get(
+    'FLUBBER_BENCHMARK_SIZES', '1000,100000').split(',')]
+
+
+@pytest.fixture(scope='session', params=SIZES, ids=lambda size: str(size))
+def config_dir(request, tmp_path_factory):
+    # Watson config directory with a synthetic frames file, shared by all
+    #  benchmarks of the same size
+    path = tmp_path_factory.mktemp('watson-{}'.format(request.param))
+    return write_config_dir(str(path), request.param)
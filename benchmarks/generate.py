@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""Write synthetic Watson config directories for benchmarking.
+
+Usage: python benchmarks/generate.py DIRECTORY FRAME_COUNT [SEED]
+"""
+import os
+import sys
+import json
+import random
+
+# frames are spread over working hours of consecutive days ending at
+#  this fixed moment, so that every run benchmarks the same data
+#  (2023-11-14 22:13:20 UTC)
+EPOCH = 1700000000
+# roughly like the history of a busy user
+FRAMES_PER_DAY = 8
+PROJECT_COUNT = 80
+TAG_COUNT = 40
+
+
+def generate_frames(count, seed=0, now=EPOCH):
+    # Watson frame records (start, stop, project, id, tags, updated_at) in
+    #  the order Watson appends them, oldest first, all of them over by
+    #  now
+    rng = random.Random(seed)
+    projects = ["project-{}".format(i) for i in range(PROJECT_COUNT)]
+    tags = ["tag-{}".format(i) for i in range(TAG_COUNT)]
+    days = count // FRAMES_PER_DAY + 1
+    start = now - days * 86400
+    frames = list()
+    for i in range(count):
+        # a break between frames and a frame of up to two hours
+        start += rng.randint(60, 3600)
+        stop = start + rng.randint(300, 7200)
+        # projects and tags follow a skewed distribution like real data
+        project = projects[int(rng.paretovariate(1.2)) % PROJECT_COUNT]
+        frame_tags = rng.sample(tags, rng.choice((0, 1, 1, 2, 3)))
+        frame_id = "{:032x}".format(rng.getrandbits(128))
+        frames.append([start, stop, project, frame_id, frame_tags, stop])
+        start = stop
+        if (i + 1) % FRAMES_PER_DAY == 0:
+            # go on the next morning
+            start += 86400 - (start % 86400) + 8 * 3600
+    if frames and frames[-1][1] > now:
+        # long days ran past now, move everything back by whole days
+        shift = -(-(frames[-1][1] - now) // 86400) * 86400
+        for frame in frames:
+            frame[0] -= shift
+            frame[1] -= shift
+            frame[5] -= shift
+    return frames
+
+
+def write_config_dir(path, count, seed=0):
+    # Watson config directory with a frames file of count frames
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, 'frames'), 'w') as f:
+        # same layout as Watson writes
+        json.dump(generate_frames(count, seed), f, indent=1,
+                  ensure_ascii=False)
+    return path
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4):
+        sys.exit(__doc__.strip())
+    write_config_dir(sys.argv[1], int(sys.argv[2]),
+                     int(sys.argv[3]) if len(sys.argv) == 4 else 0)
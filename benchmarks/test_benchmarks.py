@@ -0,0 +1,189 @@
+import random
+import shutil
+import arrow
+import pytest
+
+# flubber package requires gi on import, no display is needed though
+pytest.importorskip("gi")
+pytest.importorskip("pytest_benchmark")
+
+from flubber.catalog import FlubberCatalog  # noqa: E402
+from flubber.index import FlubberFrameIndex, local_period  # noqa: E402
+from flubber.report import FlubberReport  # noqa: E402
+from flubber.session import FlubberSession  # noqa: E402
+from flubber.util import format_day, format_clock, format_duration  # noqa
+from flubber.util import arrow_parse_datetime, local_tz  # noqa: E402
+from flubber.view import group_view_days  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def session(config_dir):
+    # session with the frame index built, for benchmarks of what
+    #  happens after loading
+    session = FlubberSession(config_dir)
+    session.frame_index()
+    return session
+
+
+@pytest.fixture
+def index(session):
+    return session.frame_index()
+
+
+def last_month(index):
+    # range of the month of the newest frame
+    return local_period('month', index.starts[-1])
+
+
+def test_load(benchmark, config_dir):
+    # cold start: stream the frames file into a frame index
+    index = benchmark(lambda: FlubberSession(config_dir).frame_index())
+    assert len(index) > 0
+
+
+def test_load_window(benchmark, config_dir, index):
+    # cold start showing only the last month
+    start, stop = last_month(index)
+    benchmark(lambda: FlubberSession(config_dir).frame_index(start))
+
+
+def test_load_watson(benchmark, config_dir):
+    # Watson's own parse of all frames, needed for changing frames
+    benchmark(lambda: len(FlubberSession(config_dir).watson.frames))
+
+
+def test_span_filter(benchmark, index):
+    start, stop = last_month(index)
+    lo, hi = benchmark(index.range, start, stop)
+    assert hi > lo
+
+
+@pytest.mark.parametrize('span', ['month', 'all'])
+def test_day_grouping(benchmark, index, span):
+    if span == 'month':
+        lo, hi = index.range(*last_month(index))
+    else:
+        lo, hi = 0, len(index)
+    view_days, search_index = benchmark(group_view_days, index, lo, hi)
+    assert len(search_index) == hi - lo
+
+
+@pytest.mark.parametrize('grouping', [FlubberReport.PROJECT,
+                                      FlubberReport.PROJECT_TAG])
+def test_totals(benchmark, index, grouping):
+    # totals of all frames with nothing cached
+    totals = benchmark(lambda: FlubberReport().totals(index, grouping))
+    assert totals
+
+
+def test_row_formatting(benchmark, index):
+    # text of the rows of a month as drawn by the view, caches are
+    #  emptied before every round
+    lo, hi = index.range(*last_month(index))
+    view_days, search_index = group_view_days(index, lo, hi)
+
+    def clear_caches():
+        format_day.cache_clear()
+        format_clock.cache_clear()
+        format_duration.cache_clear()
+
+    def format_rows():
+        for day_start, rows, daily_total in view_days.values():
+            format_day(day_start)
+            format_duration(daily_total)
+            for start, stop, duration, project, tags in rows.values():
+                format_clock(start, stop)
+
+    benchmark.pedantic(format_rows, setup=clear_caches, rounds=20)
+
+
+def test_catalog_build(benchmark, index):
+    benchmark(lambda: FlubberCatalog().rebuild(index))
+
+
+def test_frame_lookup(benchmark, index):
+    # short ids like the view shows them
+    rng = random.Random(0)
+    prefixes = [index.ids[rng.randrange(len(index))][:7]
+                for i in range(1000)]
+
+    def lookup():
+        for prefix in prefixes:
+            index.find(prefix)
+
+    benchmark(lookup)
+
+
+def test_save(benchmark, config_dir, tmp_path):
+    # writing all frames back after a change
+    shutil.copy(config_dir + '/frames', str(tmp_path / 'frames'))
+    session = FlubberSession(str(tmp_path))
+    frames = session.watson.frames
+
+    def save():
+        frames.changed = True
+        session.save()
+
+    benchmark(save)
+
+
+def test_save_journal(benchmark, config_dir, tmp_path):
+    # recording a single change, the frames file is left as it is
+    shutil.copy(config_dir + '/frames', str(tmp_path / 'frames'))
+    session = FlubberSession(str(tmp_path))
+    frame = session.watson.frames[-1]
+
+    def save():
+        session.update_frame(frame.id, frame.project, frame.start,
+                             frame.stop, frame.tags)
+        session.write_files()
+
+    benchmark(save)
+
+
+@pytest.fixture(scope='module')
+def large_catalog():
+    # 50k project names of a few words, used once a day each
+    rng = random.Random(0)
+    words = ["acme", "website", "backend", "mobile", "review", "support",
+             "infra", "design", "billing", "research"]
+    records = [(i * 86400, i * 86400 + 3600,
+                "{}-{}-{}".format(rng.choice(words), rng.choice(words), i),
+                "{:032x}".format(i), [], None)
+               for i in range(50000)]
+    catalog = FlubberCatalog()
+    catalog.rebuild(FlubberFrameIndex(records))
+    # completion index is built on first use
+    catalog.complete(FlubberCatalog.PROJECT, "a")
+    return catalog
+
+
+@pytest.mark.parametrize('text', ['', 'a', 'b', 'r', 'ac', 'acme', '4999'])
+def test_complete(benchmark, large_catalog, text):
+    # completion while typing, from all names through a fifth of them
+    #  down to a handful, within a frame at any length of the prefix
+    names = benchmark(large_catalog.complete, FlubberCatalog.PROJECT, text)
+    assert names
+
+
+DATES = ["2018-05-{:02d} {:02d}:{:02d}".format(day, hour, minute)
+         for day in range(1, 29) for hour in (8, 13, 17)
+         for minute in (0, 30)]
+
+
+@pytest.mark.parametrize('parser', ['arrow_parse_datetime', 'arrow.get'])
+def test_parse_datetime(benchmark, parser):
+    # dates as typed into the dialogs, with the precompiled patterns and
+    #  with arrow.get() and format strings like before
+    if parser == 'arrow.get':
+        def parse(value):
+            return arrow.get(value, ['YYYY-MM-DD HH:mm:ss',
+                                     'YYYY-MM-DD HH:mm'], tzinfo=local_tz)
+    else:
+        parse = arrow_parse_datetime
+
+    def parse_all():
+        return [parse(value) for value in DATES]
+
+    dates = benchmark(parse_all)
+    assert dates[-1] == arrow.Arrow(2018, 5, 28, 17, 30, tzinfo=local_tz)
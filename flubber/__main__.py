@@ -1,6 +1,20 @@
+import sys
+
+try:
+    from flubber.startup import FlubberImportTimer
+except ImportError:
+    from .startup import FlubberImportTimer
+
+# time the imports of gui as well, Gtk and the rest of gi.repository
+#  are the bulk of start up
+import_timer = None
+if "--profile-startup" in sys.argv[1:]:
+    import_timer = FlubberImportTimer()
+    import_timer.install()
+
 try:
     from flubber import gui
 except ImportError:
     from . import gui
 
-gui.main()
+sys.exit(gui.main(import_timer))
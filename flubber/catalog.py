@@ -0,0 +1,195 @@
+import heapq
+import math
+import re
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+
+
+def completion_tokens(name):
+    # lowercased name and each of its words, so that "acme-website" is
+    #  found when typing "acme" as well as "web"
+    name = name.lower()
+    tokens = set(token for token in re.split(r'[\W_]+', name) if token)
+    tokens.add(name)
+    return tokens
+
+
+class FlubberCatalogEntry(object):
+
+    __slots__ = ('name', 'count', 'last_used')
+
+    def __init__(self, name, count=0, last_used=0):
+        self.name = name
+        # number of frames using the project or tag
+        self.count = count
+        # epoch of the latest stop of those frames
+        self.last_used = last_used
+
+
+class FlubberCatalog(object):
+
+    # kinds of entries in the catalog
+    PROJECT = 'project'
+    TAG = 'tag'
+
+    # recency part of the completion ranking halves every this many seconds
+    recency_half_life = 30 * 24 * 3600
+
+    def __init__(self):
+        self.entries = {self.PROJECT: dict(), self.TAG: dict()}
+        # listener(kind, name, entry) is called after every change, entry
+        #  is None if the name is no longer used. After a rebuild all
+        #  listeners are called once with kind None.
+        self.listeners = list()
+        # per kind sorted list of (token, name) for prefix completion,
+        #  built on first use and maintained as names come and go
+        self._completion = dict()
+        # per kind list of (-rank, name, tokens) best ranked first, kept
+        #  alongside the tokens
+        self._ranked = dict()
+
+    @property
+    def projects(self):
+        return self.entries[self.PROJECT]
+
+    @property
+    def tags(self):
+        return self.entries[self.TAG]
+
+    def names(self, kind):
+        return sorted(self.entries[kind])
+
+    def rebuild(self, index):
+        # count usage from a FlubberFrameIndex, the interned id arrays make
+        #  this a couple of Counter passes instead of a pass per frame
+        project_counts = Counter(index.projects)
+        tag_counts = Counter(index.tags)
+        projects = dict()
+        tags = dict()
+        for project_id, count in project_counts.items():
+            name = index.project_names[project_id]
+            projects[name] = FlubberCatalogEntry(name, count)
+        for tag_id, count in tag_counts.items():
+            name = index.tag_names[tag_id]
+            tags[name] = FlubberCatalogEntry(name, count)
+        # last use of each name, frames are sorted by start so walking
+        #  backwards mostly finds the latest use first
+        for i in range(len(index) - 1, -1, -1):
+            stop = index.stops[i]
+            entry = projects[index.project_names[index.projects[i]]]
+            if stop > entry.last_used:
+                entry.last_used = stop
+            for tag_id in index.frame_tags(i):
+                entry = tags[index.tag_names[tag_id]]
+                if stop > entry.last_used:
+                    entry.last_used = stop
+        self.entries = {self.PROJECT: projects, self.TAG: tags}
+        self._completion = dict()
+        self._ranked = dict()
+        self._notify(None, None, None)
+
+    def frecency(self, entry, now=None):
+        # often and recently used names rank first
+        if now is None:
+            now = time.time()
+        age = max(now - entry.last_used, 0)
+        return entry.count * 0.5 ** (age / self.recency_half_life)
+
+    def rank(self, entry):
+        # frecency() at any moment is exp(rank) scaled by the same factor
+        #  for every entry, so ranking by it orders names the same way
+        #  whenever it is done and can be kept between calls. Logarithm
+        #  so that recent epochs do not overflow.
+        return math.log(entry.count) + \
+            entry.last_used * math.log(2) / self.recency_half_life
+
+    def complete(self, kind, text, limit=10):
+        # names of kind having a word starting with text, best ranked
+        #  first and at most limit of them. Few candidates are found with
+        #  a bisect and ranked, for many of them it is cheaper to walk the
+        #  names best ranked first until limit of them match.
+        tokens = self._completion_index(kind)
+        ranked = self._ranked[kind]
+        prefix = text.lower()
+        lo = bisect_left(tokens, (prefix,))
+        if prefix:
+            # first token past the ones starting with prefix
+            hi = bisect_left(tokens, (prefix[:-1] + chr(ord(prefix[-1]) + 1),),
+                             lo)
+        else:
+            hi = len(tokens)
+        # ranking the candidates costs hi - lo, walking costs about
+        #  limit * len(ranked) / (hi - lo) with matches spread evenly
+        if (hi - lo) ** 2 <= limit * len(ranked):
+            entries = self.entries[kind]
+            names = set(name for token, name in tokens[lo:hi])
+            best = heapq.nsmallest(
+                limit, ((-self.rank(entries[name]), name) for name in names))
+            return [name for rank, name in best]
+        names = list()
+        for rank, name, name_tokens in ranked:
+            if any(token.startswith(prefix) for token in name_tokens):
+                names.append(name)
+                if len(names) == limit:
+                    break
+        return names
+
+    def _completion_index(self, kind):
+        if kind not in self._completion:
+            self._completion[kind] = sorted(
+                (token, name)
+                for name in self.entries[kind]
+                for token in completion_tokens(name))
+            self._ranked[kind] = sorted(
+                (-self.rank(entry), name, tuple(completion_tokens(name)))
+                for name, entry in self.entries[kind].items())
+        return self._completion[kind]
+
+    def add_frame(self, frame):
+        stop = frame.stop.int_timestamp
+        self._use(self.PROJECT, frame.project, 1, stop)
+        for tag in frame.tags:
+            self._use(self.TAG, tag, 1, stop)
+
+    def remove_frame(self, frame):
+        self._use(self.PROJECT, frame.project, -1)
+        for tag in frame.tags:
+            self._use(self.TAG, tag, -1)
+
+    def _use(self, kind, name, delta, last_used=0):
+        entries = self.entries[kind]
+        entry = entries.get(name)
+        if entry is None:
+            if delta < 0:
+                # not known to us, nothing to remove
+                return
+            entry = entries[name] = FlubberCatalogEntry(name)
+            if kind in self._completion:
+                for token in completion_tokens(name):
+                    insort(self._completion[kind], (token, name))
+        elif kind in self._ranked:
+            # ranked again below with the new count and last use
+            ranked = self._ranked[kind]
+            i = bisect_left(ranked, (-self.rank(entry), name))
+            if i < len(ranked) and ranked[i][1] == name:
+                del ranked[i]
+        entry.count += delta
+        entry.last_used = max(entry.last_used, last_used)
+        if entry.count <= 0:
+            del entries[name]
+            entry = None
+            if kind in self._completion:
+                tokens = self._completion[kind]
+                for token in completion_tokens(name):
+                    i = bisect_left(tokens, (token, name))
+                    if i < len(tokens) and tokens[i] == (token, name):
+                        del tokens[i]
+        elif kind in self._ranked:
+            insort(self._ranked[kind], (-self.rank(entry), name,
+                                        tuple(completion_tokens(name))))
+        self._notify(kind, name, entry)
+
+    def _notify(self, kind, name, entry):
+        for listener in self.listeners:
+            listener(kind, name, entry)
@@ -0,0 +1,197 @@
+import json
+import argparse
+import datetime
+import functools
+from flubber.index import local_period
+from flubber.report import FlubberReport
+from flubber.util import beautify_tags, format_duration
+
+# first arguments handled as commands instead of opening the window
+COMMANDS = ('start', 'stop', 'status', 'report')
+
+
+class FlubberCommandExit(Exception):
+
+    # the command is done, with the exit status to return
+
+    def __init__(self, status):
+        super(FlubberCommandExit, self).__init__(status)
+        self.status = status
+
+
+class FlubberArgumentParser(argparse.ArgumentParser):
+
+    # writes through the given functions instead of sys.stdout and
+    #  sys.stderr and never exits the process, commands may be run on
+    #  behalf of another flubber process
+
+    def __init__(self, out, err, *args, **kwargs):
+        self.out = out
+        self.err = err
+        super(FlubberArgumentParser, self).__init__(*args, **kwargs)
+
+    def _print_message(self, message, file=None):
+        if message:
+            self.out(message.rstrip("\n"))
+
+    def exit(self, status=0, message=None):
+        if message:
+            self.err(message.rstrip("\n"))
+        raise FlubberCommandExit(status)
+
+    def error(self, message):
+        self.err(self.format_usage().rstrip("\n"))
+        self.exit(2, "{}: error: {}".format(self.prog, message))
+
+
+def parse_project_and_tags(words):
+    # like Watson: words up to the first one starting with '+' are the
+    #  project, each '+word' starts a new tag and other words continue it
+    project = list()
+    tags = list()
+    for word in words:
+        if word.startswith('+'):
+            tags.append([word[1:]])
+        elif tags:
+            tags[-1].append(word)
+        else:
+            project.append(word)
+    return " ".join(project), [" ".join(tag) for tag in tags if tag[0]]
+
+
+def create_parser(out, err):
+    parser = FlubberArgumentParser(
+        out, err, prog="flubber",
+        description="Track time with Watson, served by the running "
+                    "Flubber window when there is one.")
+    commands = parser.add_subparsers(
+        dest="command",
+        parser_class=functools.partial(FlubberArgumentParser, out, err))
+    commands.required = True
+    start = commands.add_parser("start", help="start tracking a project")
+    start.add_argument("args", nargs="+", metavar="project [+tag ...]")
+    commands.add_parser("stop", help="stop tracking the current project")
+    commands.add_parser("status", help="show the current project")
+    report = commands.add_parser("report",
+                                 help="show time spent per project")
+    report.add_argument("--period", default="week",
+                        choices=("day", "week", "month", "all"),
+                        help="period to report (default: week)")
+    report.add_argument("--json", action="store_true",
+                        help="output the report as JSON")
+    return parser
+
+
+def run_command(session, args, out, err, save=None):
+    # run a command line like ['start', 'project', '+tag'] against session,
+    #  printing with out(text) and err(text). Changes are written with
+    #  save(), session.save() by default. Returns the exit status and
+    #  whether Watson data was changed.
+    from watson.watson import WatsonError
+    if save is None:
+        save = session.save
+    try:
+        options = create_parser(out, err).parse_args(args)
+        handler = _command_handlers[options.command]
+        changed = handler(session, options, out)
+        if changed:
+            save()
+        return 0, changed
+    except FlubberCommandExit as e:
+        return e.status, False
+    except (WatsonError, OSError) as e:
+        err("Error: {}".format(e))
+        return 1, False
+
+
+def _command_start(session, options, out):
+    project, tags = parse_project_and_tags(options.args)
+    if project == "":
+        from watson.watson import WatsonError
+        raise WatsonError("No project given.")
+    current = session.start(project, tags)
+    out("Starting project {}{} at {:HH:mm}".format(
+        current["project"], beautify_tags(current["tags"]),
+        current["start"]))
+    return True
+
+
+def _command_stop(session, options, out):
+    frame = session.stop()
+    out("Stopping project {}{}, started {}. (id: {})".format(
+        frame.project, beautify_tags(frame.tags),
+        frame.start.humanize(), frame.id[:7]))
+    return True
+
+
+def _command_status(session, options, out):
+    watson = session.watson
+    if not watson.is_started:
+        out("No project started.")
+        return False
+    current = watson.current
+    out("Project {}{} started {} ({:YYYY.MM.DD HH:mm:ss})".format(
+        current["project"], beautify_tags(current["tags"]),
+        current["start"].humanize(), current["start"]))
+    return False
+
+
+def _command_report(session, options, out):
+    if options.period == "all":
+        start, stop = None, None
+    else:
+        start, stop = local_period(options.period)
+    # served from the cached totals of the session
+    projects = session.report_totals(FlubberReport.PROJECT, start, stop)
+    project_tags = session.report_totals(FlubberReport.PROJECT_TAG,
+                                         start, stop)
+    project_names = session.project_names.names
+    tag_names = session.tag_names.names
+    tags_by_project = dict()
+    for (project, tag), seconds in project_tags:
+        if tag != FlubberReport.NO_TAG:
+            tags_by_project.setdefault(project, list()).append(
+                (tag_names[tag], seconds))
+
+    # same layout as 'watson report --json'
+    report = {
+        "timespan": {
+            "from": _isoformat(start),
+            "to": _isoformat(stop),
+        },
+        "projects": [
+            {"name": project_names[project],
+             "time": seconds,
+             "tags": [{"name": tag, "time": tag_seconds}
+                      for tag, tag_seconds in tags_by_project.get(
+                          project, ())]}
+            for project, seconds in projects],
+        "time": sum(seconds for project, seconds in projects),
+    }
+    if options.json:
+        out(json.dumps(report, indent=4))
+        return False
+
+    for project in report["projects"]:
+        out("{} - {}".format(project["name"],
+                             format_duration(project["time"])))
+        for tag in project["tags"]:
+            out("\t[{} {}]".format(tag["name"],
+                                   format_duration(tag["time"])))
+    out("Total: {}".format(format_duration(report["time"])))
+    return False
+
+
+def _isoformat(timestamp):
+    if timestamp is None:
+        return None
+    return datetime.datetime.fromtimestamp(timestamp).astimezone(
+        ).isoformat()
+
+
+_command_handlers = {
+    'start': _command_start,
+    'stop': _command_stop,
+    'status': _command_status,
+    'report': _command_report,
+}
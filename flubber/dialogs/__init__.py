@@ -1,7 +1,33 @@
-from .add import FlubberAddFrameDialog
-from .start import FlubberStartFrameDialog
-from .edit import FlubberEditFrameDialog
+import sys
+import importlib
+
+# dialogs are imported on first use so that they are not loaded before
+#  the main window is shown
+_dialog_modules = {'FlubberAddFrameDialog': '.add',
+                   'FlubberStartFrameDialog': '.start',
+                   'FlubberEditFrameDialog': '.edit',
+                   'FlubberBulkEditFrameDialog': '.bulk',
+                   'FlubberRangeDialog': '.range'}
 
 __all__ = ['FlubberAddFrameDialog',
            'FlubberStartFrameDialog',
-           'FlubberEditFrameDialog']
+           'FlubberEditFrameDialog',
+           'FlubberBulkEditFrameDialog',
+           'FlubberRangeDialog']
+
+
+def __getattr__(name):
+    try:
+        module = importlib.import_module(_dialog_modules[name], __name__)
+    except KeyError:
+        raise AttributeError("module {!r} has no attribute {!r}".format(
+            __name__, name))
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+if sys.version_info < (3, 7):
+    # modules can not have __getattr__, import all dialogs right away
+    for _name in __all__:
+        __getattr__(_name)
@@ -1,21 +1,18 @@
 from gi.repository import Gtk, Gio
-from watson import Watson
 from flubber.dialogs.util import flubber_error_dialog
-from flubber.util import arrow_parse_datetime
-from arrow.parser import ParserError
+from flubber.catalog import FlubberCatalog
+from flubber.dialogs.validation import FlubberDateRangeValidation
+from flubber.timing import timed
 
 
-class FlubberAddFrameDialog(Gtk.Dialog):
+class FlubberAddFrameDialog(FlubberDateRangeValidation, Gtk.Dialog):
 
     # these booleans all need to switch to True state for OK button to release
     project_validated = False
     start_date_validated = False
     end_date_validated = False
 
-    # these fields contain the parsed datetime object
-    parsed_start_datetime = None
-    parsed_end_datetime = None
-
+    @timed()
     def __init__(self, parent):
         Gtk.Dialog.__init__(self, "Add frame", parent, 0,
                             (Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL,
@@ -24,8 +21,9 @@ class FlubberAddFrameDialog(Gtk.Dialog):
         # validate here to set OK button in disabled state on init
         self.self_validate()
 
-        # init Watson to read in existing projects and tags from it
-        wat = Watson()
+        # existing projects and tags come from the catalog shared by
+        #  all dialogs
+        catalog = parent.catalog_store.sync()
 
         # set default size and border to 10 pixels
         self.set_default_size(150, 100)
@@ -53,18 +51,14 @@ class FlubberAddFrameDialog(Gtk.Dialog):
         # Label and combobox for project selection
         project_label = Gtk.Label("Project")
         grid.add(project_label)
-        project_store = Gtk.ListStore(str, str)
-        for project in wat.projects:
-            project_store.append([project, project])
+        project_store = catalog.project_store
         self.project_combo = Gtk.ComboBox(has_entry=True)
         self.project_combo.set_model(project_store)
         self.project_combo.set_entry_text_column(1)
         self.project_combo.connect("changed", self.on_project_combo_changed)
         # also add completion to the entry text field inside the combobox
-        project_completion = Gtk.EntryCompletion()
-        project_completion.set_model(project_store)
-        project_completion.set_text_column(0)
-        self.project_combo.get_child().set_completion(project_completion)
+        catalog.attach_completion(self.project_combo.get_child(),
+                                  FlubberCatalog.PROJECT)
         # add combobox to grid
         grid.attach_next_to(self.project_combo, project_label,
                             Gtk.PositionType.RIGHT, 1, 1)
@@ -98,17 +92,13 @@ class FlubberAddFrameDialog(Gtk.Dialog):
         page2.add(grid2)
 
         # editable combobox to add existing/new tags to listbox
-        existing_tag_store = Gtk.ListStore(str, str)
-        for tag in wat.tags:
-            existing_tag_store.append([tag, tag])
+        existing_tag_store = catalog.tag_store
         self.tag_combo = Gtk.ComboBox(has_entry=True)
         self.tag_combo.set_model(existing_tag_store)
         self.tag_combo.set_entry_text_column(1)
         # also add completion to the entry text field inside the combobox
-        tag_completion = Gtk.EntryCompletion()
-        tag_completion.set_model(existing_tag_store)
-        tag_completion.set_text_column(0)
-        self.tag_combo.get_child().set_completion(tag_completion)
+        catalog.attach_completion(self.tag_combo.get_child(),
+                                  FlubberCatalog.TAG)
         # add combobox to grid
         grid2.add(self.tag_combo)
         # interface button to add items to list
@@ -157,78 +147,6 @@ class FlubberAddFrameDialog(Gtk.Dialog):
         else:
             self.set_response_sensitive(Gtk.ResponseType.OK, True)
 
-    def on_start_entry_changed(self, entry):
-        try:
-            # try to parse the input field contents with arrow
-            self.parsed_start_datetime = arrow_parse_datetime(entry.get_text())
-            # check that end date comes after start time
-            if self.parsed_end_datetime < self.parsed_start_datetime:
-                raise ValueError("Start time has to occur before end time.")
-            self.start_date_validated = True
-            entry.set_icon_from_icon_name(
-                Gtk.EntryIconPosition.PRIMARY,
-                None)
-            entry.set_icon_tooltip_text(
-                Gtk.EntryIconPosition.PRIMARY,
-                None)
-        except ValueError as e:
-            self.start_date_validated = False
-            entry.set_icon_from_icon_name(
-                Gtk.EntryIconPosition.PRIMARY,
-                "dialog-error")
-            entry.set_icon_tooltip_text(
-                Gtk.EntryIconPosition.PRIMARY,
-                str(e))
-        except ParserError as e:
-            self.start_date_validated = False
-            entry.set_icon_from_icon_name(
-                Gtk.EntryIconPosition.PRIMARY,
-                "dialog-error")
-            entry.set_icon_tooltip_text(
-                Gtk.EntryIconPosition.PRIMARY,
-                str(e))
-        except TypeError:
-            # Triggers when dialog is first opened and not all values are
-            #  yet parsed into class variables and dates are compared
-            pass
-        finally:
-            # test toggle of OK button
-            self.self_validate()
-
-    def on_end_entry_changed(self, entry):
-        try:
-            # try to parse the input field contents with arrow
-            self.parsed_end_datetime = arrow_parse_datetime(entry.get_text())
-            # check that end date comes after start time
-            if self.parsed_end_datetime < self.parsed_start_datetime:
-                raise ValueError("Start time has to occur before end time.")
-            self.end_date_validated = True
-            entry.set_icon_from_icon_name(
-                Gtk.EntryIconPosition.PRIMARY,
-                None)
-            entry.set_icon_tooltip_text(
-                Gtk.EntryIconPosition.PRIMARY,
-                None)
-        except ValueError as e:
-            self.end_date_validated = False
-            entry.set_icon_from_icon_name(
-                Gtk.EntryIconPosition.PRIMARY,
-                "dialog-error")
-            entry.set_icon_tooltip_text(
-                Gtk.EntryIconPosition.PRIMARY,
-                str(e))
-        except ParserError as e:
-            self.end_date_validated = False
-            entry.set_icon_from_icon_name(
-                Gtk.EntryIconPosition.PRIMARY,
-                "dialog-error")
-            entry.set_icon_tooltip_text(
-                Gtk.EntryIconPosition.PRIMARY,
-                str(e))
-        finally:
-            # test toggle of OK button
-            self.self_validate()
-
     def on_project_combo_changed(self, combo):
         # toggle validation for project name field
         text = combo.get_child().get_text()
@@ -0,0 +1,211 @@
+from gi.repository import Gtk, Gio
+from flubber.dialogs.util import flubber_error_dialog
+from flubber.catalog import FlubberCatalog
+from flubber.timing import timed
+
+
+class FlubberBulkEditFrameDialog(Gtk.Dialog):
+
+    @timed()
+    def __init__(self, parent, frame_count):
+        Gtk.Dialog.__init__(self, "Edit {} frames".format(frame_count),
+                            parent, 0,
+                            (Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL,
+                             Gtk.STOCK_OK, Gtk.ResponseType.OK))
+
+        # validate here to set OK button in disabled state on init
+        self.self_validate()
+
+        # existing projects and tags come from the catalog shared by
+        #  all dialogs
+        catalog = parent.catalog_store.sync()
+
+        # set default size and border to 10 pixels
+        self.set_default_size(150, 100)
+        self.set_border_width(10)
+
+        # in gtk dialog all content needs to go inside "the box"
+        box = self.get_content_area()
+
+        # notebook interface for users convinience
+        notebook = Gtk.Notebook()
+        box.add(notebook)
+
+        # page1 of notebook contains project settings
+        page1 = Gtk.Box()
+        page1.set_border_width(10)
+        notebook.append_page(page1, Gtk.Label('Project'))
+
+        # we place grid interface to page1
+        grid = Gtk.Grid()
+        grid.set_column_homogeneous(True)
+        grid.set_column_spacing(10)
+        grid.set_row_spacing(10)
+        page1.add(grid)
+
+        # Label and combobox for project selection, empty keeps the
+        #  project of each frame as it is
+        project_label = Gtk.Label("New project")
+        grid.add(project_label)
+        project_store = catalog.project_store
+        self.project_combo = Gtk.ComboBox(has_entry=True)
+        self.project_combo.set_model(project_store)
+        self.project_combo.set_entry_text_column(1)
+        self.project_combo.connect("changed", self.on_changed)
+        # also add completion to the entry text field inside the combobox
+        catalog.attach_completion(self.project_combo.get_child(),
+                                  FlubberCatalog.PROJECT)
+        self.project_combo.get_child().set_placeholder_text("Keep as is")
+        # add combobox to grid
+        grid.attach_next_to(self.project_combo, project_label,
+                            Gtk.PositionType.RIGHT, 1, 1)
+        # add label and spin button for moving frames in time
+        shift_label = Gtk.Label("Shift time (minutes)")
+        grid.attach_next_to(shift_label, project_label,
+                            Gtk.PositionType.BOTTOM, 1, 1)
+        self.shift_spin = Gtk.SpinButton.new_with_range(-1440, 1440, 1)
+        self.shift_spin.set_value(0)
+        self.shift_spin.connect("value-changed", self.on_changed)
+        grid.attach_next_to(self.shift_spin, shift_label,
+                            Gtk.PositionType.RIGHT, 1, 1)
+
+        # page2 of notebook interface is for tag changes
+        page2 = Gtk.Box()
+        page2.set_border_width(10)
+        notebook.append_page(page2, Gtk.Label('Tags'))
+
+        # add grid layout to page2
+        grid2 = Gtk.Grid()
+        grid2.set_row_homogeneous(True)
+        grid2.set_column_spacing(10)
+        grid2.set_row_spacing(10)
+        page2.add(grid2)
+
+        # editable combobox to pick existing/new tags
+        existing_tag_store = catalog.tag_store
+        self.tag_combo = Gtk.ComboBox(has_entry=True)
+        self.tag_combo.set_model(existing_tag_store)
+        self.tag_combo.set_entry_text_column(1)
+        # also add completion to the entry text field inside the combobox
+        catalog.attach_completion(self.tag_combo.get_child(),
+                                  FlubberCatalog.TAG)
+        # add combobox to grid
+        grid2.add(self.tag_combo)
+        # interface buttons to add the tag to frames or remove it from them
+        add_button = Gtk.Button()
+        icon = Gio.ThemedIcon(name="list-add")
+        image = Gtk.Image.new_from_gicon(icon, Gtk.IconSize.BUTTON)
+        add_button.add(image)
+        add_button.set_tooltip_text("Add tag to frames")
+        grid2.attach_next_to(add_button, self.tag_combo,
+                             Gtk.PositionType.RIGHT, 1, 1)
+        add_button.connect("clicked", self.on_tag_change_clicked, True)
+        remove_button = Gtk.Button()
+        icon = Gio.ThemedIcon(name="list-remove")
+        image = Gtk.Image.new_from_gicon(icon, Gtk.IconSize.BUTTON)
+        remove_button.add(image)
+        remove_button.set_tooltip_text("Remove tag from frames")
+        grid2.attach_next_to(remove_button, add_button,
+                             Gtk.PositionType.RIGHT, 1, 1)
+        remove_button.connect("clicked", self.on_tag_change_clicked, False)
+        # ro listbox to show requested tag changes, the boolean tells
+        #  if the tag is to be added (True) or removed (False)
+        self.tag_change_store = Gtk.ListStore(str, str, bool)
+        self.tag_view = Gtk.TreeView(model=self.tag_change_store)
+        col = Gtk.TreeViewColumn("Tag", Gtk.CellRendererText(), text=0)
+        self.tag_view.append_column(col)
+        col = Gtk.TreeViewColumn("Change", Gtk.CellRendererText(), text=1)
+        self.tag_view.append_column(col)
+        # create a scrollable viewport to prevent dialog borders from expanding
+        scrollable_treelist = Gtk.ScrolledWindow()
+        scrollable_treelist.set_vexpand(True)
+        scrollable_treelist.add(self.tag_view)
+        grid2.attach_next_to(scrollable_treelist, self.tag_combo,
+                             Gtk.PositionType.BOTTOM, 1, 5)
+        # interface button to drop selected change from list
+        self.del_button = Gtk.Button()
+        icon = Gio.ThemedIcon(name="edit-delete")
+        image = Gtk.Image.new_from_gicon(icon, Gtk.IconSize.BUTTON)
+        self.del_button.add(image)
+        grid2.attach_next_to(self.del_button, scrollable_treelist,
+                             Gtk.PositionType.RIGHT, 1, 1)
+        # action method for del button
+        self.del_button.connect("clicked", self.on_del_clicked)
+        # by default delete button is disabled
+        self.del_button.set_sensitive(False)
+
+        # show all elements on the dialog
+        self.show_all()
+
+    @property
+    def project(self):
+        # new project for all frames or None to keep them as they are
+        text = self.project_combo.get_child().get_text()
+        return text if text != "" else None
+
+    @property
+    def shift_minutes(self):
+        return self.shift_spin.get_value_as_int()
+
+    @property
+    def add_tags(self):
+        return [tag for tag, text, add in self.tag_change_store if add]
+
+    @property
+    def remove_tags(self):
+        return [tag for tag, text, add in self.tag_change_store if not add]
+
+    def self_validate(self):
+        # OK button is released as soon as there is anything to change
+        changed = (hasattr(self, "tag_change_store") and
+                   (self.project is not None or
+                    self.shift_minutes != 0 or
+                    len(self.tag_change_store) > 0))
+        self.set_response_sensitive(Gtk.ResponseType.OK, changed)
+
+    def on_changed(self, widget):
+        # test toggle of OK button
+        self.self_validate()
+
+    def on_del_clicked(self, button):
+        # user wants to remove selected entry from list
+        selection = self.tag_view.get_selection()
+        model, paths = selection.get_selected_rows()
+        for path in paths:
+            it = model.get_iter(path)
+            model.remove(it)
+
+        # if last entry was removed from view disable button
+        if len(model) == 0:
+            self.del_button.set_sensitive(False)
+        self.self_validate()
+
+    def on_tag_change_clicked(self, button, add):
+        # user wanted to add or remove the tag typed in the combobox
+        # check that it is not empty
+        selected_tag = self.tag_combo.get_child().get_text()
+        if selected_tag == '':
+            flubber_error_dialog(self, "Selected tag is empty",
+                                 "Changing a empty tag is not allowed.")
+            # return here so that we dont process the empty entry
+            return
+
+        # check that selected_tag is not already in the list
+        for key, text, existing_add in self.tag_change_store:
+            if key == selected_tag:
+                msg = ("Tag '{}' is already marked to "
+                       "be {}".format(key, text.lower()))
+                flubber_error_dialog(self, "Duplicate tag change", msg)
+                # return here so that we dont process the dumplicate entry
+                return
+
+        # checks concluded, add the change to the list
+        self.tag_change_store.append(
+            [selected_tag, "Added" if add else "Removed", add])
+
+        # enable del button
+        self.del_button.set_sensitive(True)
+
+        # clear selection from combobox to prepare it for next input
+        self.tag_combo.get_child().set_text("")
+        self.self_validate()
@@ -0,0 +1,90 @@
+from bisect import bisect_left
+from gi.repository import Gtk
+from flubber.catalog import FlubberCatalog
+
+
+class FlubberCatalogStore(object):
+
+    # Gtk models of the projects and tags in the session catalog shared
+    #  by all dialogs. Rows are (name, name) like the dialogs expect and
+    #  are kept sorted by name.
+
+    # how many suggestions entry completions show at most
+    completion_limit = 15
+
+    def __init__(self, session):
+        self.session = session
+        self.project_store = Gtk.ListStore(str, str)
+        self.tag_store = Gtk.ListStore(str, str)
+        self._stores = {FlubberCatalog.PROJECT: self.project_store,
+                        FlubberCatalog.TAG: self.tag_store}
+        # sorted names mirroring the rows of each store
+        self._names = {FlubberCatalog.PROJECT: list(),
+                       FlubberCatalog.TAG: list()}
+        self._catalog = None
+
+    def sync(self):
+        # make sure the models match the catalog, the catalog tells us
+        #  about every change after this so this is cheap to call
+        catalog = self.session.catalog()
+        if self._catalog is not catalog:
+            self._catalog = catalog
+            catalog.listeners.append(self.on_catalog_changed)
+            self.populate()
+        return self
+
+    def attach_completion(self, entry, kind):
+        # completion for entry suggesting names of kind ranked by how
+        #  often and how recently they were used. The completion model only
+        #  ever holds the top suggestions for the current text, so GTK has
+        #  next to nothing to filter.
+        model = Gtk.ListStore(str, str)
+        completion = Gtk.EntryCompletion()
+        completion.set_model(model)
+        completion.set_text_column(0)
+        # candidates are already matched by the catalog
+        completion.set_match_func(lambda *args: True, None)
+        # connected before set_completion so that the model is updated
+        #  before the completion reacts to the same change
+        entry.connect("changed", self.on_completion_entry_changed,
+                      kind, model)
+        entry.set_completion(completion)
+        return completion
+
+    def on_completion_entry_changed(self, entry, kind, model):
+        text = entry.get_text()
+        if text == "" or self._catalog is None:
+            names = list()
+        else:
+            names = self._catalog.complete(kind, text,
+                                           self.completion_limit)
+        # skip touching the model if suggestions stay the same
+        if [row[0] for row in model] != names:
+            model.clear()
+            for name in names:
+                model.append([name, name])
+
+    def populate(self):
+        for kind, store in self._stores.items():
+            names = self._catalog.names(kind)
+            self._names[kind] = names
+            store.clear()
+            for name in names:
+                store.append([name, name])
+
+    def on_catalog_changed(self, kind, name, entry):
+        if kind is None:
+            # catalog was rebuilt from scratch
+            self.populate()
+            return
+        store = self._stores[kind]
+        names = self._names[kind]
+        position = bisect_left(names, name)
+        exists = position < len(names) and names[position] == name
+        if entry is None and exists:
+            # name is no longer used by any frame
+            del names[position]
+            store.remove(store.iter_nth_child(None, position))
+        elif entry is not None and not exists:
+            names.insert(position, name)
+            store.insert(position, [name, name])
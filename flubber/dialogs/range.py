@@ -0,0 +1,60 @@
+from gi.repository import Gtk
+from flubber.dialogs.validation import FlubberDateRangeValidation
+from flubber.timing import timed
+
+
+class FlubberRangeDialog(FlubberDateRangeValidation, Gtk.Dialog):
+
+    # these booleans all need to switch to True state for OK button to release
+    start_date_validated = False
+    end_date_validated = False
+
+    @timed()
+    def __init__(self, parent, start_text="", end_text=""):
+        Gtk.Dialog.__init__(self, "Custom range", parent, 0,
+                            (Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL,
+                             Gtk.STOCK_OK, Gtk.ResponseType.OK))
+
+        # set default size and border to 10 pixels
+        self.set_default_size(150, 100)
+        self.set_border_width(10)
+
+        # in gtk dialog all content needs to go inside "the box"
+        box = self.get_content_area()
+
+        grid = Gtk.Grid()
+        grid.set_column_homogeneous(True)
+        grid.set_column_spacing(10)
+        grid.set_row_spacing(10)
+        box.add(grid)
+
+        # Add label and entry field for start of the range
+        start_label = Gtk.Label("From date and time")
+        grid.add(start_label)
+        self.start_entry = Gtk.Entry()
+        self.start_entry.set_text(start_text)
+        self.start_entry.connect("changed", self.on_start_entry_changed)
+        grid.attach_next_to(self.start_entry, start_label,
+                            Gtk.PositionType.RIGHT, 1, 1)
+        # add label and entry field for end of the range
+        end_label = Gtk.Label("To date and time")
+        grid.attach_next_to(end_label, start_label,
+                            Gtk.PositionType.BOTTOM, 1, 1)
+        self.end_entry = Gtk.Entry()
+        self.end_entry.set_text(end_text)
+        self.end_entry.connect("changed", self.on_end_entry_changed)
+        grid.attach_next_to(self.end_entry, end_label,
+                            Gtk.PositionType.RIGHT, 1, 1)
+
+        # validate the prefilled values to set state of OK button
+        self.validate_dates()
+
+        # show all elements on the dialog
+        self.show_all()
+
+    def self_validate(self):
+        if False in [self.start_date_validated,
+                     self.end_date_validated]:
+            self.set_response_sensitive(Gtk.ResponseType.OK, False)
+        else:
+            self.set_response_sensitive(Gtk.ResponseType.OK, True)
@@ -1,6 +1,7 @@
 from gi.repository import Gtk, Gio
-from watson import Watson
 from flubber.dialogs.util import flubber_error_dialog
+from flubber.catalog import FlubberCatalog
+from flubber.timing import timed
 
 
 class FlubberStartFrameDialog(Gtk.Dialog):
@@ -8,6 +9,7 @@ class FlubberStartFrameDialog(Gtk.Dialog):
     # these booleans all need to switch to True state for OK button to release
     project_validated = False
 
+    @timed()
     def __init__(self, parent):
         Gtk.Dialog.__init__(self, "Start frame", parent, 0,
                             (Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL,
@@ -16,8 +18,9 @@ class FlubberStartFrameDialog(Gtk.Dialog):
         # validate here to set OK button in disabled state on init
         self.self_validate()
 
-        # init Watson to read in existing projects and tags from it
-        wat = Watson()
+        # existing projects and tags come from the catalog shared by
+        #  all dialogs
+        catalog = parent.catalog_store.sync()
 
         # set default size and border to 10 pixels
         self.set_default_size(150, 100)
@@ -45,18 +48,14 @@ class FlubberStartFrameDialog(Gtk.Dialog):
         # Label and combobox for project selection
         project_label = Gtk.Label("Project")
         grid.add(project_label)
-        project_store = Gtk.ListStore(str, str)
-        for project in wat.projects:
-            project_store.append([project, project])
+        project_store = catalog.project_store
         self.project_combo = Gtk.ComboBox(has_entry=True)
         self.project_combo.set_model(project_store)
         self.project_combo.set_entry_text_column(1)
         self.project_combo.connect("changed", self.on_project_combo_changed)
         # also add completion to the entry text field inside the combobox
-        project_completion = Gtk.EntryCompletion()
-        project_completion.set_model(project_store)
-        project_completion.set_text_column(0)
-        self.project_combo.get_child().set_completion(project_completion)
+        catalog.attach_completion(self.project_combo.get_child(),
+                                  FlubberCatalog.PROJECT)
         # add combobox to grid
         grid.attach_next_to(self.project_combo, project_label,
                             Gtk.PositionType.RIGHT, 1, 1)
@@ -74,17 +73,13 @@ class FlubberStartFrameDialog(Gtk.Dialog):
         page2.add(grid2)
 
         # editable combobox to add existing/new tags to listbox
-        existing_tag_store = Gtk.ListStore(str, str)
-        for tag in wat.tags:
-            existing_tag_store.append([tag, tag])
+        existing_tag_store = catalog.tag_store
         self.tag_combo = Gtk.ComboBox(has_entry=True)
         self.tag_combo.set_model(existing_tag_store)
         self.tag_combo.set_entry_text_column(1)
         # also add completion to the entry text field inside the combobox
-        tag_completion = Gtk.EntryCompletion()
-        tag_completion.set_model(existing_tag_store)
-        tag_completion.set_text_column(0)
-        self.tag_combo.get_child().set_completion(tag_completion)
+        catalog.attach_completion(self.tag_combo.get_child(),
+                                  FlubberCatalog.TAG)
         # add combobox to grid
         grid2.add(self.tag_combo)
         # interface button to add items to list
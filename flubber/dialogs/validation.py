@@ -0,0 +1,120 @@
+from functools import lru_cache
+from gi.repository import GLib, Gtk
+from arrow.parser import ParserError
+from flubber.util import arrow_parse_datetime, is_absolute_datetime
+
+
+def parse_datetime(value):
+    # the parsed value or the error message
+    try:
+        return arrow_parse_datetime(value), None
+    except (ValueError, ParserError) as e:
+        return None, str(e)
+
+
+# typing back and forth parses the same strings over and over,
+#  remember the outcome including the error message
+_parse_datetime_cached = lru_cache(maxsize=256)(parse_datetime)
+
+
+def parse_datetime_memoized(value):
+    # relative forms like "now" mean a different moment on every call,
+    #  only absolute dates can be remembered
+    if is_absolute_datetime(value):
+        return _parse_datetime_cached(value)
+    return parse_datetime(value)
+
+
+class FlubberDateRangeValidation(object):
+
+    # mixin for dialogs with self.start_entry and self.end_entry. Input is
+    #  validated once typing pauses and both dates are checked together
+    #  in one pass. Dialog must provide self_validate() and the
+    #  start_date_validated and end_date_validated flags.
+
+    # how long to wait after the last keystroke before validating, in ms
+    validation_delay = 150
+
+    # these fields contain the parsed datetime object
+    parsed_start_datetime = None
+    parsed_end_datetime = None
+
+    _validation_source = None
+    _last_edited_entry = None
+    # entries edited so far and the error shown on each of them
+    _touched_entries = None
+    _entry_errors = None
+
+    def on_start_entry_changed(self, entry):
+        self._schedule_date_validation(entry)
+
+    def on_end_entry_changed(self, entry):
+        self._schedule_date_validation(entry)
+
+    def _schedule_date_validation(self, entry):
+        self._last_edited_entry = entry
+        # errors are only shown on entries the user has edited
+        if self._touched_entries is None:
+            self._touched_entries = set()
+            # do not validate widgets that are already gone
+            self.connect("destroy", self._cancel_date_validation)
+        self._touched_entries.add(entry)
+        if self._validation_source is not None:
+            GLib.source_remove(self._validation_source)
+        self._validation_source = GLib.timeout_add(self.validation_delay,
+                                                   self.validate_dates)
+        # until validated the parsed values do not match the input
+        if self.start_date_validated or self.end_date_validated:
+            self.start_date_validated = False
+            self.end_date_validated = False
+            # test toggle of OK button
+            self.self_validate()
+
+    def _cancel_date_validation(self, widget=None):
+        if self._validation_source is not None:
+            GLib.source_remove(self._validation_source)
+            self._validation_source = None
+
+    def validate_dates(self):
+        self._cancel_date_validation()
+
+        start, start_error = parse_datetime_memoized(
+            self.start_entry.get_text())
+        end, end_error = parse_datetime_memoized(self.end_entry.get_text())
+        self.parsed_start_datetime = start
+        self.parsed_end_datetime = end
+
+        # check that end date comes after start time, complain on the
+        #  entry the user was editing
+        if start is not None and end is not None and end < start:
+            msg = "Start time has to occur before end time."
+            if self._last_edited_entry is self.end_entry:
+                end_error = msg
+            else:
+                start_error = msg
+
+        self.start_date_validated = start_error is None
+        self.end_date_validated = end_error is None
+        self._set_entry_error(self.start_entry, start_error)
+        self._set_entry_error(self.end_entry, end_error)
+
+        # test toggle of OK button
+        self.self_validate()
+        # one shot timeout
+        return False
+
+    def _set_entry_error(self, entry, error):
+        if not self._touched_entries or entry not in self._touched_entries:
+            return
+        # only touch the icon when the message actually changes
+        if self._entry_errors is None:
+            self._entry_errors = dict()
+        if entry in self._entry_errors and self._entry_errors[entry] == error:
+            return
+        self._entry_errors[entry] = error
+        entry.set_icon_from_icon_name(
+            Gtk.EntryIconPosition.PRIMARY,
+            "dialog-error" if error is not None else None)
+        entry.set_icon_tooltip_text(
+            Gtk.EntryIconPosition.PRIMARY,
+            error)
@@ -1,22 +1,150 @@
 import sys
 import os
+import time
 import signal
+import logging
+from collections import OrderedDict
 from gi.repository import GLib, Gio, Gtk, Notify
-from flubber.windows import FlubberAppWindow
+from flubber.startup import FlubberImportTimer, print_startup_profile
+from flubber.commands import COMMANDS
+
+logger = logging.getLogger(__name__)
+
+APP_ID = "fi.iki.bcow.flubber"
+# resource path of the UI definitions
+RESOURCE_PATH = "/fi/iki/bcow/flubber"
+
+
+def can_forward_commands():
+    # output of commands run by another instance is printed with
+    #  print_literal() of GLib 2.80, older versions have no way to do so
+    return hasattr(Gio.ApplicationCommandLine, "print_literal")
+
+
+def run_command_line(argv):
+    # run a command like 'flubber status'. The running instance has Watson
+    #  data loaded already so it gets the command if there is one,
+    #  otherwise the command is run right here without any windows.
+    if can_forward_commands():
+        probe = Gio.Application(
+            application_id=APP_ID,
+            flags=Gio.ApplicationFlags.HANDLES_COMMAND_LINE)
+        try:
+            probe.register(None)
+        except GLib.Error:
+            # no session bus to find the running instance on
+            pass
+        else:
+            if probe.get_is_remote():
+                # the exit status comes from the running instance
+                return probe.run(argv)
+
+    from watson.watson import WatsonError
+    from flubber.commands import run_command
+    from flubber.session import FlubberSession
+    # with a window open in an older GLib the journal belongs to it, this
+    #  session then writes the frames file directly
+    try:
+        session = FlubberSession()
+    except (WatsonError, OSError) as e:
+        print("Error: {}".format(e), file=sys.stderr)
+        return 1
+    try:
+        status, changed = run_command(
+            session, argv[1:], print,
+            lambda text: print(text, file=sys.stderr))
+    finally:
+        session.close()
+    return status
+
+
+def load_resources():
+    # register the UI definitions compiled into a GResource by
+    #  'make resources'. Returns False when running from a tree where it
+    #  was not compiled, UI files are then read from disk.
+    path = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                        "resources", "flubber.gresource")
+    try:
+        resource = Gio.Resource.load(path)
+    except GLib.Error:
+        return False
+    Gio.resources_register(resource)
+    return True
 
 
 class FlubberApp(Gtk.Application):
 
     def __init__(self, *args, **kwargs):
-        app_id = "fi.iki.bcow.flubber"
-        super(Gtk.Application, self).__init__(*args,
-                                              application_id=app_id,
-                                              **kwargs)
+        started = time.monotonic()
+        super(Gtk.Application, self).__init__(
+            *args, application_id=APP_ID,
+            flags=Gio.ApplicationFlags.HANDLES_COMMAND_LINE,
+            **kwargs)
         self.window = None
 
+        # phases of start up and when they were reached
+        self.started = started
+        self.startup_phases = OrderedDict()
+        # times imports while profiling start up
+        self.import_timer = None
+
+        # created on first use, see the properties below
+        self._session = None
+        self._catalog_store = None
+        self._saver = None
+        self.performance_window = None
+
+        self.add_main_option("profile-startup", 0, GLib.OptionFlags.NONE,
+                             GLib.OptionArg.NONE,
+                             "Print timing of imports and start up phases",
+                             None)
+
         # init notification sub system
         Notify.init("Flubber")
 
+    @property
+    def session(self):
+        # Watson state shared by all windows and dialogs. Importing and
+        #  setting up Watson is left until something needs it so that
+        #  the window can be shown first.
+        if self._session is None:
+            from flubber.session import FlubberSession
+            self._session = FlubberSession()
+            self.startup_phase("session created", once=True)
+        return self._session
+
+    @property
+    def catalog_store(self):
+        # project and tag models shared by all dialogs
+        if self._catalog_store is None:
+            from flubber.dialogs.catalog import FlubberCatalogStore
+            self._catalog_store = FlubberCatalogStore(self.session)
+        return self._catalog_store
+
+    @property
+    def saver(self):
+        # writes Watson files in the background for all windows
+        if self._saver is None:
+            from flubber.saver import FlubberSaver
+            self._saver = FlubberSaver(self.session,
+                                       errback=self.on_save_failed)
+        return self._saver
+
+    def on_save_failed(self, error):
+        if self.window is not None:
+            self.window.on_save_failed(error)
+        else:
+            logger.error("Could not save Watson state files: %s", error)
+
+    def do_handle_local_options(self, options):
+        if options.contains("profile-startup") and self.import_timer is None:
+            # not started through main(), only imports done after this
+            #  point are timed
+            self.import_timer = FlubberImportTimer()
+            self.import_timer.install()
+        # go on with the default handling
+        return -1
+
     def do_startup(self):
         Gtk.Application.do_startup(self)
 
@@ -24,30 +152,146 @@ class FlubberApp(Gtk.Application):
         action.connect("activate", self.on_quit)
         self.add_action(action)
 
-        builder = Gtk.Builder.new_from_file(
-            os.path.join(os.path.join(os.path.dirname(
-                os.path.realpath(__file__)), "resources"), "menu.xml"))
+        action = Gio.SimpleAction.new("performance", None)
+        action.connect("activate", self.on_performance)
+        self.add_action(action)
+
+        if load_resources():
+            builder = Gtk.Builder.new_from_resource(
+                RESOURCE_PATH + "/menu.xml")
+        else:
+            builder = Gtk.Builder.new_from_file(
+                os.path.join(os.path.join(os.path.dirname(
+                    os.path.realpath(__file__)), "resources"), "menu.xml"))
         self.set_app_menu(builder.get_object("app-menu"))
+        self.set_accels_for_action("win.undo", ["<Primary>z"])
+        self.set_accels_for_action("win.redo", ["<Primary><Shift>z"])
+        self.set_accels_for_action("app.performance", ["<Primary><Shift>F12"])
+        self.startup_phase("application started")
+
+    def do_command_line(self, command_line):
+        # runs in the primary instance, also for command lines forwarded
+        #  by other flubber processes
+        args = command_line.get_arguments()[1:]
+        if not args or args[0] not in COMMANDS:
+            self.activate()
+            return 0
+
+        from flubber.commands import run_command
+        status, changed = run_command(
+            self.session, args,
+            lambda text: command_line.print_literal(text + "\n"),
+            lambda text: command_line.printerr_literal(text + "\n"),
+            save=self.save_command_changes)
+        if changed and self.window is not None and \
+                self.window.monitor is not None:
+            # we saved the files ourselves so the monitor stays quiet
+            self.window.reload_watson_data()
+        return status
+
+    def save_command_changes(self):
+        # on the main loop, the state and the journal are written before
+        #  the command returns and the frames file is compacted for other
+        #  Watson clients on the worker
+        self.saver.flush()
+        self.saver.compact_soon()
 
     def do_activate(self):
         # We only allow a single window and raise any existing ones
         if not self.window:
             # Windows are associated with the application
             # when the last one is closed the application shuts down
+            from flubber.windows import FlubberAppWindow
             self.window = FlubberAppWindow(application=self, title="Flubber")
+            self.startup_phase("window created")
 
         self.window.present()
 
+    def do_shutdown(self):
+        if self._saver is not None:
+            # write changes still waiting for the worker
+            try:
+                self._saver.close()
+            except Exception:
+                logger.exception("Could not save Watson state files")
+        if self.window is not None and self._session is not None:
+            # snapshot of the frame index and view for a fast next start
+            try:
+                self.session.save_snapshot(self.window.snapshot_view())
+            except Exception:
+                # the snapshot is only a cache, next start parses frames
+                logger.exception("Could not save snapshot")
+        if self._session is not None:
+            self._session.close()
+        self.dump_timings()
+        Gtk.Application.do_shutdown(self)
+
+    def startup_phase(self, name, once=False):
+        # record how long after start a phase of start up was reached
+        if once and name in self.startup_phases:
+            return
+        elapsed = time.monotonic() - self.started
+        self.startup_phases[name] = elapsed
+        logger.info("%s after %.0f ms", name, elapsed * 1000)
+        # shown in the Performance window and kept with FLUBBER_PROFILE,
+        #  a snapshot or a parse of the frames file tells apart cold starts
+        from flubber.timing import timings
+        timings.record("start up: {}".format(name), elapsed)
+
+    def startup_done(self):
+        # the window shows frames, start up is over
+        if self.import_timer is not None:
+            self.import_timer.uninstall()
+            print_startup_profile(self.import_timer, self.startup_phases)
+            self.import_timer = None
+
+    def dump_timings(self):
+        # with FLUBBER_PROFILE set the timings of the run are kept next
+        #  to the cProfile output
+        from flubber.timing import timings
+        if timings.profile_dir is None:
+            return
+        try:
+            os.makedirs(timings.profile_dir, exist_ok=True)
+            path = os.path.join(timings.profile_dir, "timings-{}.json".format(
+                time.strftime("%Y%m%d-%H%M%S")))
+            with open(path, "w") as f:
+                f.write(timings.dump_json())
+            logger.info("Timings written to %s", path)
+        except OSError:
+            logger.exception("Could not write timings")
+
+    def on_performance(self, action, param):
+        # hidden away in the app menu, shows timings of recent operations
+        if self.performance_window is None:
+            from flubber.windows import FlubberPerformanceWindow
+            self.performance_window = FlubberPerformanceWindow(
+                application=self, transient_for=self.window)
+            self.performance_window.connect("destroy",
+                                            self.on_performance_destroy)
+            self.performance_window.show_all()
+        self.performance_window.present()
+
+    def on_performance_destroy(self, window):
+        self.performance_window = None
+
     def on_quit(self, action, param):
         self.quit()
 
 
-def main():
+def main(import_timer=None):
+    # import_timer is already timing imports for --profile-startup
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        if import_timer is not None:
+            import_timer.uninstall()
+        return run_command_line(sys.argv)
+
     app = FlubberApp()
+    app.import_timer = import_timer
     # bind SIGINT (CTRL+C) to app quit
     GLib.unix_signal_add(GLib.PRIORITY_DEFAULT, signal.SIGINT, app.quit)
     return app.run(sys.argv)
 
 
 if __name__ == "__main__":
-    sys.exit(main)
+    sys.exit(main())
@@ -0,0 +1,52 @@
+class FlubberHistory(object):
+
+    # undo and redo stacks of changes made to frames. A change is a label
+    #  for the user and a list of (frame id, frame before, frame after)
+    #  deltas, None standing for a frame that does not exist. Only the
+    #  changed frames are kept, not copies of all the frames.
+
+    # changes that can be undone at most
+    limit = 100
+
+    def __init__(self):
+        self._undo = list()
+        self._redo = list()
+
+    @property
+    def undo_label(self):
+        # label of the change undo() would revert, None if there is none
+        return self._undo[-1][0] if self._undo else None
+
+    @property
+    def redo_label(self):
+        return self._redo[-1][0] if self._redo else None
+
+    def record(self, label, deltas):
+        # a new change was made, it can no longer be redone what was undone
+        if not deltas:
+            return
+        self._undo.append((label, list(deltas)))
+        del self._undo[:-self.limit]
+        self._redo = list()
+
+    def undo(self):
+        # the last change and the deltas reverting it, None if there is
+        #  nothing to undo. The change can then be redone.
+        if not self._undo:
+            return None
+        label, deltas = self._undo.pop()
+        self._redo.append((label, deltas))
+        return label, [(frame_id, after, before)
+                       for frame_id, before, after in reversed(deltas)]
+
+    def redo(self):
+        # the last undone change and its deltas, None if there is none
+        if not self._redo:
+            return None
+        label, deltas = self._redo.pop()
+        self._undo.append((label, deltas))
+        return label, list(deltas)
+
+    def clear(self):
+        self._undo = list()
+        self._redo = list()
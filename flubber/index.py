@@ -0,0 +1,222 @@
+import time
+import threading
+import datetime
+from array import array
+from bisect import bisect_left
+from operator import itemgetter
+
+
+def local_date_start(date):
+    # epoch of the local midnight starting date
+    return int(datetime.datetime.combine(date, datetime.time()).timestamp())
+
+
+def local_day_start(timestamp):
+    # epoch of the local midnight starting the day of timestamp
+    return local_date_start(datetime.date.fromtimestamp(timestamp))
+
+
+def local_next_day_start(timestamp):
+    # epoch of the local midnight ending the day of timestamp, computed
+    #  from the calendar so that days around DST changes come out right
+    day = datetime.date.fromtimestamp(timestamp)
+    return local_date_start(day + datetime.timedelta(days=1))
+
+
+def local_period(period, timestamp=None):
+    # epochs [start, stop) of the local 'day', 'week' (starting monday)
+    #  or 'month' holding timestamp, now by default
+    if timestamp is None:
+        timestamp = time.time()
+    day = datetime.date.fromtimestamp(timestamp)
+    if period == 'day':
+        first = day
+        last = day + datetime.timedelta(days=1)
+    elif period == 'week':
+        first = day - datetime.timedelta(days=day.weekday())
+        last = first + datetime.timedelta(days=7)
+    elif period == 'month':
+        first = day.replace(day=1)
+        last = (first + datetime.timedelta(days=32)).replace(day=1)
+    else:
+        raise ValueError("Unknown period '{}'".format(period))
+    return local_date_start(first), local_date_start(last)
+
+
+class FlubberInterner(object):
+
+    # maps names to small integer ids and back. Ids are never reused or
+    #  dropped so they stay valid across index rebuilds and can be kept
+    #  in view models.
+
+    def __init__(self):
+        self.names = list()
+        self._ids = dict()
+        # indexes are built on worker threads while the main thread may
+        #  intern names too, new names are added one thread at a time
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.names)
+
+    def intern(self, name):
+        try:
+            return self._ids[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._ids:
+                # append before publishing the id, readers on other
+                #  threads may look the name up as soon as they see the id
+                self.names.append(name)
+                self._ids[name] = len(self.names) - 1
+            return self._ids[name]
+
+
+class FlubberFrameIndex(object):
+
+    # column oriented copy of Watson frames sorted by start time. Times
+    #  are epoch seconds in machine sized arrays and projects and tags are
+    #  interned to integer ids, so grouping, totals and range queries work
+    #  on whole slices instead of arrow objects one frame at a time.
+    #  Built from raw frame records (start, stop, project, id, tags,
+    #  updated_at) as stored in the frames file, Watson Frame objects are
+    #  only created for the frames that are asked for.
+
+    def __init__(self, records, project_interner=None, tag_interner=None,
+                 window=(None, None)):
+        records = sorted(records, key=itemgetter(0))
+        # [start, stop) of frame starts this index was loaded for, None
+        #  for an open end
+        self.window = window
+        self.ids = [record[3] for record in records]
+        self.starts = array('q', (record[0] for record in records))
+        self.stops = array('q', (record[1] for record in records))
+        # 0 for frames without one
+        self.updated = array('q', (record[5] or 0 for record in records))
+
+        # interned project and tag names, the arrays refer to positions
+        #  in the names lists of the interners
+        if project_interner is None:
+            project_interner = FlubberInterner()
+        if tag_interner is None:
+            tag_interner = FlubberInterner()
+        self.project_names = project_interner.names
+        self.tag_names = tag_interner.names
+
+        self.projects = array('l', (project_interner.intern(record[2])
+                                    for record in records))
+        # tags of frame i are tags[tag_offsets[i]:tag_offsets[i + 1]]
+        self.tags = array('l')
+        self.tag_offsets = array('l', [0])
+        for record in records:
+            self.tags.extend(tag_interner.intern(tag)
+                             for tag in record[4] or ())
+            self.tag_offsets.append(len(self.tags))
+
+        self._build_lookups()
+
+    def _build_lookups(self):
+        # frame ids in sorted order for prefix lookups and the position
+        #  of each frame in the index
+        self.sorted_ids = sorted(self.ids)
+        self.positions = dict((frame_id, i)
+                              for i, frame_id in enumerate(self.ids))
+
+    def __getstate__(self):
+        # only the columns are pickled into snapshots, lookups are cheap
+        #  to build again and the names are copied out of the interners
+        state = self.__dict__.copy()
+        del state['sorted_ids']
+        del state['positions']
+        state['project_names'] = list(self.project_names)
+        state['tag_names'] = list(self.tag_names)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._build_lookups()
+
+    def intern_names(self, project_interner, tag_interner):
+        # move the project and tag ids over to the given interners, used
+        #  for indexes that come from a snapshot of another session
+        project_ids = array('l', (project_interner.intern(name)
+                                  for name in self.project_names))
+        tag_ids = array('l', (tag_interner.intern(name)
+                              for name in self.tag_names))
+        if list(project_ids) != list(range(len(project_ids))):
+            self.projects = array('l', (project_ids[project]
+                                        for project in self.projects))
+        if list(tag_ids) != list(range(len(tag_ids))):
+            self.tags = array('l', (tag_ids[tag] for tag in self.tags))
+        self.project_names = project_interner.names
+        self.tag_names = tag_interner.names
+
+    @classmethod
+    def from_frames(cls, frames, project_interner=None, tag_interner=None):
+        # index of Watson Frame objects already in memory
+        # epochs are the same in any timezone, no need for Frame.dump()
+        #  converting to UTC first
+        return cls(((frame.start.int_timestamp, frame.stop.int_timestamp,
+                     frame.project, frame.id, frame.tags,
+                     frame.updated_at.int_timestamp)
+                    for frame in frames),
+                   project_interner, tag_interner)
+
+    def covers(self, start=None, stop=None):
+        # whether all frames starting within [start, stop) are indexed
+        window_start, window_stop = self.window
+        if window_start is not None and \
+                (start is None or start < window_start):
+            return False
+        if window_stop is not None and \
+                (stop is None or stop > window_stop):
+            return False
+        return True
+
+    def frame(self, i):
+        # Watson Frame of position i
+        from watson.frames import Frame
+        return Frame(self.starts[i], self.stops[i],
+                     self.project_names[self.projects[i]], self.ids[i],
+                     [self.tag_names[tag] for tag in self.frame_tags(i)],
+                     self.updated[i] or None)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def frame_tags(self, i):
+        return self.tags[self.tag_offsets[i]:self.tag_offsets[i + 1]]
+
+    def find(self, prefix):
+        # position of the frame whose id starts with prefix, like Watson
+        #  accepts short ids, but with a bisect instead of a full scan
+        i = bisect_left(self.sorted_ids, prefix)
+        if i < len(self.sorted_ids) and \
+                self.sorted_ids[i].startswith(prefix):
+            return self.positions[self.sorted_ids[i]]
+        raise KeyError("Frame with id {} not found.".format(prefix))
+
+    def range(self, start=None, stop=None):
+        # positions [lo, hi) of the frames starting within [start, stop)
+        lo = 0 if start is None else bisect_left(self.starts, start)
+        hi = (len(self.starts) if stop is None
+              else bisect_left(self.starts, stop, lo))
+        return lo, hi
+
+    def total(self, lo, hi):
+        # summed duration of the frames in [lo, hi) in seconds
+        return sum(self.stops[lo:hi]) - sum(self.starts[lo:hi])
+
+    def days(self, lo=0, hi=None):
+        # split positions [lo, hi) into local days, yields tuples of
+        #  (day start epoch, lo, hi). Costs a bisect per day, not per frame.
+        if hi is None:
+            hi = len(self.starts)
+        starts = self.starts
+        i = lo
+        while i < hi:
+            day_start = local_day_start(starts[i])
+            j = bisect_left(starts, local_next_day_start(starts[i]), i, hi)
+            yield day_start, i, j
+            i = j
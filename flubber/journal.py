@@ -0,0 +1,131 @@
+import os
+import json
+import fcntl
+
+# journal entries, frames are put (added or replaced) and deleted by id
+JOURNAL_PUT = 'put'
+JOURNAL_DELETE = 'delete'
+
+
+def journal_entries(removed=(), added=()):
+    # entries recording that frames in removed were replaced by the ones
+    #  in added, an edit removes and adds a frame with the same id
+    added_ids = set(frame.id for frame in added)
+    entries = [(JOURNAL_DELETE, frame.id) for frame in removed
+               if frame.id not in added_ids]
+    entries += [(JOURNAL_PUT, frame.dump()) for frame in added]
+    return entries
+
+
+def apply_journal(frames, entries):
+    # replay entries on Watson's frames in one pass. Entries put and
+    #  delete frames by id, so replaying them again or over a newer
+    #  version of the frames file gives the same result.
+    rows = list(frames._rows)
+    positions = dict((frame.id, i) for i, frame in enumerate(rows))
+    for action, value in entries:
+        if action == JOURNAL_DELETE:
+            i = positions.pop(value, None)
+            if i is not None:
+                rows[i] = None
+            continue
+        start, stop, project, frame_id, tags, updated_at = value
+        frame = frames.new_frame(project, start, stop, tags=tags,
+                                 id=frame_id, updated_at=updated_at)
+        i = positions.get(frame_id)
+        if i is None:
+            positions[frame_id] = len(rows)
+            rows.append(frame)
+        else:
+            rows[i] = frame
+    frames._rows = [frame for frame in rows if frame is not None]
+    frames.changed = True
+
+
+class FlubberJournal(object):
+
+    # append-only file of changes to frames that are not in the frames
+    #  file yet, one JSON entry per line. Recording a change costs the
+    #  same however many frames there are, the frames file is rewritten
+    #  only once in a while when the journal is compacted into it.
+
+    def __init__(self, path):
+        self.path = path
+        # open lock file while this process owns the journal
+        self._lock_file = None
+
+    def acquire(self):
+        # take the advisory lock that makes this process the only one to
+        #  append to, compact and clear the journal, without waiting for
+        #  it. The journal itself is unlinked on compaction so the lock is
+        #  held on a file next to it. Returns whether the lock was taken.
+        if self._lock_file is not None:
+            return True
+        try:
+            f = open(self.path + '.lock', 'a')
+        except OSError:
+            # no config directory yet or not ours to write, there is no
+            #  journal to own either
+            return False
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._lock_file = f
+        return True
+
+    def release(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    @property
+    def owned(self):
+        return self._lock_file is not None
+
+    def __bool__(self):
+        # whether there are changes waiting to be compacted
+        try:
+            return os.path.getsize(self.path) > 0
+        except OSError:
+            return False
+
+    def append(self, entries):
+        # write entries to the end of the journal with a single write and
+        #  fsync, after this they survive a crash
+        data = "".join(json.dumps(entry, ensure_ascii=False) + "\n"
+                       for entry in entries).encode('utf-8')
+        with open(self.path, 'ab+') as f:
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    # end the partial line left by a crash, appending
+                    #  always writes to the end whatever was read
+                    data = b"\n" + data
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read(self):
+        # entries in the order they were appended. A crash while appending
+        #  may leave a partial last line, that change was never reported
+        #  as saved and is skipped.
+        try:
+            f = open(self.path, encoding='utf-8')
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                try:
+                    action, value = json.loads(line)
+                except ValueError:
+                    continue
+                yield action, value
+
+    def clear(self):
+        # the changes are in the frames file now
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
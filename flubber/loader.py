@@ -0,0 +1,67 @@
+import threading
+from gi.repository import GLib
+
+
+class FlubberLoadCancelled(Exception):
+    pass
+
+
+class FlubberLoadTicket(object):
+
+    def __init__(self, loader, generation):
+        self.loader = loader
+        self.generation = generation
+
+    @property
+    def cancelled(self):
+        # a newer load has been requested since this one started
+        return self.generation != self.loader.generation
+
+    def check(self):
+        # called by the work function between steps to bail out early
+        if self.cancelled:
+            raise FlubberLoadCancelled()
+
+
+class FlubberBackgroundLoader(object):
+
+    def __init__(self):
+        self.generation = 0
+        self._lock = threading.Lock()
+
+    def load(self, work, callback, errback=None):
+        # run work(ticket) on a worker thread and hand its result to
+        #  callback(result) on the main loop. Only the latest requested
+        #  load ever reaches its callback, older ones are cancelled.
+        with self._lock:
+            self.generation += 1
+            ticket = FlubberLoadTicket(self, self.generation)
+        thread = threading.Thread(target=self._run,
+                                  args=(ticket, work, callback, errback))
+        # do not keep the application alive because of a running load
+        thread.daemon = True
+        thread.start()
+        return ticket
+
+    def cancel(self):
+        # invalidate all running loads without starting a new one
+        with self._lock:
+            self.generation += 1
+
+    def _run(self, ticket, work, callback, errback):
+        try:
+            result = work(ticket)
+        except FlubberLoadCancelled:
+            return
+        except Exception as e:
+            if errback is not None:
+                GLib.idle_add(self._deliver, ticket, errback, e)
+            return
+        GLib.idle_add(self._deliver, ticket, callback, result)
+
+    def _deliver(self, ticket, callback, value):
+        # now on the main loop, drop results that are already stale
+        if not ticket.cancelled:
+            callback(value)
+        # one shot idle callback
+        return False
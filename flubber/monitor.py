@@ -0,0 +1,87 @@
+import os
+from gi.repository import GLib, Gio
+
+
+class FlubberSessionMonitor(object):
+
+    # file events come in bursts (temp file, rename, attribute changes),
+    #  wait this many milliseconds for them to settle before reacting
+    settle_delay = 50
+
+    # polling intervals in seconds used when file monitoring is unavailable
+    poll_min_interval = 1
+    poll_max_interval = 60
+
+    def __init__(self, session, callback):
+        self.session = session
+        # callback(frames_changed, state_changed) is called on the main loop
+        self.callback = callback
+
+        self._monitor = None
+        self._settle_source = None
+        self._poll_source = None
+        self._poll_interval = self.poll_min_interval
+        self._watched = set(os.path.basename(path)
+                            for path in session.watched_files)
+
+        try:
+            # watch the directory instead of the files themselves as Watson
+            #  replaces the files with a rename on every save
+            directory = Gio.File.new_for_path(session.config_dir)
+            self._monitor = directory.monitor_directory(
+                Gio.FileMonitorFlags.WATCH_MOVES, None)
+            self._monitor.connect("changed", self.on_monitor_changed)
+        except GLib.Error:
+            # no inotify or similar available, fall back to polling
+            self._monitor = None
+            self._schedule_poll()
+
+    def cancel(self):
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+        for source in (self._settle_source, self._poll_source):
+            if source is not None:
+                GLib.source_remove(source)
+        self._settle_source = None
+        self._poll_source = None
+
+    def on_monitor_changed(self, monitor, gfile, other_file, event_type):
+        # a rename reports the temp file as gfile and the target as other
+        names = [f.get_basename() for f in (gfile, other_file)
+                 if f is not None]
+        if not self._watched.intersection(names):
+            return
+        if self._settle_source is None:
+            self._settle_source = GLib.timeout_add(self.settle_delay,
+                                                   self.on_settled)
+
+    def on_settled(self):
+        self._settle_source = None
+        self._check()
+        # one shot timeout
+        return False
+
+    def on_poll(self):
+        self._poll_source = None
+        if self._check():
+            # something is going on, keep a close eye on it
+            self._poll_interval = self.poll_min_interval
+        else:
+            # nothing changed, back off
+            self._poll_interval = min(self._poll_interval * 2,
+                                      self.poll_max_interval)
+        self._schedule_poll()
+        return False
+
+    def _schedule_poll(self):
+        self._poll_source = GLib.timeout_add_seconds(self._poll_interval,
+                                                     self.on_poll)
+
+    def _check(self):
+        # only stat the files, data is read lazily when someone needs it
+        frames_changed, state_changed = self.session.refresh()
+        if frames_changed or state_changed:
+            self.callback(frames_changed, state_changed)
+            return True
+        return False
@@ -0,0 +1,89 @@
+import json
+
+_decoder = json.JSONDecoder()
+_whitespace = ' \t\n\r'
+
+# states of the array reader
+_BEFORE_ARRAY, _FIRST_VALUE, _VALUE, _SEPARATOR = range(4)
+
+
+def iter_json_array(f, chunk_size=1 << 16):
+    # yield the elements of the JSON array in file object f one at a time,
+    #  reading the file in chunks so that neither the whole text nor all
+    #  the parsed elements are ever held in memory at once
+    buf = ''
+    pos = 0
+    eof = False
+    state = _BEFORE_ARRAY
+    while True:
+        while pos < len(buf) and buf[pos] in _whitespace:
+            pos += 1
+        if pos == len(buf):
+            if eof:
+                if state == _BEFORE_ARRAY:
+                    # empty file, Watson treats this as no frames
+                    return
+                raise ValueError("Unexpected end of JSON array")
+            buf = f.read(chunk_size)
+            pos = 0
+            eof = buf == ''
+            continue
+
+        char = buf[pos]
+        if state == _BEFORE_ARRAY:
+            if char != '[':
+                raise ValueError("Expected a JSON array")
+            pos += 1
+            state = _FIRST_VALUE
+        elif state == _SEPARATOR:
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError(
+                    "Expected ',' or ']' at offset {}".format(pos))
+            pos += 1
+            state = _VALUE
+        else:
+            if state == _FIRST_VALUE and char == ']':
+                return
+            try:
+                value, end = _decoder.raw_decode(buf, pos)
+                # a value touching the end of the buffer may be cut short
+                truncated = end == len(buf) and not eof
+            except ValueError:
+                if eof:
+                    raise
+                truncated = True
+            if truncated:
+                # read more and try the same value again
+                chunk = f.read(chunk_size)
+                eof = chunk == ''
+                buf = buf[pos:] + chunk
+                pos = 0
+                continue
+            yield value
+            pos = end
+            state = _SEPARATOR
+
+
+def iter_frame_records(path, start=None, stop=None):
+    # stream raw frame records (start, stop, project, id, tags, updated_at)
+    #  from a Watson frames file, skipping frames that do not start within
+    #  [start, stop) before anything heavier than the JSON list is built.
+    #  Frames are not guaranteed to be in order in the file so the whole
+    #  file is always read, but only the wanted frames are kept.
+    try:
+        f = open(path, encoding='utf-8')
+    except FileNotFoundError:
+        return
+    with f:
+        for record in iter_json_array(f):
+            frame_start = record[0]
+            if start is not None and frame_start < start:
+                continue
+            if stop is not None and frame_start >= stop:
+                continue
+            # old Watson versions did not store all the fields
+            if len(record) < 6:
+                record = list(record) + [None] * (6 - len(record))
+            yield tuple(record)
@@ -0,0 +1,91 @@
+from collections import Counter
+from flubber.index import local_day_start, local_next_day_start
+
+
+class FlubberReport(object):
+
+    # time spent per project, tag or project and tag over a range of
+    #  frames. Totals are kept per local day and grouping so that a
+    #  change to a frame only drops the days it touched, and the totals of
+    #  whole ranges are kept until one of their days changes.
+
+    PROJECT = 'project'
+    TAG = 'tag'
+    PROJECT_TAG = 'project-tag'
+
+    # key of frames without tags in the PROJECT_TAG grouping
+    NO_TAG = -1
+
+    def __init__(self):
+        # (grouping, day start) -> {key: seconds}
+        self._days = dict()
+        # (grouping, start, stop) -> [(key, seconds)] longest first
+        self._ranges = dict()
+
+    def clear(self):
+        self._days.clear()
+        self._ranges.clear()
+
+    def invalidate(self, timestamps):
+        # forget totals of the days holding timestamps and of the ranges
+        #  including any of those days
+        days = set(local_day_start(timestamp) for timestamp in timestamps)
+        if not days:
+            return
+        for key in list(self._days):
+            if key[1] in days:
+                del self._days[key]
+        for key in list(self._ranges):
+            grouping, start, stop = key
+            for day_start in days:
+                if (start is None or start < local_next_day_start(day_start)) \
+                        and (stop is None or stop > day_start):
+                    del self._ranges[key]
+                    break
+
+    def cached(self, grouping, start=None, stop=None):
+        # totals of a range asked for before and unchanged since, or None
+        return self._ranges.get((grouping, start, stop))
+
+    def totals(self, index, grouping, start=None, stop=None):
+        # [(key, seconds)] of the frames of index starting within
+        #  [start, stop), longest first. Keys are interned project ids,
+        #  tag ids or tuples of both depending on grouping.
+        range_key = (grouping, start, stop)
+        try:
+            return self._ranges[range_key]
+        except KeyError:
+            pass
+        totals = Counter()
+        lo, hi = index.range(start, stop)
+        for day_start, day_lo, day_hi in index.days(lo, hi):
+            # only days fully inside the range can be shared with others
+            whole_day = (start is None or start <= day_start) and \
+                (stop is None or stop >= local_next_day_start(day_start))
+            day_key = (grouping, day_start)
+            day_totals = self._days.get(day_key) if whole_day else None
+            if day_totals is None:
+                day_totals = self._day_totals(index, grouping,
+                                              day_lo, day_hi)
+                if whole_day:
+                    self._days[day_key] = day_totals
+            totals.update(day_totals)
+        result = totals.most_common()
+        self._ranges[range_key] = result
+        return result
+
+    def _day_totals(self, index, grouping, lo, hi):
+        totals = dict()
+        starts, stops, projects = index.starts, index.stops, index.projects
+        for i in range(lo, hi):
+            duration = stops[i] - starts[i]
+            if grouping == self.PROJECT:
+                keys = (projects[i],)
+            elif grouping == self.TAG:
+                keys = index.frame_tags(i)
+            else:
+                keys = [(projects[i], tag)
+                        for tag in index.frame_tags(i) or (self.NO_TAG,)]
+            for key in keys:
+                totals[key] = totals.get(key, 0) + duration
+        return totals
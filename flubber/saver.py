@@ -0,0 +1,163 @@
+import time
+import threading
+from gi.repository import GLib
+
+
+class FlubberSaver(object):
+
+    # writes Watson files on a worker thread a moment after they were
+    #  changed. Changes made in the meantime are written together, so a
+    #  burst of edits costs one write and the main loop never waits for
+    #  the disk. Changes to frames go to the journal of the session, which
+    #  is compacted into the frames file once things have been idle for a
+    #  while or when asked to.
+
+    # wait this many seconds for more changes before writing
+    delay = 0.5
+    # but never hold back changes longer than this many seconds
+    max_delay = 5
+    # compact the journal after this many seconds without changes
+    compact_delay = 10
+
+    def __init__(self, session, errback=None):
+        self.session = session
+        # errback(exception) is called on the main loop when a write fails
+        self.errback = errback
+        # number of writes and compactions done, for the curious
+        self.writes = 0
+        self.compactions = 0
+
+        self._condition = threading.Condition()
+        # monotonic times of the first and the last pending request
+        self._first_request = None
+        self._last_request = None
+        # monotonic time the journal is to be compacted at
+        self._compact_at = None
+        # a write is going on, in the worker or in flush()
+        self._writing = False
+        self._closed = False
+        self._thread = None
+
+    @property
+    def pending(self):
+        with self._condition:
+            return self._first_request is not None or \
+                self._compact_at is not None or self._writing
+
+    def request(self):
+        # changes were made in memory, write them soon
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("saver is closed")
+            now = time.monotonic()
+            if self._first_request is None:
+                self._first_request = now
+            self._last_request = now
+            self._start()
+
+    def compact_soon(self):
+        # compact the journal right away, e.g. when the user may be about
+        #  to run watson which only reads the frames file
+        with self._condition:
+            if self._closed or not self.session.needs_compaction:
+                return
+            self._compact_at = time.monotonic()
+            self._start()
+
+    def flush(self, compact=False):
+        # write pending changes right away and wait until they are on
+        #  disk, errors are raised to the caller
+        with self._condition:
+            self._claim()
+            if compact:
+                self._compact_at = None
+        self._write(compact)
+
+    def close(self):
+        # stop the worker and write whatever is still pending, compacting
+        #  the journal so that the frames file is complete
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush(compact=True)
+
+    def _start(self):
+        # called with the condition held
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run)
+            # close() writes what is left, do not wait for the thread
+            self._thread.daemon = True
+            self._thread.start()
+        self._condition.notify_all()
+
+    def _claim(self):
+        # called with the condition held, waits for a write in progress
+        #  and takes over the pending request
+        while self._writing:
+            self._condition.wait()
+        self._first_request = self._last_request = None
+        self._writing = True
+
+    def _write(self, compact):
+        try:
+            self.session.write_files(compact)
+            if compact:
+                self.compactions += 1
+            else:
+                self.writes += 1
+        finally:
+            with self._condition:
+                self._writing = False
+                now = time.monotonic()
+                if not compact and self.session.needs_compaction and \
+                        (self._compact_at is None or self._compact_at > now):
+                    # compact once there have been no changes for a while,
+                    #  unless a compaction is due already
+                    self._compact_at = now + self.compact_delay
+                self._condition.notify_all()
+
+    def _next_deadline(self):
+        # called with the condition held
+        deadlines = list()
+        if self._first_request is not None:
+            deadlines.append(min(self._last_request + self.delay,
+                                 self._first_request + self.max_delay))
+        if self._compact_at is not None:
+            deadlines.append(self._compact_at)
+        return min(deadlines) if deadlines else None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed:
+                    deadline = self._next_deadline()
+                    if deadline is None:
+                        self._condition.wait()
+                        continue
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                else:
+                    # close() writes what is left
+                    return
+                # a compaction writes pending changes as well
+                compact = self._compact_at is not None and \
+                    self._compact_at <= time.monotonic()
+                if compact:
+                    self._compact_at = None
+                self._claim()
+            try:
+                self._write(compact)
+            except Exception as e:
+                if self.errback is not None:
+                    GLib.idle_add(self._deliver_error, e)
+
+    def _deliver_error(self, error):
+        # now on the main loop
+        self.errback(error)
+        # one shot idle callback
+        return False
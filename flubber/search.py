@@ -0,0 +1,81 @@
+from bisect import bisect_left
+from collections import defaultdict
+
+
+class FlubberSearchIndex(object):
+
+    # frames of the view by the lowercased names of their projects and
+    #  tags and by frame id. A search compares the words of the query to
+    #  the distinct names only and then collects the frames of the names
+    #  that match, so the cost does not come from string operations on
+    #  every frame.
+
+    def __init__(self, project_names, tag_names):
+        # names lists of the session interners
+        self.project_names = project_names
+        self.tag_names = tag_names
+        # day key of each frame
+        self.frame_days = dict()
+        # frame ids by interned project and tag id
+        self.project_frames = defaultdict(list)
+        self.tag_frames = defaultdict(list)
+        # built on first search
+        self._tokens = None
+        self._sorted_ids = None
+
+    def __len__(self):
+        return len(self.frame_days)
+
+    def add(self, day_key, frame_id, project, tags):
+        self.frame_days[frame_id] = day_key
+        self.project_frames[project].append(frame_id)
+        for tag in tags:
+            self.tag_frames[tag].append(frame_id)
+
+    def tokens(self):
+        # (lowercased name, frame ids) of every project and tag in use
+        if self._tokens is None:
+            self._tokens = [
+                (self.project_names[project].lower(), frame_ids)
+                for project, frame_ids in self.project_frames.items()]
+            self._tokens.extend(
+                (self.tag_names[tag].lower(), frame_ids)
+                for tag, frame_ids in self.tag_frames.items())
+        return self._tokens
+
+    def sorted_ids(self):
+        if self._sorted_ids is None:
+            self._sorted_ids = sorted(self.frame_days)
+        return self._sorted_ids
+
+    def match_word(self, word):
+        # ids of frames whose project or tag contains word or whose id
+        #  starts with it
+        frame_ids = set()
+        for name, name_frame_ids in self.tokens():
+            if word in name:
+                frame_ids.update(name_frame_ids)
+        ids = self.sorted_ids()
+        i = bisect_left(ids, word)
+        while i < len(ids) and ids[i].startswith(word):
+            frame_ids.add(ids[i])
+            i += 1
+        return frame_ids
+
+    def match(self, query):
+        # frames matching all words of query and the days holding them as
+        #  a tuple of sets (day keys, frame ids), None for an empty query.
+        #  Tags may be written like on Watson command line as "+tag".
+        matched = None
+        for word in query.lower().split():
+            word = word.lstrip('+')
+            if word == "":
+                continue
+            frame_ids = self.match_word(word)
+            matched = frame_ids if matched is None else matched & frame_ids
+            if not matched:
+                break
+        if matched is None:
+            return None
+        return (set(self.frame_days[frame_id] for frame_id in matched),
+                matched)
@@ -0,0 +1,671 @@
+import os
+import json
+import tempfile
+import threading
+from watson import Watson
+from flubber.index import FlubberFrameIndex, FlubberInterner
+from flubber.catalog import FlubberCatalog
+from flubber.report import FlubberReport
+from flubber.reader import iter_frame_records
+from flubber.snapshot import FlubberSnapshot, file_digest
+from flubber.journal import FlubberJournal, journal_entries, apply_journal
+from flubber.history import FlubberHistory
+from flubber.timing import span
+
+
+def file_signature(path):
+    # a cheap way to tell if a file has changed on disk without reading
+    #  it: watson saves through a temp file and a rename so the inode
+    #  changes on every save, mtime and size catch in-place writes
+    try:
+        st = os.stat(path)
+    except OSError:
+        # file does not exist (yet)
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def write_json_temp(path, data):
+    # write data as JSON the way Watson does into a temp file next to
+    #  path and flush it to disk, so that renaming it over path is atomic
+    #  and a crash leaves either the old or the new file. Returns the
+    #  path of the temp file.
+    fd, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path),
+        prefix=".{}-".format(os.path.basename(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(data, indent=1, ensure_ascii=False))
+            f.flush()
+            os.fsync(f.fileno())
+    except Exception:
+        os.unlink(temp_path)
+        raise
+    return temp_path
+
+
+def replace_keeping_backup(temp_path, path):
+    # like Watson, keep the previous version of the file as path.bak
+    if os.path.exists(path):
+        try:
+            os.unlink(path + '.bak')
+        except OSError:
+            pass
+        try:
+            os.link(path, path + '.bak')
+        except OSError:
+            # a backup is nice to have, not a reason to fail the save
+            pass
+    os.replace(temp_path, path)
+
+
+class FlubberSession(object):
+
+    def __init__(self, config_dir=None):
+        # single long lived Watson instance shared by all windows and dialogs
+        with span("Watson()"):
+            self._watson = Watson(config_dir=config_dir)
+        # signatures of the files as they were when we last read them
+        self._frames_signature = None
+        self._state_signature = None
+        # guards Watson data against worker threads loading frames while
+        #  the main thread refreshes or saves
+        self.lock = threading.RLock()
+        # one save at a time, an older save must not replace the files
+        #  after a newer one
+        self._write_lock = threading.Lock()
+        # columnar index of all the frames, built on demand
+        self._index = None
+        # index of only the frames in the window last asked for
+        self._window_index = None
+        # project and tag ids stay the same for the whole session
+        self.project_names = FlubberInterner()
+        self.tag_names = FlubberInterner()
+        # position of each frame in Watson's own list of frames
+        self._row_positions = None
+        # projects and tags in use, kept up to date on our own changes and
+        #  rebuilt when frames are read again from disk
+        self._catalog = FlubberCatalog()
+        self._catalog_stale = True
+        # totals per project and tag, dropped per day on our own changes
+        #  and altogether when frames are read again from disk
+        self._report = FlubberReport()
+        # snapshot whose index is in use but whose hash has not been
+        #  checked against the frames file yet
+        self._unverified_snapshot = None
+        # (signature, hash) of the frames file once known
+        self._frames_digest = None
+        # bumped on every change of frames in memory, tells a save
+        #  whether frames were changed while it was writing them
+        self._frames_generation = 0
+        # changes to frames are appended to a journal next to the frames
+        #  file and compacted into it only once in a while
+        self._journal = FlubberJournal(
+            os.path.join(self.config_dir, 'frames.journal'))
+        # journal entries of changes not written anywhere yet
+        self._journal_pending = list()
+        # only one process uses the journal at a time, others running
+        #  while a window is open write the frames file directly and leave
+        #  the journal to its owner
+        self._journal.acquire()
+        # deletes and edits of frames that can be undone
+        self.history = FlubberHistory()
+
+        self.recover_journal()
+
+    @property
+    def config_dir(self):
+        return os.path.dirname(self._watson.frames_file)
+
+    @property
+    def watched_files(self):
+        # the files other Watson clients change under our feet
+        return (self._watson.frames_file, self._watson.state_file)
+
+    @property
+    def watson(self):
+        # make sure the cached data is still valid before handing it out
+        self.refresh()
+        return self._watson
+
+    @property
+    def current(self):
+        # the running project as last read, {} if there is none. Does not
+        #  look at the files, see refresh()
+        with self.lock:
+            return self._watson.current
+
+    def refresh(self):
+        # compare the files on disk to what we have in memory and drop the
+        #  parts that have changed so that Watson reads them again lazily.
+        #  returns a tuple telling which of the files had changed.
+        with self.lock:
+            return self._refresh()
+
+    def _refresh(self):
+        frames_signature = file_signature(self._watson.frames_file)
+        frames_changed = frames_signature != self._frames_signature
+        if frames_changed:
+            # Watson has no public api for this, resetting the private
+            #  attribute makes the frames property load the file again
+            self._watson._frames = None
+            self._index = None
+            self._window_index = None
+            self._row_positions = None
+            self._catalog_stale = True
+            self._report.clear()
+            self._unverified_snapshot = None
+            self._frames_signature = frames_signature
+            if self._journal_pending or self._journal:
+                self._replay_journal()
+
+        state_signature = file_signature(self._watson.state_file)
+        state_changed = state_signature != self._state_signature
+        if state_changed:
+            if self._watson._current == self._watson._old_state:
+                self._watson._current = None
+                self._watson._old_state = None
+            # otherwise a start or stop of ours is not saved yet, it is
+            #  written over the file with the next save like Watson would
+            self._state_signature = state_signature
+
+        return frames_changed, state_changed
+
+    def _replay_journal(self):
+        # the frames file lacks changes in the journal, either because a
+        #  run crashed before compacting it or because someone else wrote
+        #  the file meanwhile. Apply them on top of the frames just read.
+        frames = self._watson.frames
+        apply_journal(frames,
+                      list(self._journal.read()) + self._journal_pending)
+        self._row_positions = None
+
+    def recover_journal(self):
+        # fold changes a crashed run left in the journal into the frames
+        #  file before anyone reads it
+        if not self._journal.owned or not self._journal:
+            return False
+        # reading the frames replays the journal
+        self.refresh()
+        try:
+            self.write_files(compact=True)
+        except OSError:
+            # frames in memory are right, compacting is tried again later
+            pass
+        return True
+
+    @property
+    def needs_compaction(self):
+        # whether the frames file lacks changes made in memory
+        return bool(self._journal_pending) or \
+            (self._journal.owned and bool(self._journal))
+
+    def close(self):
+        # let another process have the journal, changes not saved yet are
+        #  not written
+        self._journal.release()
+
+    def invalidate(self):
+        # forget everything, next access reads all files from disk
+        with self.lock:
+            self._catalog_stale = True
+            self._frames_signature = None
+            self._state_signature = None
+            self._refresh()
+
+    def frame_index(self, start=None, stop=None):
+        # index holding at least the frames starting within [start, stop),
+        #  rebuilt only when the frames have changed. Unless Watson has the
+        #  frames in memory already they are streamed from the frames file
+        #  keeping only the wanted window, so showing the last weeks does
+        #  not cost memory and parse time for years of history. The lock
+        #  is only held to look at and swap in state, frames are read and
+        #  indexed without it so that a load on a worker thread never
+        #  keeps the main thread waiting.
+        while True:
+            with self.lock:
+                self._refresh()
+                snapshot = self._unverified_snapshot
+                if snapshot is None:
+                    index = self._cached_index(start, stop)
+                    if index is not None:
+                        return index
+                    signature = self._frames_signature
+                    generation = self._frames_generation
+                    rows = None
+                    if self._watson._frames is not None:
+                        # frames are immutable, a copy of the list is enough
+                        rows = list(self._watson._frames._rows)
+            if snapshot is None:
+                break
+            # hashing reads the whole frames file
+            verified = snapshot.verify()
+            with self.lock:
+                if self._unverified_snapshot is snapshot:
+                    self._snapshot_checked(verified)
+
+        if rows is not None:
+            index = FlubberFrameIndex.from_frames(
+                rows, self.project_names, self.tag_names)
+        else:
+            index = FlubberFrameIndex(
+                iter_frame_records(self._watson.frames_file, start, stop),
+                self.project_names, self.tag_names, window=(start, stop))
+
+        with self.lock:
+            self._refresh()
+            if self._frames_signature == signature and \
+                    self._frames_generation == generation and \
+                    (rows is None) == (self._watson._frames is None):
+                if index.covers():
+                    self._index = index
+                else:
+                    self._window_index = index
+            # otherwise frames changed while they were indexed, the index
+            #  is handed out as it is but built again on next call
+        return index
+
+    def _cached_index(self, start, stop):
+        # an index already built for the frames as they are, or None
+        if self._index is not None:
+            return self._index
+        if self._watson._frames is not None:
+            # built from Watson's frames instead
+            return None
+        window_index = self._window_index
+        if window_index is not None and window_index.covers(start, stop):
+            return window_index
+        return None
+
+    def load_snapshot(self):
+        # use the frame index of the last run if the frames file looks
+        #  unchanged since, its contents are verified on the next
+        #  frame_index() call. Returns the view saved with the snapshot.
+        with self.lock:
+            self._refresh()
+            if len(self.project_names) or len(self.tag_names):
+                # the project and tag ids in the saved view are those of
+                #  the last run, they only stay the same when interned
+                #  into empty interners in the same order
+                return None
+            snapshot = FlubberSnapshot.load(self._watson.frames_file,
+                                            self._frames_signature)
+            if snapshot is None:
+                return None
+            index = snapshot.index
+            index.intern_names(self.project_names, self.tag_names)
+            if index.covers():
+                self._index = index
+            else:
+                self._window_index = index
+            self._unverified_snapshot = snapshot
+            return snapshot.view
+
+    def _verify_snapshot(self):
+        self._snapshot_checked(self._unverified_snapshot.verify())
+
+    def _snapshot_checked(self, verified):
+        snapshot = self._unverified_snapshot
+        self._unverified_snapshot = None
+        if verified:
+            self._frames_digest = (snapshot.signature, snapshot.digest)
+        else:
+            # same signature but different contents, parse the file
+            self._index = None
+            self._window_index = None
+            self._catalog_stale = True
+            self._report.clear()
+
+    def save_snapshot(self, view=None):
+        # save the frame index and view for the next run, only if the
+        #  index matches the frames file on disk
+        with self.lock:
+            self._refresh()
+            if self._unverified_snapshot is not None:
+                self._verify_snapshot()
+            frames = self._watson._frames
+            if frames is not None and frames.changed:
+                return
+            index = self._index
+            if index is None:
+                index = self._window_index
+            signature = self._frames_signature
+            if index is None or signature is None:
+                return
+            if self._frames_digest is None or \
+                    self._frames_digest[0] != signature:
+                self._frames_digest = (
+                    signature, file_digest(self._watson.frames_file))
+            FlubberSnapshot(self._watson.frames_file, signature,
+                            self._frames_digest[1], index, view).save()
+
+    def catalog(self):
+        # catalog of projects and tags, only rebuilt after the frames were
+        #  read again, otherwise maintained by the methods changing frames
+        with self.lock:
+            self._refresh()
+            if self._catalog_stale:
+                self._catalog_stale = False
+                self._catalog.rebuild(self.frame_index())
+            return self._catalog
+
+    def report_totals(self, grouping, start=None, stop=None):
+        # totals of frames starting within [start, stop) by grouping, see
+        #  FlubberReport.totals
+        while True:
+            with self.lock:
+                self._refresh()
+                totals = self._report.cached(grouping, start, stop)
+                if totals is not None:
+                    return totals
+            # only on a miss, without the lock like any other load. Open
+            #  ended like the view so that both share the same index.
+            index = self.frame_index(start)
+            with self.lock:
+                self._refresh()
+                if index is self._cached_index(start, None):
+                    return self._report.totals(index, grouping, start, stop)
+            # frames changed while they were indexed, totals of the old
+            #  index must not be kept
+
+    def _frames_changed(self, removed=(), added=()):
+        # frames were changed in memory, the index no longer matches them
+        self._frames_generation += 1
+        self._journal_pending.extend(journal_entries(removed, added))
+        self._index = None
+        self._window_index = None
+        # only totals of the days of the changed frames are out of date
+        self._report.invalidate(frame.start.int_timestamp
+                                for frame in list(removed) + list(added))
+        if self._catalog_stale:
+            # will be rebuilt on next access anyway
+            return
+        for frame in removed:
+            self._catalog.remove_frame(frame)
+        for frame in added:
+            self._catalog.add_frame(frame)
+
+    def add_frame(self, project, start, stop, tags):
+        with self.lock:
+            self._refresh()
+            frame = self._watson.add(project=project, tags=tags,
+                                     from_date=start, to_date=stop)
+            self._frames_changed(added=[frame])
+            return frame
+
+    def start(self, project, tags):
+        # start tracking a project, saved to the state file
+        with self.lock:
+            self._refresh()
+            return self._watson.start(project, tags, restart=False)
+
+    def stop(self):
+        # stop the running project, frame is added to frames
+        with self.lock:
+            self._refresh()
+            frame = self._watson.stop()
+            self._frames_changed(added=[frame])
+            return frame
+
+    def find_frame(self, frame_id):
+        # resolve a full or short frame id without scanning all frames.
+        #  Frames shown in the view are in the index built for it already,
+        #  only others cost indexing all the frames.
+        with self.lock:
+            self._refresh()
+            if self._unverified_snapshot is None:
+                index = self._index
+                if index is None and self._watson._frames is None:
+                    index = self._window_index
+                if index is not None:
+                    try:
+                        return index.frame(index.find(frame_id))
+                    except KeyError:
+                        pass
+        # without the lock like any other load
+        index = self.frame_index()
+        return index.frame(index.find(frame_id))
+
+    def update_frame(self, frame_id, project, start, stop, tags):
+        # replace a frame in place, Watson would look it up with a scan
+        with self.lock:
+            self._refresh()
+            frames = self._watson.frames
+            position = self._frame_position(frame_id)
+            old_frame = frames[position]
+            frames[position] = frames.new_frame(project, start, stop,
+                                                tags=tags, id=frame_id)
+            self._frames_changed(removed=[old_frame],
+                                 added=[frames[position]])
+            self.history.record("edit of frame",
+                                [(frame_id, old_frame, frames[position])])
+            return frames[position]
+
+    def delete_frames(self, frame_ids):
+        # remove many frames in a single pass over the frames instead of
+        #  a scan per frame, returns the ids that were actually deleted
+        frame_ids = set(frame_ids)
+        with self.lock:
+            self._refresh()
+            frames = self._watson.frames
+            # Watson only offers deletion of one frame at a time
+            rows = frames._rows
+            kept = [frame for frame in rows if frame.id not in frame_ids]
+            deleted = [frame for frame in rows if frame.id in frame_ids]
+            if deleted:
+                frames._rows = kept
+                frames.changed = True
+                self._row_positions = None
+                self._frames_changed(removed=deleted)
+                self.history.record(
+                    "delete of {} frame(s)".format(len(deleted)),
+                    [(frame.id, frame, None) for frame in deleted])
+            return [frame.id for frame in deleted]
+
+    def edit_frames(self, frame_ids, project=None, add_tags=(),
+                    remove_tags=(), shift=None):
+        # change many frames in memory in a single pass, the caller saves
+        #  once afterwards. shift is a datetime.timedelta moving both start
+        #  and stop. Returns the edited frames.
+        frame_ids = set(frame_ids)
+        edited = list()
+        originals = list()
+        with self.lock:
+            self._refresh()
+            frames = self._watson.frames
+            for i, frame in enumerate(frames):
+                if frame.id not in frame_ids:
+                    continue
+                tags = [tag for tag in frame.tags if tag not in remove_tags]
+                tags += [tag for tag in add_tags if tag not in tags]
+                start, stop = frame.start, frame.stop
+                if shift:
+                    start, stop = start + shift, stop + shift
+                frames[i] = frames.new_frame(project or frame.project,
+                                             start, stop, tags=tags,
+                                             id=frame.id)
+                originals.append(frame)
+                edited.append(frames[i])
+            self._frames_changed(removed=originals, added=edited)
+            self.history.record(
+                "edit of {} frame(s)".format(len(edited)),
+                [(frame.id, frame, edited_frame)
+                 for frame, edited_frame in zip(originals, edited)])
+        return edited
+
+    def undo(self):
+        # revert the last delete or edit in memory, the caller saves.
+        #  Returns the label of the change and the deltas applied, or None
+        #  if there was nothing to undo.
+        with self.lock:
+            self._refresh()
+            change = self.history.undo()
+            if change is None:
+                return None
+            label, deltas = change
+            return label, self._apply_deltas(deltas)
+
+    def redo(self):
+        # apply the last undone change again, see undo()
+        with self.lock:
+            self._refresh()
+            change = self.history.redo()
+            if change is None:
+                return None
+            label, deltas = change
+            return label, self._apply_deltas(deltas)
+
+    def _apply_deltas(self, deltas):
+        # make each frame of deltas what it is after the delta in a single
+        #  pass over the frames. Frames are matched by id, so this works
+        #  even if the frames were read again from disk in between. Returns
+        #  the deltas as applied, from the frames actually replaced.
+        targets = dict((frame_id, after)
+                       for frame_id, before, after in deltas)
+        frames = self._watson.frames
+        rows = list()
+        applied = list()
+        for frame in frames._rows:
+            if frame.id in targets:
+                target = targets.pop(frame.id)
+                applied.append((frame.id, frame, target))
+                if target is not None:
+                    rows.append(target)
+            else:
+                rows.append(frame)
+        # frames deleted by the change come back at the end, Watson does
+        #  not care about the order
+        for frame_id, target in targets.items():
+            if target is not None:
+                applied.append((frame_id, None, target))
+                rows.append(target)
+        frames._rows = rows
+        frames.changed = True
+        self._row_positions = None
+        self._frames_changed(
+            removed=[before for frame_id, before, after in applied
+                     if before is not None],
+            added=[after for frame_id, before, after in applied
+                   if after is not None])
+        return applied
+
+    def _frame_position(self, frame_id):
+        if self._row_positions is None or \
+                frame_id not in self._row_positions:
+            # frames added since the positions were taken are appended
+            #  to the end, a rebuild picks them up
+            self._row_positions = dict(
+                (frame.id, i)
+                for i, frame in enumerate(self._watson.frames._rows))
+        return self._row_positions[frame_id]
+
+    def save(self):
+        # write all changes to Watson's files right away, FlubberSaver
+        #  does the same on a worker thread
+        return self.write_files(compact=True)
+
+    def write_files(self, compact=False):
+        # write changes to frames and the state file. Changes to frames
+        #  are appended to the journal, with compact the whole frames file
+        #  is rewritten instead and the journal cleared. Files are written
+        #  through a temp file and a rename. What to write is taken under
+        #  the lock but the slow part is done without it, so that this can
+        #  run on a worker thread while the main thread keeps changing
+        #  frames. Returns the number of files written.
+        with self._write_lock, \
+                span("save (compact)" if compact else "save"):
+            return self._write_files(compact)
+
+    def _write_files(self, compact):
+        if not self._journal.owned and os.path.isdir(self.config_dir):
+            # the config directory may have been created since, or the
+            #  process owning the journal may be gone
+            self._journal.acquire()
+        # the journal of another process is not ours to append to
+        compact = compact or not self._journal.owned
+        with self.lock:
+            self._refresh()
+            watson = self._watson
+            generation = self._frames_generation
+            signature = self._frames_signature
+            # entries stay pending until they are on disk, a replay of the
+            #  journal meanwhile still has to apply them
+            entries = list(self._journal_pending)
+            rows = None
+            if compact and watson._frames is not None and \
+                    watson._frames.changed:
+                # frames are immutable, a copy of the list is enough
+                rows = list(watson._frames._rows)
+            elif not entries:
+                entries = None
+            state = None
+            if watson._current is not None and \
+                    watson._old_state != watson._current:
+                state = dict(watson._current)
+        if rows is None and entries is None and state is None:
+            return 0
+
+        written = list()
+        try:
+            os.makedirs(self.config_dir, exist_ok=True)
+            if rows is not None:
+                written.append((watson.frames_file, write_json_temp(
+                    watson.frames_file, [frame.dump() for frame in rows])))
+            if state is not None:
+                if state:
+                    current = {
+                        'project': state['project'],
+                        'start': watson._format_date(state['start']),
+                        'tags': state['tags'],
+                    }
+                else:
+                    current = {}
+                written.append((watson.state_file, write_json_temp(
+                    watson.state_file, current)))
+            if rows is None and entries is not None:
+                # the frames file stays as it is until compacted
+                self._journal.append(entries)
+                written.append((self._journal.path, None))
+
+            with self.lock:
+                # frames written by someone else meanwhile are not to be
+                #  replaced, they are read back with the journal applied
+                #  and compacted again later
+                self._refresh()
+                frames_current = self._frames_signature == signature
+                for path, temp_path in written:
+                    if temp_path is None:
+                        continue
+                    if path == watson.frames_file and not frames_current:
+                        os.unlink(temp_path)
+                        continue
+                    replace_keeping_backup(temp_path, path)
+                if entries and (rows is None or frames_current):
+                    # in the journal or the frames file now
+                    del self._journal_pending[:len(entries)]
+                if rows is not None and frames_current:
+                    # everything in the journal is in the frames file now
+                    if self._journal.owned:
+                        self._journal.clear()
+                    if watson._frames is not None and \
+                            generation == self._frames_generation:
+                        # Watson never resets this flag by itself, without
+                        #  this every following save would rewrite the
+                        #  frames file again
+                        watson._frames.changed = False
+                    # we wrote the file ourselves, no need to read it back
+                    self._frames_signature = file_signature(
+                        watson.frames_file)
+                if state is not None:
+                    watson._old_state = state
+                    self._state_signature = file_signature(
+                        watson.state_file)
+        except Exception:
+            for path, temp_path in written:
+                if temp_path is not None and os.path.exists(temp_path):
+                    os.unlink(temp_path)
+            # read the files again on next access, changes still pending
+            #  are applied on top and written with the next save
+            self.invalidate()
+            raise
+        return len(written)
@@ -0,0 +1,96 @@
+import os
+import pickle
+import hashlib
+import tempfile
+
+# bumped whenever the layout of the pickled data changes
+SNAPSHOT_VERSION = 1
+
+
+def cache_dir():
+    # per user cache directory as specified by XDG
+    base = os.environ.get('XDG_CACHE_HOME') or \
+        os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'flubber')
+
+
+def file_digest(path, chunk_size=1 << 20):
+    # hash of the contents of a file, much cheaper than parsing it
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FlubberSnapshot(object):
+
+    # parsed frame index and the last rendered view of a frames file kept
+    #  in the user cache directory between runs. A snapshot is only used
+    #  while the frames file has the same signature (mtime, size and
+    #  inode) as when it was taken, and it is trusted only after the hash
+    #  of the file contents matches as well.
+
+    def __init__(self, frames_file, signature, digest, index, view=None):
+        self.frames_file = frames_file
+        self.signature = signature
+        self.digest = digest
+        self.index = index
+        # (range, view days) as loaded by the main window
+        self.view = view
+
+    @staticmethod
+    def path(frames_file):
+        # one snapshot per frames file
+        name = hashlib.sha1(
+            os.path.realpath(frames_file).encode('utf-8')).hexdigest()
+        return os.path.join(cache_dir(), 'snapshot-{}'.format(name[:16]))
+
+    @classmethod
+    def load(cls, frames_file, signature):
+        # the snapshot of frames_file if it was taken of a file with the
+        #  same signature, otherwise None. Broken or outdated snapshots
+        #  are not an error, they only cost a parse of the frames file.
+        if signature is None:
+            return None
+        try:
+            with open(cls.path(frames_file), 'rb') as f:
+                version, state = pickle.load(f)
+        except (OSError, EOFError, ValueError, TypeError,
+                AttributeError, ImportError, pickle.UnpicklingError):
+            return None
+        if version != SNAPSHOT_VERSION:
+            return None
+        snapshot = cls(**state)
+        if snapshot.frames_file != frames_file or \
+                snapshot.signature != signature:
+            return None
+        return snapshot
+
+    def verify(self):
+        # compare the hash of the frames file to the one in the snapshot,
+        #  this reads the whole file and should be done in the background
+        try:
+            return file_digest(self.frames_file) == self.digest
+        except OSError:
+            return False
+
+    def save(self):
+        # write through a temp file and a rename so that a crash never
+        #  leaves a half written snapshot behind
+        path = self.path(self.frames_file)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        state = dict(frames_file=self.frames_file,
+                     signature=self.signature,
+                     digest=self.digest,
+                     index=self.index,
+                     view=self.view)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((SNAPSHOT_VERSION, state), f,
+                            pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+        except Exception:
+            os.unlink(temp_path)
+            raise
@@ -0,0 +1,59 @@
+import sys
+import time
+import builtins
+
+
+class FlubberImportTimer(object):
+
+    # wraps the import statement to time every module imported for the
+    #  first time while installed. Times include the nested imports, the
+    #  nesting depth tells them apart.
+
+    def __init__(self):
+        # (depth, module name, seconds) in the order imports finished
+        self.timings = list()
+        self._import = None
+        self._depth = 0
+
+    def install(self):
+        self._import = builtins.__import__
+        builtins.__import__ = self
+
+    def uninstall(self):
+        if self._import is not None:
+            builtins.__import__ = self._import
+            self._import = None
+
+    def __call__(self, name, globals=None, locals=None, fromlist=(),
+                 level=0):
+        if level != 0 or name in sys.modules:
+            # relative or already imported, nothing to time
+            return self._import(name, globals, locals, fromlist, level)
+        started = time.perf_counter()
+        self._depth += 1
+        try:
+            return self._import(name, globals, locals, fromlist, level)
+        finally:
+            self._depth -= 1
+            self.timings.append((self._depth, name,
+                                 time.perf_counter() - started))
+
+    def slowest(self, limit=15, max_depth=1):
+        # slowest imports not nested deeper than max_depth
+        timings = [timing for timing in self.timings
+                   if timing[0] <= max_depth]
+        return sorted(timings, key=lambda timing: -timing[2])[:limit]
+
+
+def print_startup_profile(import_timer, phases, file=sys.stderr):
+    # breakdown printed by --profile-startup
+    print("Slowest imports:", file=file)
+    for depth, name, seconds in import_timer.slowest():
+        print("  {:8.1f} ms  {}{}".format(seconds * 1000, "  " * depth,
+                                          name), file=file)
+    print("Start up phases:", file=file)
+    previous = 0
+    for name, elapsed in phases.items():
+        print("  {:8.1f} ms  (+{:.1f} ms)  {}".format(
+            elapsed * 1000, (elapsed - previous) * 1000, name), file=file)
+        previous = elapsed
@@ -0,0 +1,145 @@
+import os
+import re
+import json
+import math
+import time
+import cProfile
+import functools
+import threading
+import contextlib
+from collections import deque
+from flubber.snapshot import cache_dir
+
+# durations kept per span name, older ones are dropped
+SPAN_SAMPLES = 256
+
+
+def percentile(sorted_values, fraction):
+    # nearest rank percentile of a sorted non-empty list
+    rank = math.ceil(fraction * len(sorted_values)) - 1
+    return sorted_values[min(max(rank, 0), len(sorted_values) - 1)]
+
+
+class FlubberTimings(object):
+
+    # durations of recent runs of named spans of code in ring buffers,
+    #  cheap enough to be always on. With a profile_dir every span is
+    #  also run under cProfile and its stats written there, one file per
+    #  run. Spans may run on any thread.
+
+    def __init__(self, samples=SPAN_SAMPLES, profile_dir=None):
+        self.samples = samples
+        self.profile_dir = profile_dir
+        self._lock = threading.Lock()
+        # name -> deque of durations in seconds
+        self._durations = dict()
+        # name -> number of runs ever, not only the ones kept
+        self._counts = dict()
+        # cProfile can not profile nested spans or two threads at once,
+        #  only the outermost span of one thread is profiled
+        self._profiling = threading.Lock()
+        self._profile_count = 0
+
+    def record(self, name, seconds):
+        with self._lock:
+            durations = self._durations.get(name)
+            if durations is None:
+                durations = deque(maxlen=self.samples)
+                self._durations[name] = durations
+            durations.append(seconds)
+            self._counts[name] = self._counts.get(name, 0) + 1
+
+    @contextlib.contextmanager
+    def span(self, name):
+        # time the body of a with statement as name
+        profiler = self._start_profile()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+            if profiler is not None:
+                self._stop_profile(profiler, name)
+
+    def timed(self, name=None):
+        # decorator timing each call of a function, named after the
+        #  function unless name is given
+        def decorator(func):
+            span_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def stats(self):
+        # list of dicts with the name, count, and the median, 95th
+        #  percentile and maximum of the kept durations in seconds
+        with self._lock:
+            items = [(name, self._counts[name], sorted(durations))
+                     for name, durations in self._durations.items()]
+        return [dict(name=name,
+                     count=count,
+                     p50=percentile(durations, 0.5),
+                     p95=percentile(durations, 0.95),
+                     max=durations[-1])
+                for name, count, durations in sorted(items)]
+
+    def dump_json(self):
+        # stats and the kept durations as a JSON document
+        with self._lock:
+            durations = dict((name, list(values))
+                             for name, values in self._durations.items())
+        return json.dumps({
+            "timestamp": time.time(),
+            "stats": self.stats(),
+            "durations": durations,
+        }, indent=1, sort_keys=True)
+
+    def clear(self):
+        with self._lock:
+            self._durations.clear()
+            self._counts.clear()
+
+    def _start_profile(self):
+        if self.profile_dir is None or \
+                not self._profiling.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # another profiler is active already
+            self._profiling.release()
+            return None
+        return profiler
+
+    def _stop_profile(self, profiler, name):
+        try:
+            profiler.disable()
+            self._profile_count += 1
+            os.makedirs(self.profile_dir, exist_ok=True)
+            path = os.path.join(self.profile_dir, "{}-{}-{}.prof".format(
+                time.strftime("%Y%m%d-%H%M%S"), self._profile_count,
+                re.sub(r"[^\w.-]+", "_", name).strip("_")))
+            profiler.dump_stats(path)
+        except OSError:
+            # profiling is a debugging aid, never fail the span for it
+            pass
+        finally:
+            self._profiling.release()
+
+
+def profile_dir_from_environment():
+    # FLUBBER_PROFILE=1 writes cProfile stats of every span into the cache
+    if os.environ.get('FLUBBER_PROFILE', '') in ('', '0'):
+        return None
+    return os.path.join(cache_dir(), 'profiles')
+
+
+# timings of the whole application
+timings = FlubberTimings(profile_dir=profile_dir_from_environment())
+span = timings.span
+timed = timings.timed
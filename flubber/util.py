@@ -1,14 +1,104 @@
-import arrow
+import re
+import datetime
+from functools import lru_cache
 from dateutil import tz
 
+# When we parse a date, we want to parse it in the timezone
+# expected by the user, so that midnight is midnight in the local
+# timezone, not in UTC. Watson Cf issue #16. Looking up the local
+# timezone is not free so do it only once.
+local_tz = tz.tzlocal()
+
+# absolute "YYYY-MM-DD HH:mm" with optional ":ss"
+_absolute_re = re.compile(
+    r'^\s*(\d{4})-(\d{2})-(\d{2})\s+(\d{2}):(\d{2})(?::(\d{2}))?\s*$')
+# "today", "yesterday" or "tomorrow" with an optional "HH:mm[:ss]",
+#  or only "HH:mm[:ss]" for today
+_day_re = re.compile(
+    r'^\s*(today|yesterday|tomorrow)?\s*'
+    r'(?:(\d{1,2}):(\d{2})(?::(\d{2}))?)?\s*$', re.IGNORECASE)
+# "now" or offsets from now like "-30m", "+2h" or "-1h 30m"
+_relative_re = re.compile(
+    r'^\s*(?:now|([+-])\s*((?:\d+\s*[smhdw]\s*)+))\s*$', re.IGNORECASE)
+_relative_part_re = re.compile(r'(\d+)\s*([smhdw])', re.IGNORECASE)
+
+_relative_units = {'s': 'seconds', 'm': 'minutes', 'h': 'hours',
+                   'd': 'days', 'w': 'weeks'}
+_day_offsets = {'today': 0, 'yesterday': -1, 'tomorrow': 1}
+
+
+def is_absolute_datetime(value):
+    # whether value names the same moment whenever it is parsed, unlike
+    #  "now" or "yesterday 09:00"
+    return _absolute_re.match(value) is not None
+
 
 def arrow_parse_datetime(value):
-    date = arrow.get(value, ['YYYY-MM-DD HH:mm:ss', 'YYYY-MM-DD HH:mm'])
-    # When we parse a date, we want to parse it in the timezone
-    # expected by the user, so that midnight is midnight in the local
-    # timezone, not in UTC. Watson Cf issue #16.
-    date.tzinfo = tz.tzlocal()
-    return date
+    # parse user input into an arrow object in the local timezone.
+    #  Precompiled patterns instead of arrow.get() with format strings
+    #  which are tokenized again on every call.
+    import arrow
+    match = _absolute_re.match(value)
+    if match:
+        year, month, day, hour, minute, second = match.groups()
+        return arrow.Arrow(int(year), int(month), int(day),
+                           int(hour), int(minute), int(second or 0),
+                           tzinfo=local_tz)
+
+    match = _relative_re.match(value)
+    if match:
+        date = arrow.Arrow.now(local_tz)
+        sign, parts = match.groups()
+        if sign is None:
+            # plain "now"
+            return date
+        direction = -1 if sign == '-' else 1
+        shift = dict()
+        for amount, unit in _relative_part_re.findall(parts):
+            unit = _relative_units[unit.lower()]
+            shift[unit] = shift.get(unit, 0) + direction * int(amount)
+        return date.shift(**shift)
+
+    match = _day_re.match(value)
+    if match and any(match.groups()):
+        day, hour, minute, second = match.groups()
+        date = arrow.Arrow.now(local_tz).floor('day')
+        if day is not None:
+            date = date.shift(days=_day_offsets[day.lower()])
+        if hour is not None:
+            # replace instead of shift so DST changes do not move the time
+            date = date.replace(hour=int(hour), minute=int(minute),
+                                second=int(second or 0))
+        return date
+
+    raise ValueError("Could not parse '{}', expected YYYY-MM-DD HH:mm[:ss], "
+                     "now, -30m, yesterday 09:00 or alike.".format(value))
+
+
+@lru_cache(maxsize=1024)
+def format_day(timestamp):
+    # title of a day row from the epoch of its start
+    import arrow
+    return "{:dddd DD MMMM YYYY}".format(
+        arrow.Arrow.fromtimestamp(timestamp, local_tz))
+
+
+@lru_cache(maxsize=4096)
+def format_duration(seconds):
+    # arrow and watson are imported on first use in this module to keep
+    #  them out of start up, the caches make later imports rare anyway
+    from watson.utils import format_timedelta
+    return format_timedelta(datetime.timedelta(seconds=seconds))
+
+
+@lru_cache(maxsize=4096)
+def format_clock(start, stop):
+    # time span of a frame from the epochs of its start and stop
+    import arrow
+    return '{:HH:mm} to {:HH:mm} ({})'.format(
+        arrow.Arrow.fromtimestamp(start, local_tz),
+        arrow.Arrow.fromtimestamp(stop, local_tz),
+        format_duration(stop - start))
 
 
 def beautify_tags(tag_list):
@@ -0,0 +1,37 @@
+import datetime
+from collections import OrderedDict
+from flubber.search import FlubberSearchIndex
+
+
+def group_view_days(index, lo, hi, old_view_days=None, check=None):
+    # contents of the main view for positions [lo, hi) of a frame index:
+    #  for each local day, newest first, a tuple of (day start epoch, model
+    #  values of its frame rows keyed by frame id, day total). Frames are
+    #  indexed for search at the same go. Totals are only computed for
+    #  days that differ from old_view_days, which maps day keys to rows.
+    #  check() is called between days to allow cancelling.
+    if old_view_days is None:
+        old_view_days = dict()
+    view_days = OrderedDict()
+    search_index = FlubberSearchIndex(index.project_names, index.tag_names)
+    starts, stops, projects = index.starts, index.stops, index.projects
+    for day_start, day_lo, day_hi in reversed(list(index.days(lo, hi))):
+        if check is not None:
+            check()
+        day_key = datetime.date.fromtimestamp(day_start).isoformat()
+        rows = OrderedDict()
+        for i in range(day_lo, day_hi):
+            # raw values only, text is formatted when rows are drawn
+            tags = tuple(index.frame_tags(i))
+            rows[index.ids[i]] = (starts[i],
+                                  stops[i],
+                                  stops[i] - starts[i],
+                                  projects[i],
+                                  tags)
+            search_index.add(day_key, index.ids[i], projects[i], tags)
+        if old_view_days.get(day_key) != rows:
+            daily_total = index.total(day_lo, day_hi)
+        else:
+            daily_total = None
+        view_days[day_key] = (day_start, rows, daily_total)
+    return view_days, search_index
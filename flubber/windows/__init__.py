@@ -1,3 +1,4 @@
 from .application import FlubberAppWindow
+from .performance import FlubberPerformanceWindow
 
-__all__ = ['FlubberAppWindow']
+__all__ = ['FlubberAppWindow', 'FlubberPerformanceWindow']
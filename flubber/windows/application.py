@@ -1,24 +1,57 @@
-from gi.repository import GLib, Gio, Gtk, Notify
-from watson import Watson
-from watson.utils import (
-    sorted_groupby, format_timedelta,
-    get_frame_from_argument)
-import arrow
-import operator
-from functools import reduce
-from flubber.dialogs import (
-    FlubberAddFrameDialog, FlubberStartFrameDialog,
-    FlubberEditFrameDialog)
+from gi.repository import GLib, Gio, GObject, Gtk, Notify
+import datetime
+import functools
+from collections import OrderedDict
 from flubber.dialogs.util import (
     flubber_error_dialog, flubber_warning_dialog,
     flubber_info_dialog, flubber_confirm_dialog)
-from flubber.util import beautify_tags
+from flubber.util import (
+    beautify_tags, format_day, format_duration, format_clock, local_tz)
+from flubber.monitor import FlubberSessionMonitor
+from flubber.loader import FlubberBackgroundLoader
+from flubber.index import local_period, local_day_start
+from flubber.search import FlubberSearchIndex
+from flubber.view import group_view_days
+from flubber.report import FlubberReport
+from flubber.timing import timed
 
 
 class FlubberAppWindow(Gtk.ApplicationWindow):
 
     welcome_enabled = False
     notification = None
+    # source id of the timer refreshing the "started ago" status text
+    status_tick_source = None
+
+    # how often to refresh the running project status text, in seconds
+    status_tick_interval = 30
+
+    # ranges of frames the view can be limited to, ids map to periods of
+    #  local_period() except for "all" and "custom"
+    view_ranges = (("day", "Today"),
+                   ("week", "This week"),
+                   ("month", "This month"),
+                   ("all", "All time"),
+                   ("custom", "Custom…"))
+    view_period = "month"
+    # [start, stop) epochs of a custom range
+    custom_range = (None, None)
+    # frames of the view by project, tag and id for the search entry
+    search_index = None
+    # (day keys, frame ids) matching the search, None when not searching
+    search_matches = None
+
+    # where the first view shown came from, for startup timing
+    first_view_source = None
+    # range of the view days last loaded
+    loaded_range = None
+    # watches Watson files once the window is populated
+    monitor = None
+
+    # groupings of the report pane
+    report_groupings = ((FlubberReport.PROJECT, "By project"),
+                        (FlubberReport.TAG, "By tag"),
+                        (FlubberReport.PROJECT_TAG, "By project and tag"))
 
     def __init__(self, *args, **kwargs):
         super(Gtk.ApplicationWindow, self).__init__(*args, **kwargs)
@@ -36,6 +69,16 @@ class FlubberAppWindow(Gtk.ApplicationWindow):
                      lambda obj, pspec: max_action.set_state(
                         GLib.Variant.new_boolean(obj.props.is_maximized)))
 
+        # undo and redo deletes and edits of frames
+        self.undo_action = Gio.SimpleAction.new("undo", None)
+        self.undo_action.connect("activate", self.on_undo)
+        self.undo_action.set_enabled(False)
+        self.add_action(self.undo_action)
+        self.redo_action = Gio.SimpleAction.new("redo", None)
+        self.redo_action.connect("activate", self.on_redo)
+        self.redo_action.set_enabled(False)
+        self.add_action(self.redo_action)
+
         # create headerbar
         self.hb = Gtk.HeaderBar()
         self.hb.set_show_close_button(True)
@@ -50,6 +93,10 @@ class FlubberAppWindow(Gtk.ApplicationWindow):
         self.reload_button.connect("clicked", self.on_reload_button_clicked)
         self.hb.pack_end(self.reload_button)
 
+        # spinner to show while frames are being loaded
+        self.spinner = Gtk.Spinner()
+        self.hb.pack_end(self.spinner)
+
         # button to add a frame
         self.add_button = Gtk.Button()
         icon = Gio.ThemedIcon(name="document-new")
@@ -66,6 +113,44 @@ class FlubberAppWindow(Gtk.ApplicationWindow):
         self.del_button.connect("clicked", self.on_del_button_clicked)
         self.hb.pack_end(self.del_button)
 
+        # button to edit selected frames at once
+        self.edit_button = Gtk.Button()
+        icon = Gio.ThemedIcon(name="document-properties")
+        image = Gtk.Image.new_from_gicon(icon, Gtk.IconSize.BUTTON)
+        self.edit_button.add(image)
+        self.edit_button.connect("clicked", self.on_edit_button_clicked)
+        self.hb.pack_end(self.edit_button)
+
+        # buttons to undo and redo, sensitive while their action is enabled
+        self.redo_button = Gtk.Button()
+        icon = Gio.ThemedIcon(name="edit-redo")
+        image = Gtk.Image.new_from_gicon(icon, Gtk.IconSize.BUTTON)
+        self.redo_button.add(image)
+        self.redo_button.set_action_name("win.redo")
+        self.hb.pack_end(self.redo_button)
+        self.undo_button = Gtk.Button()
+        icon = Gio.ThemedIcon(name="edit-undo")
+        image = Gtk.Image.new_from_gicon(icon, Gtk.IconSize.BUTTON)
+        self.undo_button.add(image)
+        self.undo_button.set_action_name("win.undo")
+        self.hb.pack_end(self.undo_button)
+
+        # range of frames to show
+        self.range_combo = Gtk.ComboBoxText()
+        for range_id, label in self.view_ranges:
+            self.range_combo.append(range_id, label)
+        self.range_combo.set_active_id(self.view_period)
+        self.range_combo.connect("changed", self.on_range_combo_changed)
+        self.hb.pack_end(self.range_combo)
+
+        # search frames by project, tag or id, search-changed is emitted
+        #  only once typing pauses
+        self.search_entry = Gtk.SearchEntry()
+        self.search_entry.set_placeholder_text("Project, tag or id")
+        self.search_entry.connect("search-changed",
+                                  self.on_search_entry_changed)
+        self.hb.pack_end(self.search_entry)
+
         # button to track project
         self.track_button = Gtk.Switch()
         # use button-press-event instead of notify::active so that
@@ -84,53 +169,71 @@ class FlubberAppWindow(Gtk.ApplicationWindow):
         self.grid.set_row_homogeneous(True)
         self.add(self.grid)
 
-        # Welcome message
-        welcome_msg = ("No frames yet. You can "
-                       "<a href='start'>start/stop tracking</a>"
-                       " a project or <a href='add'>add a "
-                       "existing</a> entry.")
+        # Welcome message, text depends on the range shown
         self.welcome_label = Gtk.Label()
-        self.welcome_label.set_markup(welcome_msg)
         self.welcome_label.connect("activate-link", self.on_link_clicked)
 
-        # the magic of the store is as follows:
-        #  day (branch node) and project name (leaf) can share
-        #  same first element
-        self.store = Gtk.TreeStore(str, str, str, str, bool)
+        # the store holds raw values only, text is produced by the cell
+        #  data functions below when a row is actually drawn. Columns are:
+        #  0 start epoch (day start for days), 1 stop epoch, 2 duration
+        #  (day total for days) in seconds, 3 interned project id (-1 for
+        #  days), 4 selection, 5 row key: the date for days and the full
+        #  frame id for frames, 6 tuple of interned tag ids
+        self.store = Gtk.TreeStore(GObject.TYPE_INT64, GObject.TYPE_INT64,
+                                   GObject.TYPE_INT64, int, bool, str,
+                                   object)
+        # what is currently known to the view: for each day key (in display
+        #  order) an ordered map of frame id to the values of its row
+        self.view_days = OrderedDict()
+        # frame rows are built only for days that are expanded, collapsed
+        #  days only carry a placeholder child to make them expandable
+        self.populated_days = set()
+        # ids of selected frames, kept outside of the store as frames of
+        #  collapsed days do not have rows
+        self.selected_frames = set()
+        # frames are loaded and grouped on a worker thread
+        self.loader = FlubberBackgroundLoader()
+
+        # the view shows the store through a filter hiding frames and days
+        #  that do not match the search. Store iters and paths given by
+        #  the view have to be converted with the filter.
+        self.filter = self.store.filter_new()
+        self.filter.set_visible_func(self.is_row_visible)
 
         # TreeView
         # the treeview shows the model
         # create a treeview on the model store
-        self.view = Gtk.TreeView().new_with_model(self.store)
+        self.view = Gtk.TreeView().new_with_model(self.filter)
 
         # the cellrenderer for the column - text
         renderer_days = Gtk.CellRendererText()
-        # the column is created (note to self:
-        #  text= actually indicates the list position
-        #  from store.append(...))
-        column_days = Gtk.TreeViewColumn(
-            "Frames by day", renderer_days, text=0)
+        # the column is created and the text for it is formatted on
+        #  demand by the cell data function
+        column_days = Gtk.TreeViewColumn("Frames by day", renderer_days)
+        column_days.set_cell_data_func(renderer_days, self.render_day_cell)
         # and it is appended to the treeview
         self.view.append_column(column_days)
 
         # cellrender for project name
         rendered_project = Gtk.CellRendererText()
-        column_project = Gtk.TreeViewColumn(
-            "Project", rendered_project, text=1)
+        column_project = Gtk.TreeViewColumn("Project", rendered_project)
+        column_project.set_cell_data_func(rendered_project,
+                                          self.render_project_cell)
         column_project.set_expand(True)
         self.view.append_column(column_project)
 
         # cellrender for project tags
         rendered_tags = Gtk.CellRendererText()
-        column_tags = Gtk.TreeViewColumn(
-            "Tags", rendered_tags, text=3)
+        column_tags = Gtk.TreeViewColumn("Tags", rendered_tags)
+        column_tags.set_cell_data_func(rendered_tags, self.render_tags_cell)
         column_tags.set_expand(True)
         self.view.append_column(column_tags)
 
         # cellrender for project/day length
         rendered_length = Gtk.CellRendererText()
-        column_length = Gtk.TreeViewColumn(
-            "Duration", rendered_length, text=2)
+        column_length = Gtk.TreeViewColumn("Duration", rendered_length)
+        column_length.set_cell_data_func(rendered_length,
+                                         self.render_duration_cell)
         column_length.set_expand(True)
         self.view.append_column(column_length)
 
@@ -143,22 +246,129 @@ class FlubberAppWindow(Gtk.ApplicationWindow):
 
         # grab double click event on the list
         self.view.connect("row-activated", self.on_view_row_activated)
+        # populate and release frame rows of days on demand
+        self.view.connect("test-expand-row", self.on_view_test_expand_row)
+        self.view.connect("row-collapsed", self.on_view_row_collapsed)
 
         # create scrollable window and place tree view inside it
         scrollable_treelist = Gtk.ScrolledWindow()
         scrollable_treelist.set_vexpand(True)
-        self.grid.attach(scrollable_treelist, 0, 0, 8, 10)
         scrollable_treelist.add(self.view)
 
+        # frames and the report are pages of a stack switched from the
+        #  header bar
+        self.stack = Gtk.Stack()
+        self.stack.add_titled(scrollable_treelist, "frames", "Frames")
+        self.stack.add_titled(self.create_report_pane(), "report", "Report")
+        self.stack.connect("notify::visible-child-name",
+                           self.on_stack_page_changed)
+        stack_switcher = Gtk.StackSwitcher()
+        stack_switcher.set_stack(self.stack)
+        self.hb.set_custom_title(stack_switcher)
+        self.grid.attach(self.stack, 0, 0, 8, 10)
+
+        # nothing can be done with frames before they are there
+        for widget in (self.reload_button, self.add_button,
+                       self.del_button, self.edit_button,
+                       self.track_button, self.range_combo,
+                       self.search_entry):
+            widget.set_sensitive(False)
+
         # show all elements on this window
         self.show_all()
 
+        # Watson data is set up once the empty window is on screen
+        self.map_handler = self.connect("map-event", self.on_first_map)
+        self.connect("destroy", self.on_destroy)
+        self.connect("focus-out-event", self.on_focus_out)
+
+    @property
+    def session(self):
+        # Watson state is owned by the application and shared
+        #  between all windows and dialogs
+        return self.get_application().session
+
+    @property
+    def catalog_store(self):
+        return self.get_application().catalog_store
+
+    @property
+    def saver(self):
+        return self.get_application().saver
+
+    def on_save_failed(self, error):
+        # writing Watson files in the background failed, the session has
+        #  dropped the changes that did not make it to disk
+        flubber_error_dialog(self, "Error while saving Watson state files",
+                             str(error))
+        # sync view with watson state
+        self.reload_watson_data()
+
+    def on_first_map(self, window, event):
+        self.disconnect(self.map_handler)
+        self.get_application().startup_phase("window mapped")
+        # low priority so that the window is drawn first
+        GLib.idle_add(self.populate, priority=GLib.PRIORITY_LOW)
+        return False
+
+    def populate(self):
+        # render the view of the last run right away if the frames file
+        #  has not changed since, the load below then reconciles it with
+        #  the actual frames in the background
+        view = self.session.load_snapshot()
+        if view is not None and view[0] == self.view_range():
+            view_days = view[1]
+            self.first_view_source = "snapshot"
+            self.on_view_days_loaded((view_days,
+                                      self.view_search_index(view_days)))
+
         # on first load show watson data
         self.reload_watson_data()
 
+        for widget in (self.reload_button, self.add_button,
+                       self.track_button, self.range_combo,
+                       self.search_entry):
+            widget.set_sensitive(True)
+
         # and start monitoring for changes in Watson state
         #  if user happens to change state through cmdline
-        GLib.timeout_add(5000, self.sync_track_status)
+        self.monitor = FlubberSessionMonitor(self.session,
+                                             self.on_session_changed)
+        # one shot idle callback
+        return False
+
+    def on_destroy(self, window):
+        # stop watching files and timers once the window is gone
+        if self.monitor is not None:
+            self.monitor.cancel()
+        self.loader.cancel()
+        if self.status_tick_source is not None:
+            GLib.source_remove(self.status_tick_source)
+            self.status_tick_source = None
+
+    def on_focus_out(self, window, event):
+        # the user may be heading for a terminal to run watson, which
+        #  knows nothing of our journal. Nothing to do until populated.
+        if self.monitor is not None:
+            self.saver.compact_soon()
+        return False
+
+    def on_session_changed(self, frames_changed, state_changed):
+        # Watson files were changed by someone else (e.g. the cmdline)
+        if frames_changed:
+            # this also syncs track status
+            self.reload_watson_data()
+        elif state_changed:
+            self.sync_track_status()
+
+    def on_status_tick(self):
+        # refresh the humanized start time of the running project,
+        #  sync_track_status reschedules us if still needed
+        self.status_tick_source = None
+        # the monitor tells when the state file changes, no need to look
+        #  at the files every tick
+        self.sync_track_status(refresh=False)
+        return False
 
     def on_link_clicked(self, label, uri):
         if uri == 'start':
@@ -172,37 +382,15 @@ class FlubberAppWindow(Gtk.ApplicationWindow):
         msg = "Do you really want to remove selected frame(s)?"
         response = flubber_confirm_dialog(self, title, msg)
         if response == Gtk.ResponseType.YES:
-            # delete it from Watson db
-            wat = Watson()
-            # keep record of deleted frames
-            deleted_frames = list()
-            # go through the model and remove all selected frames
-            for row in self.store:
-                # get the iter associated with the path
-                piter = self.store.get_iter(row.path)
-                # get the iter associated with its first child
-                citer = self.store.iter_children(piter)
-                while citer is not None:
-                    if self.store[citer][4]:
-                        frame = get_frame_from_argument(wat,
-                                                        self.store[citer][0])
-                        del wat.frames[frame.id]
-                        deleted_frames.append(frame.id)
-                    citer = self.store.iter_next(citer)
+            # delete all selected frames from Watson db in one go,
+            #  frames already removed elsewhere are simply skipped
+            deleted_frames = self.session.delete_frames(self.selected_frames)
+            self.selected_frames.clear()
+            self.update_history_actions()
             # save watson state and inform user
             if len(deleted_frames) > 0:
-                try:
-                    # save the state files
-                    wat.save()
-                except Exception as e:
-                    # oh no, error while saving state files
-                    msg = "Error while saving Watson state files"
-                    flubber_error_dialog(self, msg, str(e))
-                    # sync view with watson state
-                    self.reload_watson_data()
-                    # return here so that we dont process this
-                    #  event any further
-                    return
+                # save the state files in the background
+                self.saver.request()
 
                 flubber_info_dialog(self,
                                     "Frames deleted",
@@ -216,41 +404,352 @@ class FlubberAppWindow(Gtk.ApplicationWindow):
                                     "No frames deleted",
                                     msg)
 
+    def on_edit_button_clicked(self, button):
+        # user wants to change all selected frames at once
+        if len(self.selected_frames) == 0:
+            flubber_info_dialog(self, "No frames edited",
+                                "No frames selected.")
+            return
+
+        from flubber.dialogs import FlubberBulkEditFrameDialog
+        dia = FlubberBulkEditFrameDialog(self, len(self.selected_frames))
+        response = dia.run()
+        if response == Gtk.ResponseType.OK:
+            # apply changes to all frames in memory and save only once
+            shift = datetime.timedelta(minutes=dia.shift_minutes)
+            edited = self.session.edit_frames(self.selected_frames,
+                                              project=dia.project,
+                                              add_tags=dia.add_tags,
+                                              remove_tags=dia.remove_tags,
+                                              shift=shift)
+            self.update_history_actions()
+            dia.destroy()
+            # save the state files in the background
+            self.saver.request()
+
+            flubber_info_dialog(self, "Frames edited",
+                                "{} frame(s) were edited.".format(
+                                    len(edited)))
+
+            # update main view with watson state
+            self.reload_watson_data()
+        else:
+            # close dialog if it was cancelled
+            dia.destroy()
+
+    def on_undo(self, action, param):
+        self.apply_history_change(self.session.undo())
+
+    def on_redo(self, action, param):
+        self.apply_history_change(self.session.redo())
+
+    def apply_history_change(self, change):
+        # show the result of undo or redo and save it, the frames are
+        #  already changed in memory so nothing needs to be read again
+        self.update_history_actions()
+        if change is None:
+            return
+        label, deltas = change
+        # save the state files in the background
+        self.saver.request()
+        self.apply_view_deltas(deltas)
+
+    def update_history_actions(self):
+        history = self.session.history
+        self.undo_action.set_enabled(history.undo_label is not None)
+        self.redo_action.set_enabled(history.redo_label is not None)
+        self.undo_button.set_tooltip_text(
+            "Undo {}".format(history.undo_label)
+            if history.undo_label else None)
+        self.redo_button.set_tooltip_text(
+            "Redo {}".format(history.redo_label)
+            if history.redo_label else None)
+
+    def apply_view_deltas(self, deltas):
+        # update the view for frames changed in memory given as (frame id,
+        #  frame before, frame after) deltas. Only the days of the changed
+        #  frames are touched, the rest of the view is taken as it is.
+        if self.loaded_range != self.view_range() or \
+                self.spinner.props.active:
+            # a load is on its way and may not include the change
+            self.reload_watson_data()
+            return
+
+        start, stop = self.loaded_range
+        project_names = self.session.project_names
+        tag_names = self.session.tag_names
+        days = OrderedDict((day_key, OrderedDict(rows))
+                           for day_key, rows in self.view_days.items())
+        changed_days = set()
+        for frame_id, before, after in deltas:
+            if before is not None:
+                day_key = before.start.date().isoformat()
+                if frame_id in days.get(day_key, ()):
+                    del days[day_key][frame_id]
+                    changed_days.add(day_key)
+            if after is None:
+                continue
+            frame_start = after.start.int_timestamp
+            if (start is not None and frame_start < start) or \
+                    (stop is not None and frame_start >= stop):
+                # outside of the range shown
+                continue
+            frame_stop = after.stop.int_timestamp
+            day_key = after.start.date().isoformat()
+            days.setdefault(day_key, OrderedDict())[frame_id] = (
+                frame_start, frame_stop, frame_stop - frame_start,
+                project_names.intern(after.project),
+                tuple(tag_names.intern(tag) for tag in after.tags))
+            changed_days.add(day_key)
+
+        # days newest first and frames in order of start, as loaded
+        view_days = OrderedDict()
+        for day_key in sorted(days, reverse=True):
+            rows = days[day_key]
+            if not rows:
+                continue
+            daily_total = None
+            if day_key in changed_days:
+                rows = OrderedDict(sorted(rows.items(),
+                                          key=lambda item: item[1][0]))
+                daily_total = sum(values[2] for values in rows.values())
+            day_start = local_day_start(next(iter(rows.values()))[0])
+            view_days[day_key] = (day_start, rows, daily_total)
+        self.on_view_days_loaded((view_days,
+                                  self.view_search_index(view_days)))
+
+    def create_report_pane(self):
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+        box.set_border_width(10)
+
+        # what to total the frames of the range by
+        self.report_combo = Gtk.ComboBoxText()
+        for grouping, label in self.report_groupings:
+            self.report_combo.append(grouping, label)
+        self.report_combo.set_active_id(FlubberReport.PROJECT)
+        self.report_combo.connect("changed", self.on_report_combo_changed)
+        box.pack_start(self.report_combo, False, False, 0)
+
+        # rows are the name of the group and its total in seconds
+        self.report_store = Gtk.ListStore(str, GObject.TYPE_INT64)
+        report_view = Gtk.TreeView(model=self.report_store)
+        column_name = Gtk.TreeViewColumn("Name", Gtk.CellRendererText(),
+                                         text=0)
+        column_name.set_expand(True)
+        report_view.append_column(column_name)
+        rendered_total = Gtk.CellRendererText()
+        column_total = Gtk.TreeViewColumn("Duration", rendered_total)
+        column_total.set_cell_data_func(rendered_total,
+                                        self.render_report_total_cell)
+        report_view.append_column(column_total)
+        scrollable_report = Gtk.ScrolledWindow()
+        scrollable_report.set_vexpand(True)
+        scrollable_report.add(report_view)
+        box.pack_start(scrollable_report, True, True, 0)
+
+        # total of the whole range
+        self.report_total_label = Gtk.Label()
+        self.report_total_label.set_halign(Gtk.Align.END)
+        box.pack_start(self.report_total_label, False, False, 0)
+        return box
+
+    def render_report_total_cell(self, column, cell, model, titer, data):
+        cell.set_property("text", format_duration(model[titer][1]))
+
+    def on_stack_page_changed(self, stack, pspec):
+        self.update_report()
+
+    def on_report_combo_changed(self, combo):
+        self.update_report()
+
+    def update_report(self):
+        # totals are only computed while the report is shown, cached
+        #  totals make this cheap when nothing has changed
+        if self.stack.get_visible_child_name() != "report":
+            return
+        start, stop = self.view_range()
+        grouping = self.report_combo.get_active_id()
+        try:
+            totals = self.session.report_totals(grouping, start, stop)
+            # the sum of project totals is the total of the range as
+            #  every frame has exactly one project
+            range_total = sum(
+                seconds for project, seconds in self.session.report_totals(
+                    FlubberReport.PROJECT, start, stop))
+        except Exception as e:
+            flubber_error_dialog(self, "Error while loading Watson frames",
+                                 str(e))
+            return
+
+        projects = self.session.project_names.names
+        tags = self.session.tag_names.names
+        self.report_store.clear()
+        for key, seconds in totals:
+            if grouping == FlubberReport.PROJECT:
+                name = projects[key]
+            elif grouping == FlubberReport.TAG:
+                name = tags[key]
+            else:
+                project, tag = key
+                name = projects[project] + beautify_tags(
+                    [tags[tag]] if tag != FlubberReport.NO_TAG else [])
+            self.report_store.append([name, seconds])
+        self.report_total_label.set_text(
+            "Total {}".format(format_duration(range_total)))
+
+    def on_search_entry_changed(self, entry):
+        self.update_search_matches()
+        # a day is selected when its visible frames are, which depends
+        #  on the search
+        piter = self.store.get_iter_first()
+        while piter is not None:
+            self.store[piter][4] = self.is_day_selected(self.store[piter][5])
+            piter = self.store.iter_next(piter)
+        self.filter.refilter()
+
+    def update_search_matches(self):
+        # frames and days matching the search, looked up from the search
+        #  index so that is_row_visible only has to test set membership
+        query = self.search_entry.get_text()
+        if self.search_index is None:
+            self.search_matches = None
+        else:
+            self.search_matches = self.search_index.match(query)
+
+    def is_row_visible(self, model, titer, data):
+        if self.search_matches is None:
+            return True
+        key = model[titer][5]
+        if key is None:
+            # placeholder keeps collapsed days expandable
+            return True
+        day_keys, frame_ids = self.search_matches
+        if model.iter_parent(titer) is None:
+            # days stay visible if any of their frames match
+            return key in day_keys
+        return key in frame_ids
+
+    def visible_frames(self, day_key):
+        # ids of the frames of a day matching the search
+        frame_ids = self.view_days[day_key]
+        if self.search_matches is None:
+            return frame_ids
+        return [frame_id for frame_id in frame_ids
+                if frame_id in self.search_matches[1]]
+
     def on_cell_toggled(self, widget, path):
-        # the boolean value of the selected row
-        current_value = self.store[path][4]
-        # change the boolean value of the selected row in the model
-        self.store[path][4] = not current_value
-        # new current value!
-        current_value = not current_value
-        # if length of the path is 1 (that is, if we are selecting an day)
-        if len(path) == 1:
-            # get the iter associated with the path
-            piter = self.store.get_iter(path)
-            # get the iter associated with its first child
+        citer = self.filter.convert_iter_to_child_iter(
+            self.filter.get_iter(path))
+        # new value for the selected row
+        current_value = not self.store[citer][4]
+        piter = self.store.iter_parent(citer)
+        # if the row has no parent we are selecting a day
+        if piter is None:
+            self.select_day(citer, current_value)
+        # the row is a project frame
+        else:
+            frame_id = self.store[citer][5]
+            self.store[citer][4] = current_value
+            if current_value:
+                self.selected_frames.add(frame_id)
+            else:
+                self.selected_frames.discard(frame_id)
+            # if all frames are selected, the day as well is selected;
+            #  otherwise it is not
+            self.store[piter][4] = self.is_day_selected(self.store[piter][5])
+
+    def select_day(self, piter, value):
+        # change the selection of the day and all of its frames,
+        #  including the ones that have no rows yet
+        #  frames hidden by the search are left alone
+        self.store[piter][4] = value
+        frame_ids = self.visible_frames(self.store[piter][5])
+        if value:
+            self.selected_frames.update(frame_ids)
+        else:
+            self.selected_frames.difference_update(frame_ids)
+        if self.store[piter][5] in self.populated_days:
             citer = self.store.iter_children(piter)
-            # while there are children, change the state of their boolean value
-            # to the value of the day
             while citer is not None:
-                self.store[citer][4] = current_value
+                self.store[citer][4] = \
+                    self.store[citer][5] in self.selected_frames
                 citer = self.store.iter_next(citer)
-        # if the length of the path is not 1 (that is, if we are selecting a
-        # project frame)
-        elif len(path) != 1:
-            # get the first child of the parent of the day (the first frame of
-            # the day)
-            citer = self.store.get_iter(path)
-            piter = self.store.iter_parent(citer)
+
+    def is_day_selected(self, day_key):
+        # day is selected only if all of its visible frames are
+        return all(frame_id in self.selected_frames
+                   for frame_id in self.visible_frames(day_key))
+
+    def on_view_test_expand_row(self, treeview, piter, path):
+        # day is about to be expanded, replace the placeholder with
+        #  the actual frame rows
+        piter = self.filter.convert_iter_to_child_iter(piter)
+        day_key = self.store[piter][5]
+        if day_key not in self.populated_days:
+            placeholder = self.store.iter_children(piter)
+            for frame_id, values in self.view_days[day_key].items():
+                self.store.append(piter, self.frame_row(frame_id, values))
+            if placeholder is not None:
+                self.store.remove(placeholder)
+            self.populated_days.add(day_key)
+        # returning False allows the expansion
+        return False
+
+    def on_view_row_collapsed(self, treeview, piter, path):
+        # release the frame rows of a collapsed day, only a placeholder
+        #  child is needed to keep the day expandable
+        piter = self.filter.convert_iter_to_child_iter(piter)
+        day_key = self.store[piter][5]
+        if day_key in self.populated_days:
+            self.populated_days.discard(day_key)
+            self.store.append(piter, self.placeholder_row())
             citer = self.store.iter_children(piter)
-            # check if all the children are selected
-            all_selected = True
-            while citer is not None:
-                if not self.store[citer][4]:
-                    all_selected = False
-                    break
-                citer = self.store.iter_next(citer)
-            # if they do, the day as well is selected; otherwise it is not
-            self.store[piter][4] = all_selected
+            while self.store[citer][5] is not None:
+                self.store.remove(citer)
+                citer = self.store.iter_children(piter)
+
+    def frame_row(self, frame_id, values):
+        start, stop, duration, project, tags = values
+        return [start, stop, duration, project,
+                frame_id in self.selected_frames, frame_id, tags]
+
+    def placeholder_row(self):
+        return [0, 0, 0, -1, False, None, ()]
+
+    def render_day_cell(self, column, cell, model, titer, data):
+        row = model[titer]
+        if row[5] is None:
+            # placeholder of a collapsed day
+            text = None
+        elif row[3] == -1:
+            text = format_day(row[0])
+        else:
+            # Watson uses in its TUI seven char length IDs; do the same
+            text = row[5][:7]
+        cell.set_property("text", text)
+
+    def render_project_cell(self, column, cell, model, titer, data):
+        project = model[titer][3]
+        cell.set_property(
+            "text",
+            self.session.project_names.names[project]
+            if project != -1 else None)
+
+    def render_tags_cell(self, column, cell, model, titer, data):
+        names = self.session.tag_names.names
+        cell.set_property(
+            "text", ', '.join(names[tag] for tag in model[titer][6]))
+
+    def render_duration_cell(self, column, cell, model, titer, data):
+        row = model[titer]
+        if row[5] is None:
+            text = None
+        elif row[3] == -1:
+            # day total
+            text = format_duration(row[2])
+        else:
+            text = format_clock(row[0], row[1])
+        cell.set_property("text", text)
 
     def on_view_row_activated(self, treeview, treepath, column):
         # user double clicked a row on the tree
@@ -259,9 +758,10 @@ class FlubberAppWindow(Gtk.ApplicationWindow):
         if ":" in str(treepath):
             model, treeiter = treeview.get_selection().get_selected()
             if treeiter is not None:
-                wat = Watson()
-                frame = get_frame_from_argument(wat, model[treeiter][0])
+                # hidden column holds the full frame id
+                frame = self.session.find_frame(model[treeiter][5])
                 # edit frame in a dialog
+                from flubber.dialogs import FlubberEditFrameDialog
                 dia = FlubberEditFrameDialog(self, frame)
                 response = dia.run()
                 if response == Gtk.ResponseType.OK:
@@ -273,28 +773,19 @@ class FlubberAppWindow(Gtk.ApplicationWindow):
                     start_date = dia.parsed_start_datetime
                     end_date = dia.parsed_end_datetime
                     # update frame and do watson save
-                    wat.frames[frame.id] = (project,
-                                            start_date,
-                                            end_date,
-                                            selected_tags)
+                    self.session.update_frame(frame.id,
+                                              project,
+                                              start_date,
+                                              end_date,
+                                              selected_tags)
+                    self.update_history_actions()
                     message = "Edited project {}{}, from {} to {}.".format(
                                 project,
                                 beautify_tags(selected_tags),
                                 start_date.humanize(),
                                 end_date.humanize())
-                    try:
-                        # save the state files
-                        wat.save()
-                    except Exception as e:
-                        dia.destroy()
-                        # oh no, error while saving state files
-                        msg = "Error while saving Watson state files"
-                        flubber_error_dialog(self, msg, str(e))
-                        # sync view with watson state
-                        self.reload_watson_data()
-                        # return here so that we dont process
-                        #  this event any further
-                        return
+                    # save the state files in the background
+                    self.saver.request()
 
                     # show user info about the job just stopped
                     flubber_info_dialog(self, "Project frame edited", message)
@@ -307,7 +798,7 @@ class FlubberAppWindow(Gtk.ApplicationWindow):
                 dia.destroy()
 
     def on_track_switch_clicked(self, switch, gparam):
-        wat = Watson()
+        wat = self.session.watson
         if switch.get_active():
             # we are stopping a running watson job
             if not wat.is_started:
@@ -321,23 +812,13 @@ class FlubberAppWindow(Gtk.ApplicationWindow):
                 # return here so that main gui is again active
                 return
             # stop the job
-            frame = wat.stop()
+            frame = self.session.stop()
             message = "Stopped project {}{}, started {}.".format(
                         frame.project,
                         beautify_tags(frame.tags),
                         frame.start.humanize())
-            try:
-                # save the state files
-                wat.save()
-            except Exception as e:
-                # oh no, error while saving state files
-                flubber_error_dialog(self,
-                                     "Error while saving Watson state files",
-                                     str(e))
-                # sync view with watson state
-                self.reload_watson_data()
-                # return here so that we dont process this event any further
-                return
+            # save the state files in the background
+            self.saver.request()
 
             # show user info about the job just stopped
             flubber_info_dialog(self, "Project stopped", message)
@@ -347,6 +828,7 @@ class FlubberAppWindow(Gtk.ApplicationWindow):
         else:
             # we want to start a new watson run.
             # present dialog and verify data
+            from flubber.dialogs import FlubberStartFrameDialog
             dia = FlubberStartFrameDialog(self)
             response = dia.run()
             if response == Gtk.ResponseType.OK:
@@ -356,26 +838,14 @@ class FlubberAppWindow(Gtk.ApplicationWindow):
                 [selected_tags.append(row[0])
                     for row in dia.selected_tag_store]
                 # start new watson entry
-                current = wat.start(project, selected_tags, restart=False)
+                current = self.session.start(project, selected_tags)
                 message = "Starting project {}{}, started {}.".format(
                             project,
                             beautify_tags(selected_tags),
                             current["start"].humanize())
 
-                try:
-                    # save the state files
-                    wat.save()
-                except Exception as e:
-                    dia.destroy()
-                    # oh no, error while saving state files
-                    msg = "Error while saving Watson state files"
-                    flubber_error_dialog(self, msg, str(e))
-                    # sync view with watson state
-                    self.reload_watson_data()
-
-                    # return here so that we dont process
-                    #  this event any further
-                    return
+                # save the state files in the background
+                self.saver.request()
 
                 # show user info about the added job
                 flubber_info_dialog(self, "Frame started", message)
@@ -387,6 +857,7 @@ class FlubberAppWindow(Gtk.ApplicationWindow):
             dia.destroy()
 
     def on_add_button_clicked(self, button):
+        from flubber.dialogs import FlubberAddFrameDialog
         dia = FlubberAddFrameDialog(self)
         response = dia.run()
 
@@ -399,29 +870,17 @@ class FlubberAppWindow(Gtk.ApplicationWindow):
             [selected_tags.append(row[0])
                 for row in dia.selected_tag_store]
             # save frame via watson, first validate values in the Add dialog
-            wat = Watson()
-            frame = wat.add(project=project,
-                            tags=selected_tags,
-                            from_date=start_date,
-                            to_date=end_date)
+            frame = self.session.add_frame(project,
+                                           start_date,
+                                           end_date,
+                                           selected_tags)
             message = "Adding project {}{}, started {} and stopped {}.".format(
                         frame.project,
                         beautify_tags(frame.tags),
                         frame.start.humanize(),
                         frame.stop.humanize())
-            try:
-                # save the state files
-                wat.save()
-            except Exception as e:
-                dia.destroy()
-                # oh no, error while saving state files
-                flubber_error_dialog(self,
-                                     "Error while saving Watson state files",
-                                     str(e))
-                # sync view with watson state
-                self.reload_watson_data()
-                # return here so that we dont process this event any further
-                return
+            # save the state files in the background
+            self.saver.request()
 
             # show user info about the added job
             flubber_info_dialog(self, "Frame added", message)
@@ -439,52 +898,181 @@ class FlubberAppWindow(Gtk.ApplicationWindow):
             self.maximize()
         else:
             self.unmaximize()
-        # also refresh data while we are at it
-        self.reload_watson_data()
+        # also refresh data while we are at it, unless it is yet to be
+        #  loaded in the first place
+        if self.monitor is not None:
+            self.reload_watson_data()
 
     def on_reload_button_clicked(self, button):
         # update model
         self.reload_watson_data()
 
+    def on_range_combo_changed(self, combo):
+        period = combo.get_active_id()
+        if period == "custom":
+            import arrow
+            from flubber.dialogs import FlubberRangeDialog
+            start, stop = self.view_range()
+            if start is None:
+                start = arrow.now().floor('day').int_timestamp
+            if stop is None:
+                stop = arrow.now().ceil('day').int_timestamp + 1
+            dia = FlubberRangeDialog(
+                self,
+                self.format_range_time(start),
+                self.format_range_time(stop))
+            response = dia.run()
+            if response == Gtk.ResponseType.OK:
+                self.custom_range = (
+                    dia.parsed_start_datetime.int_timestamp,
+                    dia.parsed_end_datetime.int_timestamp)
+            dia.destroy()
+            if response != Gtk.ResponseType.OK:
+                # keep showing the previous range, emits changed again
+                combo.set_active_id(self.view_period)
+                return
+        elif period == self.view_period:
+            return
+        self.view_period = period
+        self.reload_watson_data()
+
+    def format_range_time(self, timestamp):
+        import arrow
+        return "{:YYYY-MM-DD HH:mm}".format(
+            arrow.Arrow.fromtimestamp(timestamp, local_tz))
+
+    def view_range(self):
+        # [start, stop) epochs of the frames to show, None for open ends.
+        #  Periods are evaluated on every load so that the view moves on
+        #  to the next day, week or month by itself.
+        if self.view_period == "all":
+            return None, None
+        if self.view_period == "custom":
+            return self.custom_range
+        return local_period(self.view_period)
+
+    @timed("reload_watson_data")
     def reload_watson_data(self):
-        # as a test show frames from Watson
-        wat = Watson()
-        frames_by_day = sorted_groupby(wat.frames.filter(
-            span=wat.frames.span(arrow.get("0"), arrow.now())),
-            operator.attrgetter('day'), reverse=True
-            )
-
-        # clear the store for new appends
-        self.store.clear()
-        # loop through frames and populate the model
-        for i, (day, frames) in enumerate(frames_by_day):
-            # convert itertools grouper object into list first
-            #  https://stackoverflow.com/questions/44490079/how-to-turn-an-itertools-grouper-object-into-a-list#44490269
-            frames = list(frames)
-            day = "{:dddd DD MMMM YYYY}".format(day)
-            daily_total = format_timedelta(reduce(
-                operator.add,
-                (frame.stop - frame.start for frame in frames)
-            ))
-            # piter refers to branch, use it to add leaf later (see below)
-            #  all other entries are None, including top branch as we have none
-            piter = self.store.append(None,
-                                      [day, None, daily_total, None, False])
-            for frame in frames:
-                tags = ', '.join(frame.tags)
-                # here under branch (piter) we add a leaf
-                #  see TreeStore definition above for field count
-                # Watson uses in its TUI seven char length IDs; do the same
-                clock_text = '{:HH:mm} to {:HH:mm} ({})'.format(
-                                frame.start,
-                                frame.stop,
-                                format_timedelta(frame.stop - frame.start))
-                self.store.append(piter,
-                                  [frame.id[:7],
-                                   frame.project,
-                                   clock_text,
-                                   tags,
-                                   False])
+        # parsing and grouping frames happens on a worker thread so that
+        #  the window stays responsive, a newer reload cancels older ones
+        self.spinner.start()
+        start, stop = self.view_range()
+        self.loader.load(functools.partial(self.load_view_days,
+                                           start=start, stop=stop),
+                         self.on_view_days_loaded,
+                         self.on_view_days_failed)
+
+    @timed("reload_watson_data: load")
+    def load_view_days(self, ticket, start=None, stop=None):
+        # runs on a worker thread, must not touch any widgets. Only frames
+        #  starting within [start, stop) are shown.
+        # only frames from start on are read from disk, open ended so that
+        #  the loaded window stays valid as time goes by and ranges within
+        #  it are served from the index without reading again
+        index = self.session.frame_index(start)
+        ticket.check()
+        # a bisect on the sorted starts, the cost depends on the number
+        #  of frames shown and not on the whole history
+        lo, hi = index.range(start, stop)
+
+        # the view as it is now, only replaced on the main loop by the
+        #  latest load so it is safe to read here
+        return group_view_days(index, lo, hi, self.view_days, ticket.check)
+
+    def view_search_index(self, view_days):
+        # search index of view days not coming from load_view_days
+        search_index = FlubberSearchIndex(self.session.project_names.names,
+                                          self.session.tag_names.names)
+        for day_key, (day_start, rows, daily_total) in view_days.items():
+            for frame_id, (start, stop, duration, project, tags) in \
+                    rows.items():
+                search_index.add(day_key, frame_id, project, tags)
+        return search_index
+
+    def snapshot_view(self):
+        # the view as shown in the form load_view_days returns it, with
+        #  the range it was loaded for, None if nothing was loaded
+        if self.loaded_range is None:
+            return None
+        view_days = OrderedDict()
+        piter = self.store.get_iter_first()
+        while piter is not None:
+            day_start, daily_total, day_key = (self.store[piter][0],
+                                               self.store[piter][2],
+                                               self.store[piter][5])
+            view_days[day_key] = (day_start, self.view_days[day_key],
+                                  daily_total)
+            piter = self.store.iter_next(piter)
+        return self.loaded_range, view_days
+
+    def on_view_days_failed(self, error):
+        self.spinner.stop()
+        flubber_error_dialog(self, "Error while loading Watson frames",
+                             str(error))
+
+    @timed("reload_watson_data: view")
+    def on_view_days_loaded(self, result):
+        # back on the main loop with the result of the latest load
+        self.spinner.stop()
+        view_days, self.search_index = result
+        if self.first_view_source is None:
+            self.first_view_source = "frames file"
+        self.loaded_range = self.view_range()
+        # match the search against the new frames before touching the
+        #  store, the filter evaluates inserted rows right away
+        self.update_search_matches()
+
+        # forget selection of frames that no longer exist
+        self.selected_frames.intersection_update(
+            frame_id
+            for day_start, rows, daily_total in view_days.values()
+            for frame_id in rows)
+
+        # instead of clearing the store only touch the rows that differ
+        #  from what is shown, this keeps expansion, scroll and selection
+        #  state intact. First drop the days that are gone altogether.
+        piter = self.store.get_iter_first()
+        day_iters = dict()
+        removed_days = list()
+        for day_key in self.view_days:
+            if day_key in view_days:
+                day_iters[day_key] = piter
+            else:
+                removed_days.append(piter)
+                self.populated_days.discard(day_key)
+            piter = self.store.iter_next(piter)
+        # TreeStore iters persist so they stay valid while removing others
+        for piter in removed_days:
+            self.store.remove(piter)
+
+        # days never change their order so we can merge the wanted days
+        #  with the remaining rows in a single walk
+        old_view_days = self.view_days
+        self.view_days = OrderedDict(
+            (day_key, rows)
+            for day_key, (day_start, rows, daily_total) in view_days.items())
+        piter = self.store.get_iter_first()
+        for day_key, (day_start, rows, daily_total) in view_days.items():
+            if day_key in day_iters:
+                if day_key in self.populated_days:
+                    touched = self.reconcile_day_rows(
+                        piter, old_view_days[day_key], rows)
+                else:
+                    # collapsed days have no frame rows to update
+                    touched = old_view_days[day_key] != rows
+                if touched:
+                    # only recompute totals of days that actually changed
+                    self.store[piter][2] = daily_total
+                    self.store[piter][4] = self.is_day_selected(day_key)
+                piter = self.store.iter_next(piter)
+            else:
+                # new days start collapsed with a placeholder child,
+                #  all other entries are None as top branch has none
+                new_piter = self.store.insert_before(
+                    None, piter,
+                    [day_start, 0, daily_total, -1,
+                     self.is_day_selected(day_key), day_key, ()])
+                self.store.append(new_piter, self.placeholder_row())
 
         if len(self.store) > 0:
             if self.welcome_enabled:
@@ -492,35 +1080,106 @@ class FlubberAppWindow(Gtk.ApplicationWindow):
                 self.remove(self.welcome_label)
                 # show the main grid
                 self.add(self.grid)
-            # update treeview with the new model
-            self.view.set_model(self.store)
-            # enable delete button
+                self.welcome_enabled = False
+            # enable delete and edit buttons
             self.del_button.set_sensitive(True)
+            self.edit_button.set_sensitive(True)
         else:
-            # show welcome message and hide the main grid
-            self.remove(self.grid)
-            self.add(self.welcome_label)
-            self.welcome_enabled = True
-            # disable delete button
-            self.del_button.set_sensitive(False)
+            if self.view_period == "all":
+                welcome_msg = "No frames yet."
+            else:
+                welcome_msg = "No frames in this range."
+            welcome_msg += (" You can "
+                            "<a href='start'>start/stop tracking</a>"
+                            " a project or <a href='add'>add a "
+                            "existing</a> entry.")
+            self.welcome_label.set_markup(welcome_msg)
+            if not self.welcome_enabled:
+                # show welcome message and hide the main grid
+                self.remove(self.grid)
+                self.add(self.welcome_label)
+                self.welcome_enabled = True
+                # disable delete and edit buttons
+                self.del_button.set_sensitive(False)
+                self.edit_button.set_sensitive(False)
+
+        if self.search_matches is not None:
+            # rows kept from before may have started or stopped matching
+            self.filter.refilter()
+
+        # range or frames may have changed
+        self.update_report()
+
+        app = self.get_application()
+        app.startup_phase(
+            "first view from {}".format(self.first_view_source), once=True)
+        app.startup_done()
 
         self.show_all()
 
         # sync track status too while we are at it
         self.sync_track_status()
 
-    def sync_track_status(self):
-        wat = Watson()
+    def reconcile_day_rows(self, piter, old_rows, new_rows):
+        # update the frame rows under a day branch from old_rows (what is
+        #  shown) to new_rows, both map frame id to row values in display
+        #  order. Returns True if any row under the day was touched.
+        touched = False
+        kept = [frame_id for frame_id in old_rows if frame_id in new_rows]
+        wanted = [frame_id for frame_id in new_rows if frame_id in old_rows]
+        # if an edit moved frames around within the day it is easier to
+        #  insert the moved rows again than to reorder them in place
+        reordered = kept != wanted
+
+        kept_iters = dict()
+        removed = list()
+        citer = self.store.iter_children(piter)
+        for frame_id in old_rows:
+            if reordered or frame_id not in new_rows:
+                removed.append(citer)
+            else:
+                kept_iters[frame_id] = citer
+            citer = self.store.iter_next(citer)
+        for citer in removed:
+            self.store.remove(citer)
+            touched = True
+
+        # walk the remaining rows and the wanted rows side by side
+        citer = self.store.iter_children(piter)
+        for frame_id, values in new_rows.items():
+            if frame_id in kept_iters:
+                if old_rows[frame_id] != values:
+                    # update in place, leaves selection column alone
+                    self.store.set(citer, [0, 1, 2, 3, 6], list(values))
+                    touched = True
+                citer = self.store.iter_next(citer)
+            else:
+                # inserting before None appends to the end of the day
+                self.store.insert_before(piter, citer,
+                                         self.frame_row(frame_id, values))
+                touched = True
+
+        return touched
+
+    @timed("sync_track_status")
+    def sync_track_status(self, refresh=True):
+        if refresh:
+            self.session.refresh()
+        current = self.session.current
         # check if watson is running and
         #  change toggle button state based on that
-        if wat.is_started:
+        if current:
             self.track_button.set_active(True)
             status_text = "{}{} {}".format(
-                            wat.current["project"],
-                            beautify_tags(wat.current["tags"]),
-                            wat.current['start'].humanize())
+                            current["project"],
+                            beautify_tags(current["tags"]),
+                            current['start'].humanize())
             # show info in main window
             self.track_status_label.set_text(status_text)
+            # keep the humanized start time fresh while the project runs
+            if self.status_tick_source is None:
+                self.status_tick_source = GLib.timeout_add_seconds(
+                    self.status_tick_interval, self.on_status_tick)
             if not self.notification:
                 # also open a notification to Gnome Shell (or relevant)
                 self.notification = Notify.Notification.new("Running project",
@@ -540,7 +1199,7 @@ class FlubberAppWindow(Gtk.ApplicationWindow):
             if self.notification:
                 self.notification.close()
                 self.notification = None
-
-        # always return true to make
-        #  GLib.timeout_add to reschedule
-        return True
+            # nothing running, no need to refresh status text
+            if self.status_tick_source is not None:
+                GLib.source_remove(self.status_tick_source)
+                self.status_tick_source = None
@@ -0,0 +1,101 @@
+from gi.repository import GLib, Gio, Gtk
+from flubber.dialogs.util import flubber_error_dialog
+from flubber.timing import timings
+
+
+class FlubberPerformanceWindow(Gtk.Window):
+
+    # timings of recent reloads, saves, dialogs and so on, opened from
+    #  the app menu when Flubber feels slow
+
+    # how often to refresh the numbers while shown, in seconds
+    refresh_interval = 2
+
+    def __init__(self, *args, **kwargs):
+        super(Gtk.Window, self).__init__(*args, **kwargs)
+        self.set_default_size(600, 300)
+
+        hb = Gtk.HeaderBar()
+        hb.set_show_close_button(True)
+        hb.props.title = "Performance"
+        self.set_titlebar(hb)
+
+        # button to save the timings as JSON
+        save_button = Gtk.Button()
+        icon = Gio.ThemedIcon(name="document-save")
+        image = Gtk.Image.new_from_gicon(icon, Gtk.IconSize.BUTTON)
+        save_button.add(image)
+        save_button.set_tooltip_text("Save timings as JSON")
+        save_button.connect("clicked", self.on_save_button_clicked)
+        hb.pack_end(save_button)
+
+        # button to forget the timings so far
+        clear_button = Gtk.Button()
+        icon = Gio.ThemedIcon(name="edit-clear")
+        image = Gtk.Image.new_from_gicon(icon, Gtk.IconSize.BUTTON)
+        clear_button.add(image)
+        clear_button.set_tooltip_text("Clear timings")
+        clear_button.connect("clicked", self.on_clear_button_clicked)
+        hb.pack_end(clear_button)
+
+        # rows are the span name, count and p50, p95 and max in seconds
+        self.store = Gtk.ListStore(str, int, float, float, float)
+        view = Gtk.TreeView(model=self.store)
+        column = Gtk.TreeViewColumn("Operation", Gtk.CellRendererText(),
+                                    text=0)
+        column.set_expand(True)
+        view.append_column(column)
+        view.append_column(Gtk.TreeViewColumn(
+            "Count", Gtk.CellRendererText(), text=1))
+        for title, model_column in (("p50", 2), ("p95", 3), ("Max", 4)):
+            renderer = Gtk.CellRendererText()
+            column = Gtk.TreeViewColumn(title, renderer)
+            column.set_cell_data_func(renderer, self.render_seconds_cell,
+                                      model_column)
+            view.append_column(column)
+        scrollable = Gtk.ScrolledWindow()
+        scrollable.add(view)
+        self.add(scrollable)
+
+        self.refresh_source = GLib.timeout_add_seconds(
+            self.refresh_interval, self.refresh)
+        self.connect("destroy", self.on_destroy)
+        self.refresh()
+
+    def render_seconds_cell(self, column, cell, model, titer, model_column):
+        cell.set_property("text", "{:.1f} ms".format(
+            model[titer][model_column] * 1000))
+
+    def refresh(self):
+        self.store.clear()
+        for stats in timings.stats():
+            self.store.append([stats["name"], stats["count"],
+                               stats["p50"], stats["p95"], stats["max"]])
+        # keep the timeout going
+        return True
+
+    def on_destroy(self, window):
+        GLib.source_remove(self.refresh_source)
+
+    def on_clear_button_clicked(self, button):
+        timings.clear()
+        self.refresh()
+
+    def on_save_button_clicked(self, button):
+        dia = Gtk.FileChooserDialog("Save timings", self,
+                                    Gtk.FileChooserAction.SAVE,
+                                    (Gtk.STOCK_CANCEL,
+                                     Gtk.ResponseType.CANCEL,
+                                     Gtk.STOCK_SAVE, Gtk.ResponseType.OK))
+        dia.set_do_overwrite_confirmation(True)
+        dia.set_current_name("flubber-timings.json")
+        response = dia.run()
+        path = dia.get_filename()
+        dia.destroy()
+        if response != Gtk.ResponseType.OK:
+            return
+        try:
+            with open(path, "w") as f:
+                f.write(timings.dump_json())
+        except OSError as e:
+            flubber_error_dialog(self, "Error while saving timings", str(e))
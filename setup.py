@@ -4,6 +4,7 @@
 # name
 APP='flubber'
 
+from glob import glob
 from os.path import join
 
 from setuptools import setup
@@ -42,7 +43,9 @@ setup(
     packages=["flubber", "flubber.dialogs", "flubber.windows"],
     data_files=[
                 ('/usr/share/applications', ['fi.iki.bcow.flubber.desktop']),
-                ('flubber/resources/', ['flubber/resources/menu.xml']),
+                ('flubber/resources/', ['flubber/resources/menu.xml'] +
+                    # compiled by 'make resources'
+                    glob('flubber/resources/*.gresource')),
                 ('', ['LICENSE'])
                ],
     author='Antti Peltonen',
@@ -0,0 +1,106 @@
+import random
+import arrow
+
+from flubber.catalog import FlubberCatalog, completion_tokens
+from flubber.index import FlubberFrameIndex
+
+DAY = 24 * 3600
+NOW = 1500000000
+
+RECORDS = [
+    (NOW - 3 * DAY, NOW - 3 * DAY + 60, "acme-website", "a" * 32,
+     ["web"], None),
+    (NOW - 2 * DAY, NOW - 2 * DAY + 60, "acme-website", "b" * 32,
+     ["web", "review"], None),
+    (NOW - 400 * DAY, NOW - 400 * DAY + 60, "acme-backend", "c" * 32,
+     [], None),
+    (NOW - 401 * DAY, NOW - 401 * DAY + 60, "acme-backend", "d" * 32,
+     [], None),
+    (NOW - 402 * DAY, NOW - 402 * DAY + 60, "acme-backend", "e" * 32,
+     [], None),
+    (NOW - DAY, NOW - DAY + 60, "website", "f" * 32, [], None),
+]
+
+
+class Frame(object):
+
+    def __init__(self, project, stop, tags=()):
+        self.project = project
+        self.stop = arrow.get(stop)
+        self.tags = list(tags)
+
+
+def make_catalog():
+    catalog = FlubberCatalog()
+    catalog.rebuild(FlubberFrameIndex(RECORDS))
+    return catalog
+
+
+def test_rebuild():
+    catalog = make_catalog()
+    assert catalog.names(FlubberCatalog.PROJECT) == \
+        ["acme-backend", "acme-website", "website"]
+    entry = catalog.projects["acme-website"]
+    assert (entry.count, entry.last_used) == (2, NOW - 2 * DAY + 60)
+    assert catalog.tags["web"].count == 2
+    assert catalog.tags["review"].count == 1
+
+
+def test_rebuild_notifies_once():
+    catalog = make_catalog()
+    calls = list()
+    catalog.listeners.append(lambda *args: calls.append(args))
+    catalog.rebuild(FlubberFrameIndex(RECORDS[:1]))
+    assert calls == [(None, None, None)]
+    assert catalog.names(FlubberCatalog.PROJECT) == ["acme-website"]
+
+
+def test_complete_ranking():
+    catalog = make_catalog()
+    # used twice recently beats used three times over a year ago
+    assert catalog.complete(FlubberCatalog.PROJECT, "acme") == \
+        ["acme-website", "acme-backend"]
+    # any word of the name matches, case does not matter
+    assert catalog.complete(FlubberCatalog.PROJECT, "WEB") == \
+        ["acme-website", "website"]
+    assert catalog.complete(FlubberCatalog.PROJECT, "acme", limit=1) == \
+        ["acme-website"]
+    assert catalog.complete(FlubberCatalog.PROJECT, "nope") == []
+
+
+def test_complete_follows_changes():
+    catalog = make_catalog()
+    catalog.complete(FlubberCatalog.PROJECT, "acme")
+    catalog.add_frame(Frame("acme-mobile", NOW))
+    assert "acme-mobile" in catalog.complete(FlubberCatalog.PROJECT,
+                                             "mob")
+    catalog.remove_frame(Frame("website", NOW - DAY + 60))
+    assert catalog.complete(FlubberCatalog.PROJECT, "web") == \
+        ["acme-website"]
+
+
+def test_complete_many_names():
+    # short prefixes match many names and take the other way of ranking
+    rng = random.Random(0)
+    catalog = FlubberCatalog()
+    for i in range(2000):
+        name = "{}-{}".format(rng.choice(["alpha", "beta", "gamma"]), i)
+        for use in range(rng.randint(1, 5)):
+            catalog.add_frame(Frame(name, NOW - rng.randint(0, 400) * DAY))
+        if i == 1000:
+            # the index is kept up to date from here on
+            catalog.complete(FlubberCatalog.PROJECT, "")
+    for name in ("alpha-3", "beta-3", "gamma-3"):
+        catalog.remove_frame(Frame(name, NOW))
+
+    def brute_force(prefix):
+        entries = [entry for name, entry in catalog.projects.items()
+                   if any(token.startswith(prefix)
+                          for token in completion_tokens(name))]
+        entries.sort(key=lambda entry: (-catalog.frecency(entry, NOW),
+                                        entry.name))
+        return [entry.name for entry in entries[:10]]
+
+    for prefix in ("", "a", "al", "gamma", "1", "19", "1999"):
+        assert catalog.complete(FlubberCatalog.PROJECT, prefix) == \
+            brute_force(prefix)
@@ -0,0 +1,84 @@
+import json
+
+from flubber.commands import parse_project_and_tags, run_command
+from flubber.session import FlubberSession
+
+
+def run(session, *args):
+    out = list()
+    err = list()
+    status, changed = run_command(session, list(args), out.append,
+                                  err.append)
+    return status, changed, "\n".join(out), "\n".join(err)
+
+
+def test_parse_project_and_tags():
+    assert parse_project_and_tags(["my", "project", "+a", "b", "+c"]) == \
+        ("my project", ["a b", "c"])
+    assert parse_project_and_tags(["+"]) == ("", [])
+
+
+def test_start_status_stop(config_dir):
+    # like the command line, every command runs in a session of its own
+    def run_fresh(*args):
+        session = FlubberSession(str(config_dir))
+        try:
+            return run(session, *args)
+        finally:
+            session.close()
+
+    def state():
+        return json.loads((config_dir / "state").read_text())
+
+    status, changed, out, err = run_fresh("status")
+    assert (status, changed) == (0, False)
+    assert out == "No project started."
+
+    status, changed, out, err = run_fresh("start", "gamma", "+t")
+    assert (status, changed) == (0, True)
+    assert out.startswith("Starting project gamma [t]")
+    assert state()["project"] == "gamma"
+
+    status, changed, out, err = run_fresh("start", "delta")
+    assert (status, changed) == (1, False)
+    assert err.startswith("Error:")
+
+    status, changed, out, err = run_fresh("stop")
+    assert (status, changed) == (0, True)
+    assert state() == {}
+    frames = FlubberSession(str(config_dir)).watson.frames
+    assert [frame.project for frame in frames] == ["alpha", "beta", "gamma"]
+
+    # nothing is running any more
+    status, changed, out, err = run_fresh("stop")
+    assert status == 1
+    status, changed, out, err = run_fresh("start", "delta")
+    assert status == 0
+
+
+def test_report_json(session):
+    status, changed, out, err = run(session, "report", "--period", "all",
+                                    "--json")
+    assert status == 0
+    report = json.loads(out)
+    assert report["time"] == 3600 + 1800
+    assert [(p["name"], p["time"], p["tags"])
+            for p in report["projects"]] == \
+        [("alpha", 3600, [{"name": "x", "time": 3600}]),
+         ("beta", 1800, [])]
+
+
+def test_bad_arguments(session):
+    status, changed, out, err = run(session, "report", "--period", "year")
+    assert status == 2
+    assert "invalid choice" in err
+
+
+def test_changes_are_saved_with_save(session):
+    saves = list()
+    status, changed = run_command(session, ["start", "gamma"], print, print,
+                                  save=lambda: saves.append(True))
+    assert (status, changed, saves) == (0, True, [True])
+    status, changed = run_command(session, ["status"], print, print,
+                                  save=lambda: saves.append(True))
+    assert (status, changed, saves) == (0, False, [True])
@@ -0,0 +1,58 @@
+import arrow
+
+from flubber.history import FlubberHistory
+from flubber.session import FlubberSession
+
+
+def projects(session):
+    return sorted(frame.project for frame in session.watson.frames)
+
+
+def test_history_stacks():
+    history = FlubberHistory()
+    assert history.undo() is None
+    history.record("first", [("a", 1, 2)])
+    history.record("second", [("a", 2, 3), ("b", None, 4)])
+    assert history.undo() == ("second", [("b", 4, None), ("a", 3, 2)])
+    assert history.redo_label == "second"
+    assert history.undo() == ("first", [("a", 2, 1)])
+    assert history.redo() == ("first", [("a", 1, 2)])
+    # a new change drops what was undone
+    history.record("third", [("c", None, 5)])
+    assert history.redo() is None
+    assert history.undo_label == "third"
+
+
+def test_undo_redo_delete(session):
+    session.delete_frames(["a" * 32, "b" * 32])
+    assert projects(session) == []
+
+    label, deltas = session.undo()
+    assert label == "delete of 2 frame(s)"
+    assert sorted(after.project for frame_id, before, after in deltas) == \
+        ["alpha", "beta"]
+    assert projects(session) == ["alpha", "beta"]
+    # restored frames are the very frames deleted
+    assert session.find_frame("a" * 32).updated_at.int_timestamp == \
+        1500003600
+
+    session.redo()
+    assert projects(session) == []
+    assert session.redo() is None
+
+
+def test_undo_edit_is_saved_once(session):
+    session.edit_frames(["a" * 32], project="gamma")
+    session.update_frame("b" * 32, "delta", arrow.get(1500007200),
+                         arrow.get(1500009000), [])
+    assert projects(session) == ["delta", "gamma"]
+    session.undo()
+    session.undo()
+    assert projects(session) == ["alpha", "beta"]
+    assert session.undo() is None
+
+    # changes and their undoing reach disk in a single write
+    assert session.save() == 1
+    session = FlubberSession(session.config_dir)
+    assert projects(session) == ["alpha", "beta"]
+    assert session.find_frame("a" * 32).tags == ["x"]
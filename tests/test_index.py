@@ -0,0 +1,61 @@
+import datetime
+import pytest
+
+from flubber.index import FlubberFrameIndex, local_period
+
+
+def epoch(*args):
+    return int(datetime.datetime(*args).timestamp())
+
+
+@pytest.mark.parametrize("period,start,stop", [
+    ("day", (2018, 5, 4), (2018, 5, 5)),
+    ("week", (2018, 4, 30), (2018, 5, 7)),
+    ("month", (2018, 5, 1), (2018, 6, 1)),
+])
+def test_local_period(period, start, stop):
+    timestamp = epoch(2018, 5, 4, 13, 37)
+    assert local_period(period, timestamp) == (epoch(*start), epoch(*stop))
+
+
+def test_range():
+    records = [(epoch(2018, 5, day, 10), epoch(2018, 5, day, 11), "p",
+                "{:032x}".format(day), [], None) for day in (3, 1, 2, 4)]
+    index = FlubberFrameIndex(records)
+    lo, hi = index.range(*local_period("day", epoch(2018, 5, 2, 12)))
+    assert index.ids[lo:hi] == ["{:032x}".format(2)]
+    assert index.range() == (0, 4)
+    assert index.find("0" * 31 + "3") == 2
+
+
+def test_days_and_totals():
+    records = [
+        (epoch(2018, 5, 4, 10), epoch(2018, 5, 4, 11), "p", "a" * 32, [],
+         None),
+        (epoch(2018, 5, 4, 23), epoch(2018, 5, 5, 1), "p", "b" * 32, [],
+         None),
+        (epoch(2018, 5, 6, 9), epoch(2018, 5, 6, 9, 30), "p", "c" * 32, [],
+         None),
+    ]
+    index = FlubberFrameIndex(records)
+    # frames belong to the day they start on
+    assert list(index.days()) == [(epoch(2018, 5, 4), 0, 2),
+                                  (epoch(2018, 5, 6), 2, 3)]
+    assert list(index.days(1, 2)) == [(epoch(2018, 5, 4), 1, 2)]
+    assert index.total(0, 2) == 3 * 3600
+    assert index.total(0, 3) == 3 * 3600 + 1800
+    assert index.total(1, 1) == 0
+
+
+def test_covers():
+    index = FlubberFrameIndex([], window=(100, 200))
+    assert index.covers(100, 200)
+    assert index.covers(150, 160)
+    assert not index.covers(50, 150)
+    assert not index.covers(150, 250)
+    assert not index.covers()
+    open_ended = FlubberFrameIndex([], window=(100, None))
+    assert open_ended.covers(150)
+    assert open_ended.covers(150, 1000)
+    assert not open_ended.covers(50)
+    assert FlubberFrameIndex([]).covers()
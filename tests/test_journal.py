@@ -0,0 +1,152 @@
+import json
+import arrow
+
+from flubber.session import FlubberSession
+
+
+def saved_frames(config_dir):
+    return json.loads((config_dir / "frames").read_text())
+
+
+def test_changes_are_journaled(config_dir, session, frames):
+    session.add_frame("gamma", arrow.get(1500010000), arrow.get(1500011000),
+                      [])
+    session.update_frame("a" * 32, "delta", arrow.get(1500000000),
+                         arrow.get(1500003000), [])
+    session.delete_frames(["b" * 32])
+    session.write_files()
+    assert saved_frames(config_dir) == frames
+    assert len((config_dir / "frames.journal").read_text().splitlines()) == 3
+
+
+def test_crash_recovery(config_dir, session):
+    session.delete_frames(["b" * 32])
+    session.add_frame("gamma", arrow.get(1500010000), arrow.get(1500011000),
+                      [])
+    session.write_files()
+    # a crash while appending leaves a partial line behind
+    with open(str(config_dir / "frames.journal"), "a") as f:
+        f.write('["delete", "aaa')
+    # the crashed process let go of the journal lock when it died
+    session.close()
+
+    # the next run folds the journal into the frames file
+    session = FlubberSession(str(config_dir))
+    assert [frame[2] for frame in saved_frames(config_dir)] == \
+        ["alpha", "gamma"]
+    assert not (config_dir / "frames.journal").exists()
+    assert [frame.project for frame in session.watson.frames] == \
+        ["alpha", "gamma"]
+
+
+def test_external_write_keeps_journal(config_dir, session, frames):
+    session.add_frame("gamma", arrow.get(1500010000), arrow.get(1500011000),
+                      [])
+    session.write_files()
+    # watson rewrites the frames file without knowing of the journal
+    external = frames[1:] + [
+        [1500020000, 1500021000, "epsilon", "e" * 32, [], 1500021000]]
+    (config_dir / "frames").write_text(json.dumps(external))
+
+    assert session.refresh()[0]
+    assert [frame.project for frame in session.watson.frames] == \
+        ["beta", "epsilon", "gamma"]
+    session.save()
+    assert [frame[2] for frame in saved_frames(config_dir)] == \
+        ["beta", "epsilon", "gamma"]
+
+
+def test_external_write_while_appending(config_dir, session, frames,
+                                        monkeypatch):
+    session.add_frame("gamma", arrow.get(1500010000), arrow.get(1500011000),
+                      [])
+    append = session._journal.append
+
+    def append_after_external_write(entries):
+        # watson rewrites the frames file and we notice before the
+        #  entries are in the journal
+        (config_dir / "frames").write_text(json.dumps(frames[1:]))
+        session.refresh()
+        assert "gamma" in [frame.project for frame in session.watson.frames]
+        append(entries)
+
+    monkeypatch.setattr(session._journal, "append",
+                        append_after_external_write)
+    session.write_files()
+    monkeypatch.undo()
+
+    assert [frame.project for frame in session.watson.frames] == \
+        ["beta", "gamma"]
+    session.save()
+    assert [frame[2] for frame in saved_frames(config_dir)] == \
+        ["beta", "gamma"]
+    assert not (config_dir / "frames.journal").exists()
+
+
+def test_compaction_skips_frames_written_meanwhile(config_dir, session, frames,
+                                                   monkeypatch):
+    import flubber.session
+
+    session.add_frame("gamma", arrow.get(1500010000), arrow.get(1500011000),
+                      [])
+    write_json_temp = flubber.session.write_json_temp
+
+    def write_after_external_write(path, data):
+        temp_path = write_json_temp(path, data)
+        if path == session._watson.frames_file:
+            (config_dir / "frames").write_text(json.dumps(frames[1:]))
+        return temp_path
+
+    monkeypatch.setattr(flubber.session, "write_json_temp",
+                        write_after_external_write)
+    session.save()
+    monkeypatch.undo()
+
+    # the external frames are kept and the change is still pending
+    assert saved_frames(config_dir) == frames[1:]
+    assert session.needs_compaction
+    session.save()
+    assert [frame[2] for frame in saved_frames(config_dir)] == \
+        ["beta", "gamma"]
+    assert not session.needs_compaction
+
+
+def test_journal_of_another_instance(config_dir, session):
+    # the session of a window
+    session.delete_frames(["b" * 32])
+    session.write_files()
+
+    # a command run while the window is open leaves its journal alone
+    command = FlubberSession(str(config_dir))
+    assert (config_dir / "frames.journal").exists()
+    assert not command.needs_compaction
+    command.add_frame("gamma", arrow.get(1500010000),
+                      arrow.get(1500011000), [])
+    command.write_files()
+    command.close()
+    assert [frame[2] for frame in saved_frames(config_dir)] == \
+        ["alpha", "gamma"]
+    assert (config_dir / "frames.journal").exists()
+
+    # the window replays its journal over the frames written meanwhile
+    assert [frame.project for frame in session.watson.frames] == \
+        ["alpha", "gamma"]
+    session.save()
+    assert not (config_dir / "frames.journal").exists()
+
+
+def test_missing_config_dir(tmp_path):
+    config_dir = tmp_path / "watson"
+    session = FlubberSession(str(config_dir))
+    assert not session.watson.is_started
+    assert len(session.frame_index()) == 0
+    # the first save creates the directory and takes the journal
+    session.add_frame("gamma", arrow.get(1500010000), arrow.get(1500011000),
+                      [])
+    session.save()
+    assert [frame[2] for frame in saved_frames(config_dir)] == ["gamma"]
+    session.add_frame("delta", arrow.get(1500020000), arrow.get(1500021000),
+                      [])
+    session.write_files()
+    assert (config_dir / "frames.journal").exists()
+    session.close()
@@ -0,0 +1,60 @@
+from flubber import monitor
+from flubber.monitor import FlubberSessionMonitor
+
+
+class Session(object):
+
+    config_dir = "/nonexistent"
+    watched_files = ("/nonexistent/frames", "/nonexistent/state")
+
+    def __init__(self):
+        # what the next refresh() calls return
+        self.changes = list()
+
+    def refresh(self):
+        if self.changes:
+            return self.changes.pop(0)
+        return False, False
+
+
+class File(object):
+
+    @staticmethod
+    def new_for_path(path):
+        raise monitor.GLib.Error("no file monitoring here")
+
+
+class Gio(object):
+
+    File = File
+
+
+def test_polling_backs_off(monkeypatch):
+    intervals = list()
+
+    def timeout_add_seconds(interval, callback):
+        intervals.append(interval)
+        return len(intervals)
+    monkeypatch.setattr(monitor, "Gio", Gio)
+    monkeypatch.setattr(monitor.GLib, "timeout_add_seconds",
+                        timeout_add_seconds)
+    monkeypatch.setattr(FlubberSessionMonitor, "poll_max_interval", 8)
+
+    session = Session()
+    calls = list()
+    session_monitor = FlubberSessionMonitor(
+        session, lambda *changed: calls.append(changed))
+    # polling instead
+    assert intervals == [1]
+
+    # nothing changes, polls get further apart up to the maximum
+    for i in range(5):
+        assert session_monitor.on_poll() is False
+    assert intervals == [1, 2, 4, 8, 8, 8]
+    assert calls == []
+
+    # a change is reported and polling speeds up again
+    session.changes.append((True, False))
+    session_monitor.on_poll()
+    assert calls == [(True, False)]
+    assert intervals[-1] == 1
@@ -0,0 +1,37 @@
+import io
+import json
+import pytest
+
+from flubber.reader import iter_json_array, iter_frame_records
+
+FRAMES = [
+    [1500000000, 1500003600, "alpha", "a" * 32, ["x", "y]"], 1500003600],
+    [1400000000, 1400000600, "beta, \"quoted\"", "b" * 32, [], 1400000600],
+    [1600000000, 1600001800, "gamma", "c" * 32, ["z"], 1600001800],
+]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+def test_json_array_chunks(chunk_size):
+    text = json.dumps(FRAMES, indent=1)
+    assert list(iter_json_array(io.StringIO(text), chunk_size)) == FRAMES
+
+
+@pytest.mark.parametrize("text", ["", " [ ] ", "[]"])
+def test_json_array_empty(text):
+    assert list(iter_json_array(io.StringIO(text))) == []
+
+
+@pytest.mark.parametrize("text", ["[[1, 2]", "[[1, 2] [3]]", "{}"])
+def test_json_array_invalid(text):
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(text), 2))
+
+
+def test_frame_records_window(tmp_path):
+    path = tmp_path / "frames"
+    path.write_text(json.dumps(FRAMES))
+    records = list(iter_frame_records(str(path), 1450000000, 1600000000))
+    assert [record[2] for record in records] == ["alpha"]
+    assert len(list(iter_frame_records(str(path)))) == 3
+    assert list(iter_frame_records(str(tmp_path / "missing"))) == []
@@ -0,0 +1,60 @@
+import datetime
+
+from flubber.index import FlubberFrameIndex, FlubberInterner
+from flubber.report import FlubberReport
+
+
+def epoch(*args):
+    return int(datetime.datetime(*args).timestamp())
+
+
+def make_index(records):
+    projects = FlubberInterner()
+    tags = FlubberInterner()
+    for name in ("alpha", "beta"):
+        projects.intern(name)
+    for name in ("x", "y"):
+        tags.intern(name)
+    return FlubberFrameIndex(records, projects, tags)
+
+
+RECORDS = [
+    (epoch(2018, 5, 4, 10), epoch(2018, 5, 4, 11), "alpha", "a" * 32,
+     ["x"], None),
+    (epoch(2018, 5, 4, 12), epoch(2018, 5, 4, 12, 30), "beta", "b" * 32,
+     ["x", "y"], None),
+    (epoch(2018, 5, 5, 9), epoch(2018, 5, 5, 9, 15), "alpha", "c" * 32,
+     [], None),
+]
+
+
+def test_totals():
+    report = FlubberReport()
+    index = make_index(RECORDS)
+    assert report.totals(index, FlubberReport.PROJECT) == [(0, 4500),
+                                                           (1, 1800)]
+    assert report.totals(index, FlubberReport.TAG) == [(0, 5400),
+                                                       (1, 1800)]
+    totals = dict(report.totals(index, FlubberReport.PROJECT_TAG,
+                                epoch(2018, 5, 5), epoch(2018, 5, 6)))
+    assert totals == {(0, FlubberReport.NO_TAG): 900}
+
+
+def test_invalidate_touched_days():
+    report = FlubberReport()
+    index = make_index(RECORDS)
+    may_4 = (epoch(2018, 5, 4), epoch(2018, 5, 5))
+    may_5 = (epoch(2018, 5, 5), epoch(2018, 5, 6))
+    report.totals(index, FlubberReport.PROJECT, *may_4)
+    report.totals(index, FlubberReport.PROJECT, *may_5)
+
+    # frame of the 5th grows by 15 minutes
+    records = RECORDS[:2] + [RECORDS[2][:1] + (epoch(2018, 5, 5, 9, 30),)
+                             + RECORDS[2][2:]]
+    report.invalidate([RECORDS[2][0]])
+    index = make_index(records)
+    assert report.totals(index, FlubberReport.PROJECT, *may_5) == [(0, 1800)]
+    # totals of the 4th were kept
+    assert (FlubberReport.PROJECT, may_4[0]) in report._days
+    assert report.totals(index, FlubberReport.PROJECT) == [(0, 5400),
+                                                           (1, 1800)]
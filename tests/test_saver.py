@@ -0,0 +1,61 @@
+import json
+import time
+import arrow
+from flubber.saver import FlubberSaver
+
+
+def add_frame(session, project):
+    return session.add_frame(project, arrow.get(1500010000),
+                             arrow.get(1500011000), [])
+
+
+def saved_projects(session):
+    with open(session.watson.frames_file) as f:
+        return [record[2] for record in json.load(f)]
+
+
+def test_write_files(session, frames):
+    add_frame(session, "gamma")
+    # only the journal is written
+    assert session.write_files() == 1
+    assert saved_projects(session) == ["alpha", "beta"]
+    assert session.needs_compaction
+
+    assert session.write_files(compact=True) == 1
+    assert saved_projects(session) == ["alpha", "beta", "gamma"]
+    assert not session.needs_compaction
+    # previous version is kept like Watson does
+    with open(session.watson.frames_file + ".bak") as f:
+        assert json.load(f) == frames
+    # nothing changed since, nothing to write
+    assert session.write_files() == 0
+    assert session.write_files(compact=True) == 0
+    # our own write is not mistaken for someone else's
+    assert session.refresh() == (False, False)
+
+
+def test_burst_is_written_once(session):
+    saver = FlubberSaver(session)
+    saver.delay = 60
+    for project in ("gamma", "delta", "epsilon"):
+        add_frame(session, project)
+        saver.request()
+    saver.close()
+    assert (saver.writes, saver.compactions) == (0, 1)
+    assert saved_projects(session) == ["alpha", "beta", "gamma", "delta",
+                                       "epsilon"]
+
+
+def test_worker_writes_and_compacts(session):
+    saver = FlubberSaver(session)
+    saver.delay = 0.01
+    saver.compact_delay = 0.05
+    add_frame(session, "gamma")
+    saver.request()
+    deadline = time.monotonic() + 5
+    while saver.pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert (saver.writes, saver.compactions) == (1, 1)
+    assert saved_projects(session) == ["alpha", "beta", "gamma"]
+    saver.close()
+    assert not session.needs_compaction
@@ -0,0 +1,29 @@
+import pytest
+
+from flubber.search import FlubberSearchIndex
+
+
+@pytest.fixture
+def search_index():
+    index = FlubberSearchIndex(["Flubber", "watson"], ["gui", "Review"])
+    index.add("2018-05-04", "abc123", 0, (0,))
+    index.add("2018-05-04", "abd456", 1, (1,))
+    index.add("2018-05-05", "fed789", 0, (0, 1))
+    return index
+
+
+def test_match_names(search_index):
+    assert search_index.match("flub") == ({"2018-05-04", "2018-05-05"},
+                                          {"abc123", "fed789"})
+    assert search_index.match("+review flubber") == ({"2018-05-05"},
+                                                     {"fed789"})
+
+
+def test_match_ids(search_index):
+    assert search_index.match("ab")[1] == {"abc123", "abd456"}
+    assert search_index.match("abd") == ({"2018-05-04"}, {"abd456"})
+
+
+def test_match_nothing(search_index):
+    assert search_index.match("") is None
+    assert search_index.match("nope") == (set(), set())
@@ -0,0 +1,173 @@
+import os
+import json
+import datetime
+import threading
+
+import flubber.session
+
+
+def lock_is_free(lock):
+    # whether another thread could take the lock right now
+    result = list()
+
+    def try_lock():
+        if lock.acquire(blocking=False):
+            lock.release()
+            result.append(True)
+    thread = threading.Thread(target=try_lock)
+    thread.start()
+    thread.join()
+    return bool(result)
+
+
+def test_frames_are_indexed_without_the_lock(session, monkeypatch):
+    checks = list()
+    iter_frame_records = flubber.session.iter_frame_records
+
+    def checking_iter_frame_records(*args):
+        checks.append(lock_is_free(session.lock))
+        return iter_frame_records(*args)
+    monkeypatch.setattr(flubber.session, "iter_frame_records",
+                        checking_iter_frame_records)
+
+    index = session.frame_index()
+    assert checks == [True]
+    assert index.ids == ["a" * 32, "b" * 32]
+    # kept for the next call
+    assert session.frame_index() is index
+
+
+def test_index_of_changed_frames_is_not_kept(session, monkeypatch):
+    iter_frame_records = flubber.session.iter_frame_records
+
+    def changing_iter_frame_records(*args):
+        # frames change while the index is being built
+        session.delete_frames(["b" * 32])
+        return iter_frame_records(*args)
+    monkeypatch.setattr(flubber.session, "iter_frame_records",
+                        changing_iter_frame_records)
+
+    session.frame_index()
+    assert session.frame_index().ids == ["a" * 32]
+
+
+def test_cached_report_totals_skip_the_index(session, monkeypatch):
+    from flubber.report import FlubberReport
+
+    totals = session.report_totals(FlubberReport.PROJECT)
+    assert totals == [(session.project_names.intern("alpha"), 3600),
+                      (session.project_names.intern("beta"), 1800)]
+
+    def no_frame_index(*args):
+        raise AssertionError("index built for cached totals")
+    monkeypatch.setattr(session, "frame_index", no_frame_index)
+    assert session.report_totals(FlubberReport.PROJECT) == totals
+
+
+def test_edit_frames(session):
+    edited = session.edit_frames(["a" * 32, "b" * 32], add_tags=["y"],
+                                 remove_tags=["x"],
+                                 shift=datetime.timedelta(hours=1))
+    assert [(frame.id, frame.tags) for frame in edited] == \
+        [("a" * 32, ["y"]), ("b" * 32, ["y"])]
+    frames = dict((frame.id, frame) for frame in session.watson.frames)
+    assert frames["a" * 32].start.int_timestamp == 1500003600
+    assert frames["a" * 32].stop.int_timestamp == 1500007200
+    assert frames["b" * 32].project == "beta"
+
+    session.edit_frames(["b" * 32], project="gamma", add_tags=["y", "z"])
+    frames = dict((frame.id, frame) for frame in session.watson.frames)
+    assert (frames["b" * 32].project, frames["b" * 32].tags) == \
+        ("gamma", ["y", "z"])
+    # frames not asked for are left alone
+    assert frames["a" * 32].project == "alpha"
+    # and the index follows the edit
+    index = session.frame_index()
+    i = index.find("b" * 7)
+    assert index.project_names[index.projects[i]] == "gamma"
+    assert index.starts[i] == 1500007200 + 3600
+
+
+def test_file_signature(tmp_path):
+    path = tmp_path / "frames"
+    assert flubber.session.file_signature(str(path)) is None
+    path.write_text("[]")
+    signature = flubber.session.file_signature(str(path))
+    assert flubber.session.file_signature(str(path)) == signature
+    # a save through a temp file and a rename
+    (tmp_path / "frames.tmp").write_text("[]")
+    (tmp_path / "frames.tmp").replace(path)
+    assert flubber.session.file_signature(str(path)) != signature
+
+
+def test_refresh_reads_changed_files(config_dir, session, frames):
+    assert [frame.project for frame in session.watson.frames] == \
+        ["alpha", "beta"]
+    assert session.refresh() == (False, False)
+
+    # another Watson client writes the frames file
+    (config_dir / "frames").write_text(json.dumps(frames[:1]))
+    assert session.refresh() == (True, False)
+    assert [frame.project for frame in session.watson.frames] == ["alpha"]
+    assert session.refresh() == (False, False)
+
+    (config_dir / "state").write_text(json.dumps(
+        {"project": "gamma", "start": 1500010000, "tags": []}))
+    assert session.refresh() == (False, True)
+    assert session.watson.current["project"] == "gamma"
+
+
+def test_invalidate(config_dir, session):
+    assert len(session.watson.frames) == 2
+    # a change the signature cannot see, same size and inode
+    stat = os.stat(str(config_dir / "frames"))
+    text = (config_dir / "frames").read_text().replace("alpha", "omega")
+    with open(str(config_dir / "frames"), "r+") as f:
+        f.write(text)
+    os.utime(str(config_dir / "frames"), ns=(stat.st_atime_ns,
+                                             stat.st_mtime_ns))
+    assert session.refresh() == (False, False)
+    session.invalidate()
+    assert [frame.project for frame in session.watson.frames] == \
+        ["omega", "beta"]
+
+
+def test_current_does_not_look_at_the_files(config_dir, session):
+    session.start("gamma", [])
+    session.save()
+    assert session.current["project"] == "gamma"
+    (config_dir / "state").write_text(json.dumps({}))
+    assert session.current["project"] == "gamma"
+    session.refresh()
+    assert session.current == {}
+
+
+def test_unsaved_state_is_not_dropped(config_dir, session):
+    session.start("gamma", [])
+    # someone else writes the state file before we save
+    (config_dir / "state").write_text(json.dumps({}))
+    assert session.refresh() == (False, True)
+    assert session.current["project"] == "gamma"
+    session.save()
+    assert json.loads((config_dir / "state").read_text())["project"] == \
+        "gamma"
+
+
+def test_find_frame_in_the_view(session, monkeypatch):
+    loads = list()
+    iter_frame_records = flubber.session.iter_frame_records
+
+    def counting_iter_frame_records(*args):
+        loads.append(lock_is_free(session.lock))
+        return iter_frame_records(*args)
+    monkeypatch.setattr(flubber.session, "iter_frame_records",
+                        counting_iter_frame_records)
+
+    # the view shows only the frames from beta on
+    session.frame_index(1500007200)
+    assert loads == [True]
+    assert session.find_frame("b" * 7).project == "beta"
+    assert loads == [True]
+    # frames outside of it need all the frames, indexed without the lock
+    assert session.find_frame("a" * 7).project == "alpha"
+    assert loads == [True, True]
@@ -0,0 +1,47 @@
+import json
+
+from flubber.session import FlubberSession
+
+
+def test_snapshot_round_trip(config_dir):
+    session = FlubberSession(str(config_dir))
+    ids = session.frame_index().ids
+    session.save_snapshot("view")
+
+    session = FlubberSession(str(config_dir))
+    assert session.load_snapshot() == "view"
+    assert session.frame_index().ids == ids
+    assert session.find_frame("a" * 7).project == "alpha"
+
+
+def test_snapshot_outdated(config_dir, frames):
+    FlubberSession(str(config_dir)).save_snapshot("view")
+    (config_dir / "frames").write_text(json.dumps(frames[:1]))
+    session = FlubberSession(str(config_dir))
+    assert session.load_snapshot() is None
+    assert len(session.frame_index()) == 1
+
+
+def test_snapshot_of_empty_index(config_dir):
+    (config_dir / "frames").write_text("[]")
+    session = FlubberSession(str(config_dir))
+    assert len(session.frame_index()) == 0
+    session.save_snapshot("view")
+    assert FlubberSession(str(config_dir)).load_snapshot() == "view"
+
+
+def test_snapshot_keeps_interned_ids(config_dir):
+    session = FlubberSession(str(config_dir))
+    index = session.frame_index()
+    # the view holds project and tag ids of this run
+    session.save_snapshot([index.projects[i] for i in range(len(index))])
+
+    session = FlubberSession(str(config_dir))
+    view = session.load_snapshot()
+    assert [session.project_names.names[project] for project in view] == \
+        ["alpha", "beta"]
+
+    # ids handed out before the snapshot is loaded would not match
+    session = FlubberSession(str(config_dir))
+    session.project_names.intern("gamma")
+    assert session.load_snapshot() is None
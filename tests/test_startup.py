@@ -0,0 +1,16 @@
+import sys
+
+from flubber.startup import FlubberImportTimer
+
+
+def test_import_timer(monkeypatch):
+    monkeypatch.delitem(sys.modules, "colorsys", raising=False)
+    timer = FlubberImportTimer()
+    timer.install()
+    try:
+        import colorsys  # noqa: F401
+        import sys as sys_again  # noqa: F401
+    finally:
+        timer.uninstall()
+    assert [name for depth, name, seconds in timer.slowest()] == \
+        ["colorsys"]
@@ -0,0 +1,41 @@
+import json
+import pytest
+
+from flubber.timing import FlubberTimings, percentile
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile([7], 0.95) == 7
+
+
+def test_ring_buffer_and_stats():
+    timings = FlubberTimings(samples=10)
+    for i in range(1, 21):
+        timings.record("save", i / 1000)
+    (stats,) = timings.stats()
+    # only the last ten are kept, all are counted
+    assert stats["count"] == 20
+    assert stats["p50"] == pytest.approx(0.015)
+    assert stats["max"] == pytest.approx(0.020)
+    dump = json.loads(timings.dump_json())
+    assert len(dump["durations"]["save"]) == 10
+
+
+def test_timed_and_profile(tmp_path):
+    timings = FlubberTimings(profile_dir=str(tmp_path))
+
+    @timings.timed()
+    def work():
+        with timings.span("inner"):
+            return sum(range(1000))
+
+    assert work() == sum(range(1000))
+    assert [stats["name"] for stats in timings.stats()] == \
+        ["inner", "test_timed_and_profile.<locals>.work"]
+    # nested spans are not profiled on their own
+    profiles = [path.name for path in tmp_path.iterdir()]
+    assert len(profiles) == 1
+    assert profiles[0].endswith("work.prof")
@@ -0,0 +1,32 @@
+import pytest
+import arrow
+
+from flubber.util import arrow_parse_datetime, local_tz
+
+
+def test_parse_absolute():
+    date = arrow_parse_datetime("2018-05-04 13:37:42")
+    assert date == arrow.Arrow(2018, 5, 4, 13, 37, 42, tzinfo=local_tz)
+    date = arrow_parse_datetime("2018-05-04 13:37")
+    assert date == arrow.Arrow(2018, 5, 4, 13, 37, tzinfo=local_tz)
+
+
+def test_parse_relative():
+    before = arrow.now()
+    date = arrow_parse_datetime("-1h 30m")
+    assert before.shift(minutes=-91) < date < arrow.now().shift(minutes=-89)
+    date = arrow_parse_datetime("now")
+    assert before <= date <= arrow.now()
+
+
+def test_parse_day_names():
+    date = arrow_parse_datetime("yesterday 09:00")
+    expected = arrow.now().floor('day').shift(days=-1).replace(hour=9)
+    assert date == expected
+
+
+@pytest.mark.parametrize("value", ["", "foo", "2018-02-30 10:00",
+                                   "25:00", "yesterday 9"])
+def test_parse_invalid(value):
+    with pytest.raises(ValueError):
+        arrow_parse_datetime(value)
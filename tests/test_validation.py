@@ -0,0 +1,120 @@
+import time
+import pytest
+
+from flubber.dialogs import validation
+from flubber.dialogs.validation import (
+    FlubberDateRangeValidation, parse_datetime_memoized)
+
+
+def test_relative_dates_are_not_memoized():
+    first, error = parse_datetime_memoized("now")
+    time.sleep(0.01)
+    second, error = parse_datetime_memoized("now")
+    assert error is None
+    assert second > first
+
+
+def test_absolute_dates_are_memoized():
+    assert parse_datetime_memoized("2018-05-04 13:37") is \
+        parse_datetime_memoized("2018-05-04 13:37")
+    date, error = parse_datetime_memoized("tomorrowish")
+    assert date is None and error.startswith("Could not parse")
+
+
+class Entry(object):
+
+    def __init__(self, text=""):
+        self.text = text
+        self.icon = None
+        self.tooltip = None
+        self.icon_changes = 0
+
+    def get_text(self):
+        return self.text
+
+    def set_icon_from_icon_name(self, position, icon):
+        self.icon = icon
+        self.icon_changes += 1
+
+    def set_icon_tooltip_text(self, position, text):
+        self.tooltip = text
+
+
+class Dialog(FlubberDateRangeValidation):
+
+    def __init__(self):
+        self.start_entry = Entry("2018-05-04 10:00")
+        self.end_entry = Entry("2018-05-04 11:00")
+        self.start_date_validated = True
+        self.end_date_validated = True
+        self.validations = 0
+
+    def connect(self, signal, callback):
+        pass
+
+    def self_validate(self):
+        self.validations += 1
+
+    def type(self, entry, text):
+        entry.text = text
+        if entry is self.start_entry:
+            self.on_start_entry_changed(entry)
+        else:
+            self.on_end_entry_changed(entry)
+
+
+@pytest.fixture
+def timeouts(monkeypatch):
+    # pending timeouts by source id, run by hand
+    timeouts = dict()
+    ids = iter(range(1, 1000))
+
+    def timeout_add(delay, callback):
+        source = next(ids)
+        timeouts[source] = callback
+        return source
+    monkeypatch.setattr(validation.GLib, "timeout_add", timeout_add)
+    monkeypatch.setattr(validation.GLib, "source_remove", timeouts.pop)
+    return timeouts
+
+
+def test_validation_waits_for_typing_to_pause(timeouts):
+    dialog = Dialog()
+    for text in ("2018-05-04 1", "2018-05-04 12", "2018-05-04 12:00"):
+        dialog.type(dialog.end_entry, text)
+    # the OK button is disabled once until the input is validated
+    assert not dialog.end_date_validated
+    assert dialog.validations == 1
+    # each keystroke replaced the pending validation
+    assert len(timeouts) == 1
+    callback, = timeouts.values()
+    assert callback() is False
+    assert dialog.end_date_validated and dialog.start_date_validated
+    assert dialog.parsed_end_datetime.hour == 12
+    assert dialog.validations == 2
+
+
+def test_validation_messages(timeouts):
+    dialog = Dialog()
+    dialog.type(dialog.end_entry, "2018-05-04 09:00")
+    dialog.validate_dates()
+    # the complaint goes to the entry being edited
+    assert not dialog.end_date_validated
+    assert dialog.end_entry.tooltip == \
+        "Start time has to occur before end time."
+    # the start entry was not touched, it shows no errors
+    assert dialog.start_date_validated
+    assert dialog.start_entry.icon_changes == 0
+
+    dialog.type(dialog.start_entry, "bogus")
+    dialog.validate_dates()
+    assert dialog.start_entry.icon == "dialog-error"
+    assert dialog.start_entry.tooltip.startswith("Could not parse")
+    assert dialog.end_entry.icon is None
+
+    # the same message again leaves the icon alone
+    changes = dialog.start_entry.icon_changes
+    dialog.type(dialog.start_entry, "bogus")
+    dialog.validate_dates()
+    assert dialog.start_entry.icon_changes == changes
+    assert not timeouts